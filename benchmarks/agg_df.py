@@ -0,0 +1,60 @@
+"""
+Benchmark of `agg_df`: named aggregations vs a callable per group (serial
+and over a process pool) vs groupby.apply of a Series per group, by number
+of groups.
+
+    python benchmarks/agg_df.py --n-rows 2000000 --n-groups 1000 10000 100000 1000000
+"""
+import sys
+import time
+from pathlib import Path
+from argparse import ArgumentParser
+sys.path.insert(0, str(Path(__file__).parent / "../lib"))
+import numpy as np
+import pandas as pd
+from unknownlib.df import agg_df
+
+
+def stats(x: pd.DataFrame) -> dict:
+    return {"n": len(x), "vol": x["qty"].sum(), "px": x["price"].iloc[-1]}
+
+
+def timeit(func):
+    t = time.perf_counter()
+    res = func()
+    return res, time.perf_counter() - t
+
+
+def main():
+
+    parser = ArgumentParser()
+    parser.add_argument("--n-rows", type=int, default=2_000_000)
+    parser.add_argument("--n-groups", type=int, nargs="+", default=[1_000, 10_000, 100_000, 1_000_000])
+    parser.add_argument("--n-jobs", type=int, default=4)
+    parser.add_argument("--max-callable-groups", type=int, default=100_000,
+                        help="skip the callable path above this number of groups")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    for n_groups in args.n_groups:
+        df = pd.DataFrame({
+            "key": rng.integers(0, n_groups, args.n_rows),
+            "qty": rng.random(args.n_rows),
+            "price": rng.random(args.n_rows),
+        })
+        named, t_named = timeit(lambda: agg_df(df, by="key", func={"n": "size", "vol": ("qty", "sum"), "px": ("price", "last")}))
+        line = f"{n_groups:>9} groups: named {t_named:.3f}s"
+        if n_groups <= args.max_callable_groups:
+            res, t = timeit(lambda: agg_df(df, by="key", func=stats))
+            assert np.allclose(res["vol"], named["vol"])
+            res, t_par = timeit(lambda: agg_df(df, by="key", func=stats, n_jobs=args.n_jobs))
+            assert np.allclose(res["vol"], named["vol"])
+            _, t_apply = timeit(lambda: df.groupby("key").apply(lambda x: pd.Series(stats(x))))
+            line += (f", callable {t:.3f}s ({t / t_named:.0f}x), callable x{args.n_jobs} processes {t_par:.3f}s"
+                     f", apply {t_apply:.3f}s ({t_apply / t_named:.0f}x)")
+        print(line)
+
+
+if __name__ == "__main__":
+
+    main()
@@ -0,0 +1,89 @@
+"""
+Benchmark of decoding raw logs of ERC20 Transfer and Uniswap V3 Swap:
+`process_log` + `flatten_dict` per log vs the columnar `decode_logs`.
+
+    python benchmarks/log_decode.py --n-logs 100000
+"""
+import os
+import sys
+import time
+import random
+from pathlib import Path
+from argparse import ArgumentParser
+sys.path.insert(0, str(Path(__file__).parent / "../lib"))
+import pandas as pd
+from web3 import Web3
+from hexbytes import HexBytes
+from eth_utils import event_abi_to_log_topic
+from unknownlib.evm.core import ERC20
+from unknownlib.evm.decode import decode_logs
+from unknownlib.evm.utils import flatten_dict
+
+
+UNISWAP_V3_SWAP_ABI = [{"anonymous": False, "inputs": [
+    {"indexed": True, "name": "sender", "type": "address"},
+    {"indexed": True, "name": "recipient", "type": "address"},
+    {"indexed": False, "name": "amount0", "type": "int256"},
+    {"indexed": False, "name": "amount1", "type": "int256"},
+    {"indexed": False, "name": "sqrtPriceX96", "type": "uint160"},
+    {"indexed": False, "name": "liquidity", "type": "uint128"},
+    {"indexed": False, "name": "tick", "type": "int24"}],
+    "name": "Swap", "type": "event"}]
+
+
+def _word(value: int) -> bytes:
+    return value.to_bytes(32, "big", signed=True)
+
+
+def make_logs(event, n_logs: int, n_addrs: int, values) -> list:
+    """ Random raw logs of `event`, with `values()` giving the data words.
+    """
+    topic0 = HexBytes(event_abi_to_log_topic(event.abi))
+    addrs = [HexBytes(b"\0" * 12 + os.urandom(20)) for _ in range(n_addrs)]
+    return [{
+        "address": event.address,
+        "topics": [topic0, random.choice(addrs), random.choice(addrs)],
+        "data": HexBytes(b"".join(_word(v) for v in values())),
+        "blockNumber": 17_000_000 + i // 100,
+        "transactionHash": HexBytes(os.urandom(32)),
+        "transactionIndex": i % 100,
+        "blockHash": HexBytes(os.urandom(32)),
+        "logIndex": i % 300,
+        "removed": False,
+    } for i in range(n_logs)]
+
+
+def bench(name: str, raw_logs: list, event):
+    t = time.perf_counter()
+    df_slow = pd.DataFrame([flatten_dict(dict(event.process_log(_))) for _ in raw_logs])
+    t_slow = time.perf_counter() - t
+    t = time.perf_counter()
+    df_fast = decode_logs(raw_logs, event)
+    t_fast = time.perf_counter() - t
+    pd.testing.assert_frame_equal(df_slow, df_fast)
+    print(f"{name:>9}: {len(raw_logs)} logs, process_log {t_slow:.2f}s, "
+          f"decode_logs {t_fast:.2f}s ({t_slow / t_fast:.0f}x)")
+
+
+def main():
+
+    parser = ArgumentParser()
+    parser.add_argument("--n-logs", type=int, default=100_000)
+    parser.add_argument("--n-addrs", type=int, default=1_000)
+    args = parser.parse_args()
+
+    w3 = Web3()
+    addr = "0x0938C63109801Ee4243a487aB84DFfA2Bba4589e"
+    transfer = w3.eth.contract(address=addr, abi=ERC20.ARBITRUM_USDC.abi).events.Transfer()
+    swap = w3.eth.contract(address=addr, abi=UNISWAP_V3_SWAP_ABI).events.Swap()
+    bench("Transfer", make_logs(transfer, args.n_logs, args.n_addrs,
+                                lambda: [random.getrandbits(80)]), transfer)
+    bench("Swap", make_logs(swap, args.n_logs, args.n_addrs,
+                            lambda: [random.getrandbits(80), -random.getrandbits(80),
+                                     random.getrandbits(160), random.getrandbits(128),
+                                     random.randint(-887272, 887272)]), swap)
+
+
+if __name__ == "__main__":
+
+    main()
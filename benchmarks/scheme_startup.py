@@ -0,0 +1,95 @@
+"""
+Benchmark of scheme startup with hundreds of registered element types,
+of which a config uses only a few.
+
+    python benchmarks/scheme_startup.py --n-types 500
+"""
+import sys
+import time
+import tempfile
+import importlib
+from pathlib import Path
+from argparse import ArgumentParser
+sys.path.insert(0, str(Path(__file__).parent / "../lib"))
+from unknownlib.scheme import Element, ElementCatalog, ElementManager
+
+
+def _write_modules(root: Path, n_types: int) -> str:
+    """ A package of `n_types` modules, each with one element class.
+    The classes form a binary tree of subclasses rooted at Element.
+    """
+    pkg = f"bench_elements_{n_types}"
+    (root / pkg).mkdir()
+    (root / pkg / "__init__.py").write_text("")
+    for i in range(n_types):
+        if i == 0:
+            base, imports = "Element", "from unknownlib.scheme import Element\n"
+        else:
+            j = (i - 1) // 2
+            base, imports = f"BenchElement{j}", f"from .m{j} import BenchElement{j}\n"
+        (root / pkg / f"m{i}.py").write_text(
+            f"{imports}\n\nclass BenchElement{i}({base}):\n"
+            f"    def init(self):\n        pass\n\n"
+            f"    def calc(self, time):\n        pass\n")
+    return pkg
+
+
+def _old_register_all_element_types():
+    """ Registration as it was: a recursive walk concatenating lists with sum. """
+    def search_subclasses(cls):
+        return cls.__subclasses__() + sum(
+            [search_subclasses(_) for _ in cls.__subclasses__()], [])
+    catalog = {}
+    for type_ in search_subclasses(Element):
+        catalog[type_.type_name()] = type_
+    return catalog
+
+
+def _create(config: dict):
+    manager = ElementManager()
+    for name, params in config.items():
+        manager.create_element(name, params)
+
+
+def main():
+
+    parser = ArgumentParser()
+    parser.add_argument("--n-types", type=int, default=500)
+    args = parser.parse_args()
+    n = args.n_types
+
+    root = Path(tempfile.mkdtemp())
+    sys.path.insert(0, str(root))
+    config = {f"e{i}": {"type": f"bench_element{i}"} for i in [0, 1, 2]}
+
+    # lazy: only the modules used by the config (here: m0, m1, m2) are imported
+    pkg = _write_modules(root, n)
+    t0 = time.perf_counter()
+    for i in range(n):
+        ElementCatalog.register_lazy_element_type(f"bench_element{i}", f"{pkg}.m{i}:BenchElement{i}")
+    _create(config)
+    t_lazy = time.perf_counter() - t0
+    n_imported = len([m for m in sys.modules if m.startswith(f"{pkg}.")])
+
+    # eager: import every module, then walk all subclasses
+    t0 = time.perf_counter()
+    for i in range(n):
+        importlib.import_module(f"{pkg}.m{i}")
+    t_import = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    _old_register_all_element_types()
+    t_old_walk = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    ElementCatalog.register_all_element_types()
+    t_new_walk = time.perf_counter() - t0
+
+    print(f"n types: {n}")
+    print(f"lazy registration + create 3 elements: {t_lazy * 1e3:.2f} ms ({n_imported} modules imported)")
+    print(f"eager import of all modules:           {t_import * 1e3:.2f} ms")
+    print(f"subclass walk, recursive sum:          {t_old_walk * 1e3:.2f} ms")
+    print(f"subclass walk, iterative:              {t_new_walk * 1e3:.2f} ms")
+
+
+if __name__ == "__main__":
+
+    main()
@@ -0,0 +1,67 @@
+"""
+Benchmark of 256-bit integer columns: object columns of Python ints vs
+"uint256"/"int256" columns, in memory and in common operations.
+
+    python benchmarks/uint256.py --n-rows 1000000
+"""
+import sys
+import time
+import random
+from pathlib import Path
+from argparse import ArgumentParser
+sys.path.insert(0, str(Path(__file__).parent / "../lib"))
+import numpy as np
+import pandas as pd
+from unknownlib.evm.uint256 import scale_decimals
+
+
+def timeit(func):
+    t = time.perf_counter()
+    res = func()
+    return res, time.perf_counter() - t
+
+
+def bench(name: str, func_obj, func_compact, check=lambda a, b: a == b):
+    res_obj, t_obj = timeit(func_obj)
+    res_compact, t_compact = timeit(func_compact)
+    assert check(res_obj, res_compact), f"{name}: results differ"
+    print(f"{name:>12}: object {t_obj:.3f}s, compact {t_compact:.3f}s ({t_obj / t_compact:.0f}x)")
+
+
+def main():
+
+    parser = ArgumentParser()
+    parser.add_argument("--n-rows", type=int, default=1_000_000)
+    parser.add_argument("--n-groups", type=int, default=1_000)
+    args = parser.parse_args()
+
+    n = args.n_rows
+    values = [random.getrandbits(96) for _ in range(n)]
+    amounts = [random.getrandbits(96) - 2 ** 95 for _ in range(n)]
+    df_obj = pd.DataFrame({
+        "holder": np.random.randint(0, args.n_groups, n),
+        "value": pd.Series(values, dtype=object),
+        "amount": pd.Series(amounts, dtype=object),
+    })
+    df = df_obj.astype({"value": "uint256", "amount": "int256"})
+    mb_obj = df_obj[["value", "amount"]].memory_usage(deep=True, index=False).sum() / 2 ** 20
+    mb = df[["value", "amount"]].memory_usage(deep=True, index=False).sum() / 2 ** 20
+    print(f"{'memory':>12}: object {mb_obj:.0f}MB, compact {mb:.0f}MB ({mb_obj / mb:.1f}x)")
+
+    same = lambda a, b: (pd.Series(a, dtype=object) == pd.Series(b).astype(object)).all()
+    bench("add", lambda: df_obj["value"] + df_obj["value"], lambda: df["value"] + df["value"], same)
+    bench("sub", lambda: df_obj["amount"] - df_obj["amount"].shift(1, fill_value=0),
+          lambda: df["amount"] - df["amount"].shift(1, fill_value=0), same)
+    bench("compare", lambda: (df_obj["value"] > 2 ** 95).to_numpy(bool), lambda: (df["value"] > 2 ** 95).to_numpy(bool),
+          lambda a, b: (a == b).all())
+    bench("to float", lambda: df_obj["value"].astype(float) / 1e18, lambda: scale_decimals(df["value"], 18),
+          lambda a, b: np.allclose(a, b, rtol=1e-15))
+    bench("sum", lambda: df_obj["amount"].sum(), lambda: df["amount"].sum())
+    bench("groupby sum", lambda: df_obj.groupby("holder")["value"].sum(), lambda: df.groupby("holder")["value"].sum(), same)
+    bench("sort", lambda: df_obj["value"].sort_values().index, lambda: df["value"].sort_values().index,
+          lambda a, b: (a == b).all())
+
+
+if __name__ == "__main__":
+
+    main()
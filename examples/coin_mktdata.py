@@ -14,7 +14,7 @@ from unknownlib.evm.fastw3 import FastW3, Chain, log
 from unknownlib.evm.mktdata import ChainLinkPriceFeed, Coin
 from unknownlib.evm.core import ERC721ContractBook
 from unknownlib.evm.timestamp import to_int
-from unknownlib.evm.sql import SQLConnector
+from unknownlib.evm.storage import connect_storage
 from unknownlib.dt import sleep
 from typing import Tuple, List, Optional
 
@@ -53,9 +53,8 @@ date range [{sdate}, {edate}];
 time range [{stime}, {etime});
 blocks [{sblock}, {eblock}]; freq = {freq} blocks""")
 
-    sql = SQLConnector()
     db_path = os.path.expandvars('$HOME/data/mktdata.db')
-    sql.connect(db_path)
+    sql = connect_storage(db_path) # UNKNOWN_STORAGE_BACKEND=duckdb for columnar storage
 
 
     table_name=f"coin_mktdata_{token_name}"
@@ -64,22 +63,14 @@ blocks [{sblock}, {eblock}]; freq = {freq} blocks""")
         if delete_staus is False:
             exit(0)
 
-    if sql.table_exists(table_name):
-        block_number_count = sql.read(f"SELECT blockNumber FROM {table_name}")["blockNumber"].value_counts()
-        assert (block_number_count <= 1).all(), f"duplicate tokenId found: {block_number_count[block_number_count > 1]}"
-        existing_block_numbers = list(block_number_count.index)
-    else:
-        existing_block_numbers = []
-    
-    for block_number in range(sblock, eblock + 1, freq):
-        if block_number in existing_block_numbers:
-            log.info(f"block number {block_number} is found in the database; skipping ")
-            continue
-        price_data = {
-            "blockNumber": block_number,
-            "price": w3.get_price(token, block_number=block_number),
-            "timestamp": w3.get_block_time(block_number=block_number, tz="UTC"),
-        }
-        log.info(price_data)
-        row = pd.DataFrame(price_data, index=["blockNumber"])
-        sql.write(row, table_name=table_name, index=["blockNumber"])
\ No newline at end of file
+    # resume: only blocks of the grid that aren't in the table yet
+    for range_start, range_end in sql.missing_ranges(table_name, "blockNumber", sblock, eblock + 1, freq):
+        for block_number in range(range_start, range_end, freq):
+            price_data = {
+                "blockNumber": block_number,
+                "price": w3.get_price(token, block_number=block_number),
+                "timestamp": w3.get_block_time(block_number=block_number, tz="UTC"),
+            }
+            log.info(price_data)
+            row = pd.DataFrame(price_data, index=["blockNumber"])
+            sql.write(row, table_name=table_name, index=["blockNumber"])
@@ -4,7 +4,7 @@ import pandas as pd
 import numpy as np
 from web3 import Web3
 from pprint import pprint
-from unknownlib.evm.sql import SQLConnector
+from unknownlib.evm.storage import connect_storage
 from unknownlib.evm import flatten_dict, Chain, Addr, interpolate_timestamp, log, ContractBook, Etherscanner
 from unknownlib.dt import sleep
 
@@ -28,8 +28,7 @@ if __name__ == "__main__":
     w3.init_web3(provider="infura", chain=chain)
     w3.init_scan(chain=chain)
     db_path = os.path.expandvars('$HOME/data/evm.db')
-    sql = SQLConnector()
-    sql.connect(db_path)
+    sql = connect_storage(db_path) # UNKNOWN_STORAGE_BACKEND=duckdb for columnar storage
 
     contract_name = "WETH"
     w3.init_contract(addr="0xC02aaA39b223FE8D0A0e5C4F27eAD9083C756Cc2", key=contract_name)
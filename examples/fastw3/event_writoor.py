@@ -3,10 +3,9 @@ This example fetches logs of an event from a contract and write to sql database.
 """
 import os
 import pandas as pd
-from hexbytes import HexBytes
 from unknownlib.evm.fastw3 import FastW3, Chain, log
 from unknownlib.evm.timestamp import to_int
-from unknownlib.evm.sql import SQLConnector
+from unknownlib.evm.storage import connect_storage
 from typing import Tuple, List
 
 fw = FastW3()
@@ -24,26 +23,16 @@ def fetch_range(*,
     to_block = fw.scan.get_block_number_by_timestamp(to_int(end_time, "s")) - 1
     log.info(f"({start_time}, {end_time}) -> blocks({from_block}, {to_block}), {to_block-from_block+1} blocks in total")
 
-    raw_logs = []
-    for event_name in event_names:
-        raw_logs += fw.get_event_logs(
-            contract=contract_name,
-            event_name=event_name,
-            from_block=from_block,
-            to_block=to_block)
-    if len(raw_logs) == 0:
+    dfs = fw.get_multi_logs_as_df(
+        stime=start_time,
+        etime=end_time,
+        events=[(contract_name, _) for _ in event_names])
+    dfs = [_ for _ in dfs.values() if not _.empty]
+    if len(dfs) == 0:
         log.info(f"no log found; returning")
         return None
 
-    def _flatten_log(log_: dict) -> dict:
-        """ Make log a single-layer dictionary by expanding "args". """
-        return {
-            **{f"args_{k}": v.hex() if isinstance(v, (HexBytes, bytes)) else v for k, v in log_["args"].items()},
-            **{k: v.hex() if isinstance(v, (HexBytes, bytes)) else v for k, v in log_.items() if k != "args"}
-        }
-
-    logs = [_flatten_log(_) for _ in raw_logs]
-    df = pd.DataFrame(logs)
+    df = pd.concat(dfs).sort_values(["blockNumber", "logIndex"]).reset_index(drop=True)
     stime = fw.get_block_time(block_number=from_block)
     etime = fw.get_block_time(block_number=to_block)
     df["timestamp"] = (etime - stime) / (to_block - from_block) * (df["blockNumber"] - from_block) + stime
@@ -79,8 +68,7 @@ if __name__ == "__main__":
     fw.init_scan(chain=chain)
     fw.init_contract(addr=contract_addr, key=contract_name)
     table_name = f"{contract_name}_{'_'.join(event_names)}"
-    sql = SQLConnector()
-    sql.connect(db_path)
+    sql = connect_storage(db_path) # UNKNOWN_STORAGE_BACKEND=duckdb for columnar storage
 
     for date in pd.date_range(str(sdate), str(edate), freq="1d"):
         date = int(date.strftime("%Y%m%d"))
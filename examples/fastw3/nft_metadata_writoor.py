@@ -1,5 +1,6 @@
 """
-This example fetches logs of an event from a contract and write to sql database.
+This example fetches metadata of the tokens of an NFT contract and write to
+sql database, or with --ndjson, to a (compressed) line-delimited JSON file.
 """
 import os
 import requests
@@ -13,8 +14,9 @@ from pprint import pprint
 from unknownlib.evm.fastw3 import FastW3, Chain, log
 from unknownlib.evm.core import ERC721ContractBook
 from unknownlib.evm.timestamp import to_int
-from unknownlib.evm.sql import SQLConnector
+from unknownlib.evm.storage import connect_storage
 from unknownlib.dt import sleep
+from unknownlib.io import write_ndjson
 from typing import Tuple, List, Optional
 
 
@@ -23,7 +25,6 @@ class NFTGuru(FastW3, ERC721ContractBook):
 
 
 w3 = NFTGuru()
-sql = SQLConnector()
 sess = requests.Session()
 sess.mount('https://', HTTPAdapter(pool_connections=1))
 sess.auth = (
@@ -36,7 +37,8 @@ def get_token_metadata(
     token_id: int,
     max_retries: int=5,
     wait="0.2s",
-    retry_wait="5s") -> Optional[dict]:
+    retry_wait="5s",
+    raw: bool=False) -> Optional[dict]:
 
     contract_addr = w3.contract(contract_name).address
 
@@ -58,7 +60,8 @@ def get_token_metadata(
             if j["metadata"] is None:
                 return
             else:
-                metadata = {k: json.dumps(j["metadata"][k]) for k in j["metadata"]}
+                # fields are JSON text in sql, as is in ndjson
+                metadata = dict(j["metadata"]) if raw else {k: json.dumps(j["metadata"][k]) for k in j["metadata"]}
                 metadata["tokenId"] = token_id
                 sleep(wait)
                 return metadata
@@ -77,6 +80,7 @@ if __name__ == "__main__":
     parser.add_argument("--addr")
     parser.add_argument("--delete", action="store_true")
     parser.add_argument("--start-id", type=int, default=0)
+    parser.add_argument("--ndjson", help="write to this file instead, e.g. metadata.ndjson.gz")
     args = parser.parse_args()
 
     chain = Chain.ETHEREUM
@@ -88,7 +92,7 @@ if __name__ == "__main__":
     w3.init_web3(provider="infura", chain=chain)
     w3.init_scan(chain=chain)
     w3.init_contract(addr=contract_addr, key=contract_name)
-    sql.connect(db_path)
+    sql = connect_storage(db_path)
 
     table_name=f"nft_metadata_{contract_name}"
     if args.delete:
@@ -98,14 +102,13 @@ if __name__ == "__main__":
             log.info(f"got wrong table name; aborted")
             exit(0)
 
-    if sql.table_exists(table_name):
-        token_id_count = sql.read(f"SELECT tokenId FROM {table_name}")["tokenId"].value_counts()
-        assert (token_id_count <= 1).all(), f"duplicate tokenId found: {token_id_count[token_id_count > 1]}"
-        existing_token_id = list(token_id_count.index)
-    else:
-        existing_token_id = []
-
     max_id = w3.contract(contract_name).functions["totalSupply"]().call()
+    if args.ndjson:
+        # streamed to the file as fetched; it only replaces an existing file when complete
+        records = (get_token_metadata(contract_name, _, raw=True) for _ in range(args.start_id, max_id + 1))
+        write_ndjson((_ for _ in records if _), os.path.expandvars(args.ndjson))
+        exit(0)
+    existing_token_id = sql.existing_keys(table_name, "tokenId", range(args.start_id, max_id + 1))
     failed_token_id_and_errors = {}
     for token_id in range(args.start_id, max_id + 1): # +1 to include `max_id`
 
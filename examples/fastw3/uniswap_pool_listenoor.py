@@ -6,6 +6,8 @@ import os
 import pandas as pd
 import numpy as np
 from unknownlib.evm.fastw3 import FastW3, Chain
+from unknownlib.evm import ERC20
+from unknownlib.evm.uniswap import v3_swaps
 from unknownlib.plt.bk import tsplot
 from unknownlib.evm.timestamp import to_int
 from bokeh.plotting import output_file, save
@@ -36,9 +38,10 @@ if __name__ == "__main__":
         to_block=end_block_number,
     )
 
-    df = pd.DataFrame([{**_["args"], **{k: _[k] for k in ["blockNumber"]}} for _ in logs])
-    df["price"] = - df["amount0"] / df["amount1"] * 1e18 / 1e6
-    df["side"] = np.where( df["amount0"] > 0, "buy", "sell")
+    df = pd.DataFrame([{**{f"args_{k}": v for k, v in _["args"].items()}, **{k: _[k] for k in ["blockNumber", "logIndex"]}} for _ in logs])
+    # token0 = USDC, token1 = WETH; prices in USDC per WETH
+    df = v3_swaps(df, decimals0=ERC20.USDC, decimals1=ERC20.WETH, book=fw, invert=True)
+    df["side"] = np.where(df["side"] < 0, "buy", "sell") # of WETH
     df["timestamp"] = start_time + (end_time - start_time)  / (end_block_number - start_block_number) * ( df["blockNumber"] - start_block_number)
 
     p = tsplot(df,
@@ -9,9 +9,10 @@ import pandas as pd
 import numpy as np
 from unknownlib.plt.bk import tsplot
 from unknownlib.evm.fastw3 import FastW3
-from unknownlib.evm.sql import SQLConnector
+from unknownlib.evm.storage import connect_storage
 from unknownlib.evm.timestamp import to_int
-from unknownlib.evm import flatten_dict, Chain, Addr, interpolate_timestamp, log
+from unknownlib.evm import flatten_dict, Chain, Addr, ERC20, interpolate_timestamp, log
+from unknownlib.evm.uniswap import v2_swaps
 from hexbytes import HexBytes
 from eth_account import Account
 from unknownlib.algo import batch_run
@@ -63,36 +64,26 @@ def get_logs(*,
         etime = min(_date_to_utc(edate), pd.Timestamp.utcnow())
     batch_freq = "1d"
 
-    df_swap = fw.get_logs_as_df(
+    # swaps and transfers in one sweep over the blocks
+    dfs = fw.get_multi_logs_as_df(
         stime=stime,
         etime=etime,
-        contract_name=f"{ticker}_pool",
-        event_name="Swap",
-        batch_size=pd.Timedelta(batch_freq),
-    )
-
-    df_tfer = fw.get_logs_as_df(
-        stime=stime,
-        etime=etime,
-        contract_name=f"{ticker}_token",
-        event_name="Transfer",
+        events=[(f"{ticker}_pool", "Swap"), (f"{ticker}_token", "Transfer")],
         batch_size=pd.Timedelta(batch_freq),
     )
+    df_swap = dfs[(f"{ticker}_pool", "Swap")]
+    df_tfer = dfs[(f"{ticker}_token", "Transfer")]
     df_tfer = interpolate_timestamp(df_tfer, fw)
 
-    def safe_div(x, y):
-        return np.where(
-            y != 0,
-            x / np.where(y != 0, y, 1),
-            np.nan)
-    df_swap["price"] = np.where(
-        df_swap["args_amount1In"] > 0,
-        safe_div(df_swap["args_amount1In"], df_swap["args_amount0Out"]),
-        safe_div(df_swap["args_amount1Out"], df_swap["args_amount0In"])
-    )
-    df_swap["volume1"] = df_swap["args_amount1In"] + df_swap["args_amount1Out"]
-    df_swap["volume0"] = df_swap["args_amount0In"] + df_swap["args_amount0Out"]
-    df_swap["side"] = np.where(df_swap["args_amount1In"] > 0, 1, -1)
+    # tokens of the pool are ordered by address
+    token_ca = fw.contract(f"{ticker}_token").address
+    weth_is_token0 = int(ERC20.WETH.addr, 16) < int(token_ca, 16)
+    tokens = (ERC20.WETH, f"{ticker}_token") if weth_is_token0 else (f"{ticker}_token", ERC20.WETH)
+    # prices in WETH per token, side 1 if the token is bought
+    trades = v2_swaps(df_swap, decimals0=tokens[0], decimals1=tokens[1], book=fw, invert=weth_is_token0)
+    if weth_is_token0:
+        trades["side"] = -trades["side"]
+    df_swap[["price", "volume0", "volume1", "side"]] = trades[["price", "volume0", "volume1", "side"]]
     # enrich swaps
     df = df_swap[["transactionHash", "price", "side", "blockNumber", "logIndex"]].copy()
     df_swap_1 = df.copy()
@@ -120,8 +111,7 @@ if __name__ == "__main__":
     fw.init_web3(provider="infura", chain=chain)
     fw.init_scan(chain=chain)
     db_path = os.path.expandvars('$HOME/data/evm.db')
-    sql = SQLConnector()
-    sql.connect(db_path)
+    sql = connect_storage(db_path) # UNKNOWN_STORAGE_BACKEND=duckdb for columnar storage
 
     ticker = args.ticker
     token_ca = args.token_ca
@@ -4,7 +4,37 @@ log.basicConfig(
     datefmt="%Y%m%d-%H:%M:%S",
     format='unknownlib-%(asctime)s-%(funcName)s-%(levelname)s-%(message)s')
 
-    
-from .io import *
-from .df import *
-from .algo import *
\ No newline at end of file
+from ._lazy import lazy_getattr
+
+__all__ = [
+    "log",
+    "save_df",
+    "collect_df",
+    "load_json",
+    "dump_json",
+    "iter_ndjson",
+    "read_ndjson",
+    "write_ndjson",
+    "agg_df",
+    "cross_join",
+    "iter_cross_join",
+    "batch_run",
+    "iter_batch_run",
+]
+
+# pandas is only imported on first use of these; the `df.uk` accessor is
+# registered with .df, e.g. on first use of agg_df or `import unknownlib.df`
+__getattr__ = lazy_getattr(__name__, {
+    "save_df": ".io",
+    "collect_df": ".io",
+    "load_json": ".io",
+    "dump_json": ".io",
+    "iter_ndjson": ".io",
+    "read_ndjson": ".io",
+    "write_ndjson": ".io",
+    "agg_df": ".df",
+    "cross_join": ".df",
+    "iter_cross_join": ".df",
+    "batch_run": ".algo",
+    "iter_batch_run": ".algo",
+})
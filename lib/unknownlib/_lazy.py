@@ -0,0 +1,24 @@
+"""
+Module-level lazy attributes (PEP 562), so that importing a package doesn't
+import heavy dependencies (pandas, web3, bokeh) until they are used.
+"""
+from importlib import import_module
+from typing import Dict, Callable, Any
+
+
+def lazy_getattr(package: str, attrs: Dict[str, str]) -> Callable[[str], Any]:
+    """ Make a module `__getattr__` that imports `attrs[name]`, a module path
+    relative to `package`, on first access of `name`.
+
+    Examples
+    --------
+    >>> __getattr__ = lazy_getattr(__name__, {"FastW3": ".fastw3"})
+    """
+    def __getattr__(name: str) -> Any:
+        if name in attrs:
+            value = getattr(import_module(attrs[name], package), name)
+            setattr(import_module(package), name, value) # cache, skip __getattr__ next time
+            return value
+        raise AttributeError(f"module {package} has no attribute {name}")
+    return __getattr__
+
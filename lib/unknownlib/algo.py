@@ -1,49 +1,245 @@
-import pandas as pd
+import os
+import json
+import time
 import typing
+import numbers
 from . import log
 
+if typing.TYPE_CHECKING:
+    import pandas as pd
 
-def batch_run(*,
-              func: typing.Callable[[pd.Timestamp], pd.Timestamp],
-              start: pd.Timestamp,
-              end: pd.Timestamp,
-              batch_size: pd.Timedelta,
-              min_batch_size: typing.Optional[pd.Timedelta]=None,
-              ) -> typing.List[typing.Any]:
+
+__all__ = [
+    "RetryPolicy",
+    "batch_run",
+    "iter_batch_run",
+]
+
+
+Point = typing.Any # int (e.g. block number), or pd.Timestamp
+Delta = typing.Any # int, or pd.Timedelta
+
+
+class RetryPolicy:
+    """ How `batch_run` handles a batch that raised.
+
+    Exceptions of `fatal`, or not of `retriable`, are raised at once. Other
+    exceptions split the batch in halves while they are no smaller than
+    the min batch size; then the batch is retried up to `max_retries`
+    times, waiting `backoff` * `multiplier` ** n (at most `max_backoff`)
+    seconds before the n-th retry.
     """
-    Sequetially run:
-        func(start, start + batch_size),
-        func(start + batch_size, start + 2 * batch_size),
-        ...
-        func(start + n*batch_size, start + end),
-    and return the results as a list.
-    * if any of the batches failed, then shrink batch size by 2, until
-    the batch goes through or reach min batch size.
+
+    def __init__(self,
+                 *,
+                 max_retries: int=3,
+                 backoff: float=1.0,
+                 multiplier: float=2.0,
+                 max_backoff: float=60.0,
+                 retriable: typing.Tuple[typing.Type[BaseException], ...]=(Exception,),
+                 fatal: typing.Tuple[typing.Type[BaseException], ...]=(TypeError, AssertionError, NotImplementedError),
+                 ):
+        assert max_retries >= 0, f"max_retries {max_retries} < 0"
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.multiplier = multiplier
+        self.max_backoff = max_backoff
+        self.retriable = retriable
+        self.fatal = fatal
+
+    def is_retriable(self, e: BaseException) -> bool:
+        return isinstance(e, self.retriable) and not isinstance(e, self.fatal)
+
+    def wait(self, n_retries: int) -> float:
+        """ Seconds to wait before the `n_retries`-th retry. """
+        return min(self.backoff * self.multiplier ** (n_retries - 1), self.max_backoff)
+
+
+def _half(delta: Delta) -> Delta:
+    return delta // 2 if isinstance(delta, numbers.Integral) else delta / 2
+
+
+class _Checkpoint:
+    """ Completed sub-ranges, as [start, end] pairs in a JSON file. """
+
+    def __init__(self, path: typing.Optional[str], start: Point):
+        self._path = path
+        self._type = type(start)
+        self.ranges: typing.List[typing.Tuple[Point, Point]] = []
+        if path is not None and os.path.exists(path):
+            with open(path, "r") as f:
+                self.ranges = [(self._type(a), self._type(b)) for a, b in json.load(f)]
+            log.info(f"resuming from {len(self.ranges)} completed ranges in {path}")
+
+    def gaps(self, start: Point, end: Point) -> typing.List[typing.Tuple[Point, Point]]:
+        """ Sub-ranges of [start, end) not completed yet. """
+        res = []
+        for a, b in sorted(self.ranges):
+            if a > start:
+                res.append((start, min(a, end)))
+            start = max(start, b)
+            if start >= end:
+                return res
+        return res + [(start, end)]
+
+    def add(self, start: Point, end: Point):
+        if self._path is None:
+            return
+        ranges = []
+        for a, b in sorted(self.ranges + [(start, end)]):
+            if ranges and a <= ranges[-1][1]:
+                ranges[-1] = (ranges[-1][0], max(ranges[-1][1], b))
+            else:
+                ranges.append((a, b))
+        self.ranges = ranges
+        encode = lambda x: int(x) if isinstance(x, numbers.Integral) else str(x)
+        tmp = f"{self._path}.tmp"
+        with open(tmp, "w") as f:
+            json.dump([[encode(a), encode(b)] for a, b in ranges], f)
+        os.replace(tmp, self._path)
+
+
+def iter_batch_run(*,
+                   func: typing.Callable[[Point, Point], typing.Any],
+                   start: Point,
+                   end: Point,
+                   batch_size: Delta,
+                   min_batch_size: typing.Optional[Delta]=None,
+                   max_workers: int=1,
+                   ordered: bool=True,
+                   retry: typing.Optional[RetryPolicy]=None,
+                   checkpoint_file: typing.Optional[str]=None,
+                   ) -> typing.Iterator[typing.Tuple[Point, Point, typing.Any]]:
+    """
+    Run func(a, b) over consecutive batches [a, b) of [start, end), and
+    yield (a, b, result) as batches complete.
+    * `start`, `end` are ints (e.g. block numbers, `batch_size` an int)
+    or timestamps (`batch_size` a pd.Timedelta).
+    * up to `max_workers` batches run at a time, in threads; with
+    `ordered`, results are yielded by `a`, otherwise as they complete.
+    * a failed batch is split in halves down to `min_batch_size` (default
+    `batch_size` / 4), then retried as by `retry`; after a success, the
+    size of new batches grows back, doubling up to `batch_size`. Retries
+    wait in the queue, not in a worker.
+    * with `ordered`, new batches are not started while 2 * `max_workers`
+    results wait for an earlier batch, to bound memory.
+    * with `checkpoint_file`, batches are recorded there once their results
+    are consumed (i.e. the generator is resumed after yielding them), and
+    skipped when run again.
     """
+    from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
     assert start <= end, f"failed: {start} < {end}"
-    batch_start = start
-    res = []
-    batch_id = 0
+    assert max_workers >= 1, f"max_workers {max_workers} < 1"
+    retry = RetryPolicy() if retry is None else retry
     if min_batch_size is not None:
         min_delta = min_batch_size
     else:
-        min_delta = batch_size / 4
-
-    while batch_start < end:
-        delta = batch_size
-        while delta >= min_delta:
-            try:
-                batch_end  = min(batch_start + delta, end)
-                log.info(f"running batch {batch_id} ({batch_start}, {batch_end})")
-                res_batch = func(batch_start, batch_end)
-                res.append(res_batch)
-                batch_start = batch_end
+        min_delta = max(_half(_half(batch_size)), 1) if isinstance(batch_size, numbers.Integral) else batch_size / 4
+    checkpoint = _Checkpoint(checkpoint_file, start)
+    gaps = checkpoint.gaps(start, end)
+    delta = batch_size
+    queue: typing.List[typing.Tuple[Point, Point, int, float]] = [] # failed batches: (a, b, retries, monotonic time to run at)
+    running: typing.Dict[typing.Any, typing.Tuple[Point, Point, int]] = {}
+    done: typing.Dict[Point, typing.Tuple[Point, typing.Any]] = {} # a -> (b, result), of batches not yielded
+    # batches are yielded by a, from the beginning of each gap
+    next_starts = [a for a, _ in gaps]
+    next_ends = {a: b for a, b in gaps}
+    max_done = 2 * max_workers
+    batch_id = 0
+
+    def next_batch() -> typing.Optional[typing.Tuple[Point, Point, int]]:
+        now = time.monotonic()
+        for i, (a, b, n_retries, run_at) in enumerate(queue):
+            if run_at <= now:
+                del queue[i]
+                return (a, b, n_retries)
+        if ordered and len(done) >= max_done:
+            return None
+        while gaps and gaps[0][0] >= gaps[0][1]:
+            gaps.pop(0)
+        if not gaps:
+            return None
+        a, b = gaps[0]
+        b = min(a + delta, b)
+        gaps[0] = (b, gaps[0][1])
+        return (a, b, 0)
+
+    executor = ThreadPoolExecutor(max_workers)
+    try:
+        while True:
+            while len(running) < max_workers:
+                batch = next_batch()
+                if batch is None:
+                    break
+                a, b, n_retries = batch
+                log.info(f"running batch {batch_id} ({a}, {b})" + (f", retry {n_retries}" if n_retries else ""))
                 batch_id += 1
-                break
-            except Exception as e:
-                log.info(f"{e}")
-                delta /= 2
-                log.info(f"reducing batch size to: {delta}")
-        if delta < min_delta:
-            raise Exception(f"failed to run with min batch size {min_delta}")
-    return res
\ No newline at end of file
+                running[executor.submit(func, a, b)] = batch
+            # queued retries that are not due yet; they would have been started otherwise
+            timeout = max(min(_[3] for _ in queue) - time.monotonic(), 0) if queue and len(running) < max_workers else None
+            if not running:
+                if not queue:
+                    break
+                time.sleep(timeout)
+                continue
+            completed, _ = wait(running, timeout=timeout, return_when=FIRST_COMPLETED)
+            for future in completed:
+                a, b, n_retries = running.pop(future)
+                e = future.exception()
+                if e is None:
+                    delta = min(delta * 2, batch_size)
+                    if not ordered:
+                        yield a, b, future.result()
+                        checkpoint.add(a, b) # once the result is consumed
+                    else:
+                        done[a] = (b, future.result())
+                    continue
+                log.info(f"batch ({a}, {b}) failed: {e}")
+                if not retry.is_retriable(e):
+                    raise e
+                mid = a + _half(b - a)
+                if mid - a >= min_delta and mid > a:
+                    delta = min(delta, mid - a)
+                    log.info(f"reducing batch size to: {delta}")
+                    run_at = time.monotonic() + (retry.wait(n_retries) if n_retries else 0)
+                    queue[:0] = [(a, mid, n_retries, run_at), (mid, b, n_retries, run_at)]
+                elif n_retries < retry.max_retries:
+                    queue.insert(0, (a, b, n_retries + 1, time.monotonic() + retry.wait(n_retries + 1)))
+                else:
+                    raise Exception(f"failed to run batch ({a}, {b}) with min batch size {min_delta} "
+                                    f"after {n_retries} retries") from e
+            while ordered and next_starts and next_starts[0] in done:
+                a = next_starts[0]
+                b, res = done.pop(a)
+                yield a, b, res
+                checkpoint.add(a, b)
+                if b < next_ends[next_starts[0]]:
+                    next_starts[0] = b
+                    next_ends[b] = next_ends.pop(a)
+                else:
+                    next_ends.pop(a)
+                    next_starts.pop(0)
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+
+
+def batch_run(*,
+              func: typing.Callable[[Point, Point], typing.Any],
+              start: Point,
+              end: Point,
+              batch_size: Delta,
+              min_batch_size: typing.Optional[Delta]=None,
+              **kw,
+              ) -> typing.List[typing.Any]:
+    """
+    Run:
+        func(start, start + batch_size),
+        func(start + batch_size, start + 2 * batch_size),
+        ...
+    and return the results as a list, in order; see `iter_batch_run`
+    for the other arguments. Checkpoints are not supported, as a resumed
+    run would return only part of the results; use `iter_batch_run`.
+    """
+    assert "checkpoint_file" not in kw, "checkpoint_file is only supported by iter_batch_run"
+    return [res for _, _, res in iter_batch_run(
+        func=func, start=start, end=end, batch_size=batch_size, min_batch_size=min_batch_size, **kw)]
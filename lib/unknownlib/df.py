@@ -1,33 +1,132 @@
+import numpy as np
 import pandas as pd
-from typing import Optional, Union, List, Callable, Dict, Sequence
+from typing import Optional, Union, List, Callable, Dict, Sequence, Tuple, Iterator
 
 __all__ = [
     "agg_df",
     "cross_join",
+    "iter_cross_join",
 ]
 
 
+AggSpec = Union[str, Tuple[str, Union[str, Callable]]] # "size", or (column, reduction) as in groupby.agg
+
+
+def _agg_named(df: pd.DataFrame, by: Union[str, List[str]], spec: Dict[str, AggSpec]) -> pd.DataFrame:
+    """ Named aggregations with the native reductions of groupby. """
+    g = df.groupby(by, sort=True)
+    named = {}
+    for name, _ in spec.items():
+        if isinstance(_, tuple) and len(_) == 2:
+            named[name] = pd.NamedAgg(*_)
+        elif _ != "size":
+            raise ValueError(f"{name}: {_} is neither \"size\" nor a (column, reduction) tuple")
+    res = g.agg(**named) if named else pd.DataFrame(index=g.size().index)
+    for name, _ in spec.items():
+        if name not in named:
+            res[name] = g.size()
+    return res[list(spec.keys())].reset_index()
+
+
+def _agg_apply(df: pd.DataFrame, by: Union[str, List[str]], func: Callable) -> pd.DataFrame:
+    """ `func` of each group (without the columns of `by`) as a row. """
+    keys = [by] if isinstance(by, str) else list(by)
+    g = df.groupby(keys, sort=True)[[_ for _ in df.columns if _ not in keys]]
+    index, rows = [], []
+    for k, x in g:
+        index.append(k[0] if len(keys) == 1 else k)
+        rows.append(func(x))
+    if not rows:
+        return pd.DataFrame(columns=keys)
+    if not all(isinstance(_, dict) for _ in rows):
+        rows = [pd.Series(_) for _ in rows]
+    # one DataFrame of all rows rather than a Series per group
+    index = pd.Index(index, name=keys[0]) if len(keys) == 1 else pd.MultiIndex.from_tuples(index, names=keys)
+    return pd.DataFrame(rows, index=index).reset_index()
+
+
+def _agg_chunk(a: Tuple[pd.DataFrame, Union[str, List[str]], Callable]) -> pd.DataFrame:
+    return _agg_apply(*a)
+
+
 def agg_df(df: pd.DataFrame,
            *,
            by: Union[str, List[str]],
-           func: Callable,
+           func: Union[Callable, Dict[str, AggSpec]],
+           n_jobs: int=1,
            ) -> pd.DataFrame:
-           
-    return df.groupby(by).apply(lambda x: pd.Series(func(x))).reset_index()
+    """ One row per group of `by`.
+
+    `func` is either named aggregations, e.g.
+    {"n": "size", "vol": ("qty", "sum"), "px": ("price", "last")}, done by the
+    native reductions of groupby; or a callable of each group returning a
+    dict (or anything `pd.Series` takes), run in `n_jobs` processes over
+    chunks of the groups if `n_jobs` > 1 (then `func` must be picklable,
+    i.e. not a lambda).
+    """
+    if isinstance(func, dict):
+        return _agg_named(df, by, func)
+    if n_jobs <= 1 or len(df) == 0:
+        return _agg_apply(df, by, func)
+    import multiprocessing
+    codes = df.groupby(by, sort=True).ngroup().to_numpy()
+    if codes.max() < 0: # all keys are NaN, no groups
+        return _agg_apply(df, by, func)
+    n_chunks = min(n_jobs * 4, codes.max() + 1)
+    chunk = codes * n_chunks // (codes.max() + 1) # consecutive groups per chunk
+    order = np.argsort(chunk, kind="stable")
+    bounds = np.searchsorted(chunk[order], np.arange(n_chunks + 1))
+    args = [(df.iloc[order[lo:hi]], by, func) for lo, hi in zip(bounds[:-1], bounds[1:])]
+    with multiprocessing.Pool(n_jobs) as pool:
+        return pd.concat(pool.map(_agg_chunk, args), ignore_index=True)
 
     
+def _grid_axes(grid: Dict[str, Sequence]) -> Tuple[List[pd.Series], List[int]]:
+    """ Values of each axis, and the number of rows each value spans. """
+    axes = [pd.Series(list(_), name=k) for k, _ in grid.items()]
+    spans = [int(np.prod([len(_) for _ in axes[i + 1:]], dtype=np.int64)) for i in range(len(axes))]
+    return axes, spans
+
+
+def _grid_rows(axes: List[pd.Series], spans: List[int], start: int, end: int) -> pd.DataFrame:
+    """ Rows [start, end) of the grid of `axes`. """
+    rows = np.arange(start, end, dtype=np.int64)
+    return pd.DataFrame(
+        {_.name: _.array.take(rows // span % len(_)) for _, span in zip(axes, spans)},
+        index=pd.RangeIndex(start, end))
+
+
 def cross_join(**kw: Dict[str, Sequence]) -> pd.DataFrame:
-    """ Equivalent to "CJ" in R data.table.
+    """ Equivalent to "CJ" in R data.table: all combinations of the values
+    of the arguments, the first varying slowest.
     """
-    from functools import reduce
-    df_list = []
-    for key, value in kw.items():
-        df_tmp = pd.DataFrame({key: list(value), "__key": 0})
-        df_list.append(df_tmp)
-    res = reduce(lambda x, y: pd.merge(x, y, on="__key"), df_list)
-    return res.drop("__key", axis=1)
-   
-    
+    axes, spans = _grid_axes(kw)
+    n = spans[0] * len(axes[0]) if axes else 0
+    columns = {}
+    for _, span in zip(axes, spans):
+        # each column is filled once by broadcasting its values, without temporaries
+        shape = (n // max(span * len(_), 1), len(_), span)
+        if isinstance(_.dtype, np.dtype):
+            columns[_.name] = np.empty(n, dtype=_.dtype)
+            columns[_.name].reshape(shape)[:] = _.to_numpy()[None, :, None]
+        else:
+            codes = np.empty(n, dtype=np.int64)
+            codes.reshape(shape)[:] = np.arange(len(_))[None, :, None]
+            columns[_.name] = _.array.take(codes)
+    return pd.DataFrame(columns, copy=False)
+
+
+def iter_cross_join(grid: Dict[str, Sequence], chunk_size: int=1_000_000) -> Iterator[pd.DataFrame]:
+    """ The rows of `cross_join(**grid)` in DataFrames of `chunk_size` rows,
+    for grids too large to hold in memory.
+    """
+    assert chunk_size > 0, f"chunk_size {chunk_size} <= 0"
+    axes, spans = _grid_axes(grid)
+    n = spans[0] * len(axes[0]) if axes else 0
+    for start in range(0, n, chunk_size):
+        yield _grid_rows(axes, spans, start, min(start + chunk_size, n))
+
+
 @pd.api.extensions.register_dataframe_accessor("uk")
 class UnknownDataFrame:
 
@@ -39,15 +138,16 @@ class UnknownDataFrame:
     def _validate(obj):
         assert isinstance(obj, pd.DataFrame)
 
-    def agg(self, *, by: Union[str, List[str]], func: Callable):
+    def agg(self, *, by: Union[str, List[str]], func: Union[Callable, Dict[str, AggSpec]], n_jobs: int=1):
         """
-        Group by `by` and apply `func`.
+        Group by `by` and aggregate with `func`; see `agg_df`.
 
         Examples
         --------
+        >>> df.uk.agg(by="date", func={"n": "size", "vol": ("qty", "sum")})
         >>> df.uk.agg(by="date", func=lambda x: {"n": len(x)})
         """
-        return agg_df(self._obj, by=by, func=func)
+        return agg_df(self._obj, by=by, func=func, n_jobs=n_jobs)
 
     def save(self, *a, **kw):
         from .io import save_df
@@ -3,8 +3,36 @@ EVM tools.
 For personal use.
 """
 from .. import log
-from .core import *
-from .mktdata import *
-from .fastw3 import *
-from .etherscan import *
-from .utils import *
\ No newline at end of file
+from .core.enums import *
+from .core.addr import *
+from .core.enums import __all__ as _enums_all
+from .core.addr import __all__ as _addr_all
+from .._lazy import lazy_getattr
+
+
+# web3 is only imported on first use of these
+_lazy_attrs = {
+    "Web3Connector": ".core",
+    "ContractBook": ".core",
+    "ERC20ContractBook": ".core",
+    "ERC721ContractBook": ".core",
+    "ChainLinkPriceFeed": ".mktdata",
+    "Coin": ".mktdata",
+    "FastW3": ".fastw3",
+    "Etherscan": ".etherscan",
+    "Etherscanner": ".etherscan",
+    "decode_logs": ".decode",
+    "demux_logs": ".decode",
+    "LogStream": ".stream",
+    "ConfirmationBuffer": ".confirm",
+    "connect_storage": ".storage",
+    "FeeOracle": ".fees",
+    "UInt256Array": ".uint256",
+    "Int256Array": ".uint256",
+    "scale_decimals": ".uint256",
+    "flatten_dict": ".utils",
+    "interpolate_timestamp": ".utils",
+    "normalize_addresses": ".utils",
+}
+__all__ = ["log"] + _enums_all + _addr_all + list(_lazy_attrs)
+__getattr__ = lazy_getattr(__name__, _lazy_attrs)
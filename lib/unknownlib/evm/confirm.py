@@ -0,0 +1,175 @@
+"""
+Confirmation-depth buffer of logs near the chain tip.
+
+Logs of the latest `depth` blocks are held in memory by block hash. A block
+that is seen at a height already taken by another block (or whose parent
+hash is not the block below) replaces it and every block above it; their
+logs are retracted. So does a log, unless the block at its height is a head
+or the parent of the block above: the log is then of a stale block, and is
+held until a head makes its block canonical, or dropped once final. Blocks that are `depth` below the head are final:
+their logs are committed, e.g. to SQL, and never retracted.
+
+Examples
+--------
+>>> buffer = ConfirmationBuffer(12, sql=sql, table_names={("weth", "Transfer"): "weth_Transfer"})
+>>> stream = fw.stream_logs(ws_url=url, events=[("weth", "Transfer")], on_head=buffer.add_block)
+>>> for key, row in stream:
+...     buffer.add_log(key, row)
+"""
+import pandas as pd
+from typing import Dict, List, Any, Hashable, Tuple, Optional, Callable, Union
+from .storage import StorageBackend
+from . import log
+
+
+__all__ = [
+    "ConfirmationBuffer",
+]
+
+
+def _norm_hash(h: Any) -> str:
+    h = h.hex() if isinstance(h, (bytes, bytearray)) else h
+    return h[2:].lower() if h[:2] == "0x" else h.lower()
+
+
+class ConfirmationBuffer:
+    """ Hold logs until their block is `depth` blocks below the head.
+
+    Parameters
+    ----------
+    depth : int
+        Number of confirmations for a block to be final.
+    sql : StorageBackend | None
+        If set, final logs of each key are written to table `table_names[key]`.
+    table_names : dict | None
+        Key of logs -> table name; `str(key)` if not found.
+    index : str | list
+        Primary key of the tables.
+    on_retract : callable | None
+        Called with (key, row) of each retracted log, row["removed"] being True.
+    on_final : callable | None
+        Called with (key, DataFrame) of the logs of each key that became final.
+    """
+
+    def __init__(self,
+                 depth: int=12,
+                 *,
+                 sql: Optional[StorageBackend]=None,
+                 table_names: Optional[Dict[Hashable, str]]=None,
+                 index: Union[str, List[str]]=["blockNumber", "logIndex"],
+                 on_retract: Optional[Callable[[Hashable, Dict[str, Any]], None]]=None,
+                 on_final: Optional[Callable[[Hashable, pd.DataFrame], None]]=None,
+                 ):
+        assert depth >= 0, f"depth {depth} < 0"
+        self._depth = depth
+        self._sql = sql
+        self._table_names = table_names or {}
+        self._index = index
+        self._on_retract = on_retract
+        self._on_final = on_final
+        self._chain: Dict[int, str] = {} # block number -> hash, of blocks not final yet
+        self._parents: Dict[str, str] = {} # block hash -> parent hash, where known
+        self._numbers: Dict[str, int] = {} # block hash -> number, of blocks with logs
+        self._logs: Dict[str, Dict[int, Tuple[Hashable, Dict[str, Any]]]] = {} # block hash -> log index -> (key, row)
+        self._final_block: Optional[int] = None
+
+    @property
+    def head(self) -> Optional[int]:
+        return max(self._chain) if self._chain else self._final_block
+
+    @property
+    def final_block(self) -> Optional[int]:
+        """ The latest final block. """
+        return self._final_block
+
+    @property
+    def n_pending(self) -> int:
+        """ Number of logs not final yet. """
+        return sum(len(self._logs.get(_, {})) for _ in self._chain.values())
+
+    def _retract(self, block_hash: str):
+        for key, row in self._logs.pop(block_hash, {}).values():
+            if self._on_retract is not None:
+                self._on_retract(key, {**row, "removed": True})
+
+    def _is_linked(self, number: int) -> bool:
+        """ Whether the block at `number` was seen as a head, or is the
+        parent of the block above, rather than only as the block of logs.
+        """
+        block_hash = self._chain[number]
+        return block_hash in self._parents or self._parents.get(self._chain.get(number + 1)) == block_hash
+
+    def _set_block(self, number: int, block_hash: str, parent_hash: Optional[str]=None):
+        """ Make `block_hash` the block at `number`, replacing the blocks
+        from `number` up if it is a different block.
+        """
+        if self._final_block is not None and number <= self._final_block:
+            raise ValueError(f"block {number} {block_hash} is a reorg deeper than "
+                             f"{self._depth} confirmations; block {self._final_block} is already final")
+        if parent_hash is not None:
+            self._parents[block_hash] = parent_hash
+            if self._chain.get(number - 1, parent_hash) != parent_hash:
+                self._set_block(number - 1, parent_hash)
+        if self._chain.get(number, block_hash) != block_hash:
+            for n in sorted([_ for _ in self._chain if _ >= number], reverse=True):
+                replaced = self._chain.pop(n)
+                log.info(f"block {n} {replaced} is reorged")
+                self._retract(replaced)
+        self._chain[number] = block_hash
+
+    def _finalize(self):
+        if not self._chain or max(self._chain) - self._depth < min(self._chain):
+            return
+        head = max(self._chain)
+        cutoff = head - self._depth
+        rows: Dict[Hashable, List[Dict[str, Any]]] = {}
+        for n in sorted([_ for _ in self._chain if _ <= cutoff]):
+            block_hash = self._chain.pop(n)
+            for key, row in self._logs.pop(block_hash, {}).values():
+                rows.setdefault(key, []).append(row)
+        for block_hash in [h for h, n in self._numbers.items() if n <= cutoff]:
+            del self._numbers[block_hash]
+            if block_hash in self._logs:
+                log.info(f"dropping {len(self._logs.pop(block_hash))} logs of block {block_hash} not on the chain")
+        canonical = set(self._chain.values())
+        self._parents = {h: p for h, p in self._parents.items() if h in canonical}
+        self._final_block = cutoff
+        for key, rows_ in rows.items():
+            df = pd.DataFrame(rows_).drop(columns="removed", errors="ignore")
+            df = df.sort_values(["blockNumber", "logIndex"]).reset_index(drop=True)
+            if self._sql is not None:
+                self._sql.write(df, table_name=self._table_names.get(key, str(key)), index=self._index)
+            if self._on_final is not None:
+                self._on_final(key, df)
+
+    def add_block(self, number: int, block_hash: str, parent_hash: str):
+        """ A new head, e.g. from a `newHeads` subscription.
+        """
+        self._set_block(number, _norm_hash(block_hash), _norm_hash(parent_hash))
+        self._finalize()
+
+    def add_log(self, key: Hashable, row: Dict[str, Any]):
+        """ A decoded log, e.g. from `LogStream`; its block is taken as the
+        block at its height unless a head says otherwise.
+        """
+        number = row["blockNumber"]
+        block_hash = _norm_hash(row["blockHash"])
+        if row.get("removed", False):
+            logs = self._logs.get(block_hash, {})
+            if row["logIndex"] in logs:
+                key_, row_ = logs.pop(row["logIndex"])
+                if self._on_retract is not None:
+                    self._on_retract(key_, {**row_, "removed": True})
+            elif self._final_block is not None and number <= self._final_block:
+                raise ValueError(f"log {number}:{row['logIndex']} is removed after block {self._final_block} is final")
+            return
+        if self._final_block is not None and number <= self._final_block:
+            log.warning(f"ignoring log {number}:{row['logIndex']} of block already final")
+            return
+        if self._chain.get(number, block_hash) == block_hash or not self._is_linked(number):
+            self._set_block(number, block_hash)
+        else:
+            log.info(f"holding log {number}:{row['logIndex']} of block {block_hash}, not on the chain")
+        self._numbers[block_hash] = number
+        self._logs.setdefault(block_hash, {})[row["logIndex"]] = (key, row)
+        self._finalize()
@@ -1,3 +1,16 @@
 from .enums import *
 from .addr import *
-from .base import *
\ No newline at end of file
+from .enums import __all__ as _enums_all
+from .addr import __all__ as _addr_all
+from ..._lazy import lazy_getattr
+
+
+# web3 is only imported on first use of these
+_lazy_attrs = {
+    "Web3Connector": ".base",
+    "ContractBook": ".base",
+    "ERC20ContractBook": ".base",
+    "ERC721ContractBook": ".base",
+}
+__all__ = _enums_all + _addr_all + list(_lazy_attrs)
+__getattr__ = lazy_getattr(__name__, _lazy_attrs)
@@ -1,7 +1,6 @@
-import re
-from typing import Union, Self
-from functools import cache
-from web3 import Web3
+import threading
+import weakref
+from typing import Union, Self, Optional
 
 
 __all__ = [
@@ -10,39 +9,95 @@ __all__ = [
 
 
 class Addr:
+    """ An address, stored as its 20 raw bytes.
 
-    _value: str # checksum address
+    Instances are interned while in use, i.e. Addr(a) is Addr(b) if a and b
+    are the same address, so the checksum address (keccak) is only computed
+    once, on first use of `value`.
+    """
 
-    def __init__(self, value: Union[str, Self]) -> None:
+    __slots__ = ("_bytes", "_value", "__weakref__")
+
+    _bytes: bytes
+    _value: Optional[str] # checksum address, computed lazily
+
+    _interned: "weakref.WeakValueDictionary[bytes, Addr]" = weakref.WeakValueDictionary()
+    _intern_lock = threading.Lock()
+
+    def __new__(cls, value: Union[str, bytes, Self]) -> Self:
         if isinstance(value, Addr):
-            self._value = value
-        elif isinstance(value, str) and self.is_valid(value):
-            self._value = self.to_checksum_address(value)
-        else:
+            return value
+        b = cls._to_bytes(value)
+        if b is None:
             raise ValueError(f"invalid address {value}")
+        self = cls._interned.get(b)
+        if self is None:
+            with cls._intern_lock:
+                self = cls._interned.get(b)
+                if self is None:
+                    self = super().__new__(cls)
+                    self._bytes = b
+                    self._value = None
+                    cls._interned[b] = self
+        return self
+
+    def __reduce__(self):
+        return (Addr, (self._bytes,))
+
+    @staticmethod
+    def _to_bytes(value: Union[str, bytes]) -> Optional[bytes]:
+        """ The 20 bytes of `value`, or None if `value` is not an address.
+        """
+        if isinstance(value, str):
+            if len(value) != 42 or value[:2] != "0x":
+                return None
+            try:
+                b = bytes.fromhex(value[2:])
+            except ValueError:
+                return None
+            return b if len(b) == 20 else None # whitespace is skipped by fromhex
+        elif isinstance(value, (bytes, bytearray)):
+            return bytes(value) if len(value) == 20 else None
+        else:
+            return None
 
     @staticmethod
     def is_valid(value: str) -> bool:
-        pattern = "^0x[0-9A-Fa-f]{40}$"
-        return re.match(pattern, value) is not None
+        return Addr._to_bytes(value) is not None
 
     @staticmethod
-    @cache
     def to_checksum_address(value) -> str:
-        return Web3.to_checksum_address(value)
+        from eth_utils import to_checksum_address
+        return to_checksum_address(value)
 
     @property
     def value(self) -> str:
+        if self._value is None:
+            self._value = self.to_checksum_address(self._bytes)
         return self._value
 
-    def __eq__(self, __other: Union[str, Self]) -> bool:
-        return self.value == Addr(__other).value
+    @property
+    def raw_bytes(self) -> bytes:
+        return self._bytes
+
+    def __eq__(self, __other: Union[str, bytes, Self]) -> bool:
+        if isinstance(__other, Addr):
+            return self._bytes == __other._bytes
+        b = self._to_bytes(__other)
+        if b is None:
+            raise ValueError(f"invalid address {__other}")
+        return self._bytes == b
 
     def __hash__(self) -> int:
         return self.value.__hash__()
 
+    def __repr__(self) -> str:
+        return f"Addr({self.value})"
+
+    def __str__(self) -> str:
+        return self.value
+
     def to_topic(self) -> str:
-        """ Convert to event topic.
-        TODO: better way than str.replace?
+        """ Convert to event topic, i.e. the address left-padded to 32 bytes.
         """
-        return self.value.replace("0x", "0x" + "0" * 24)
\ No newline at end of file
+        return "0x" + "0" * 24 + self._bytes.hex()
@@ -0,0 +1,207 @@
+"""
+Columnar decoding of raw event logs.
+
+`process_log` decodes one log at a time into nested dicts. For events whose
+arguments are all static ABI types (address, bool, intN, uintN, bytesN),
+e.g. ERC20 Transfer or Uniswap Swap, every log has the same layout: one
+32-byte topic per indexed argument and one 32-byte word of data per
+non-indexed argument. Those words are sliced out of all logs at once and
+decoded into DataFrame columns directly.
+"""
+import re
+import numpy as np
+import pandas as pd
+from typing import List, Dict, Any, Hashable, Tuple, Optional
+from eth_utils import event_abi_to_log_topic
+from .core.addr import Addr
+from .. import log
+
+
+__all__ = [
+    "decode_logs",
+    "demux_logs",
+]
+
+
+_static_type = re.compile(r"address|bool|u?int(8|16|24|32|40|48|56|64|72|80|88|96|104|112|120|128|136|144|152|160|168|176|184|192|200|208|216|224|232|240|248|256)?|bytes([1-9]|[12][0-9]|3[0-2])")
+
+
+def _is_static(abi: Dict[str, Any]) -> bool:
+    return not abi.get("anonymous", False) and all(_static_type.fullmatch(_["type"]) for _ in abi["inputs"])
+
+
+def _hex(v: Any) -> str:
+    """ Hex without "0x", as `flatten_dict` renders HexBytes. """
+    if isinstance(v, (bytes, bytearray)):
+        return v.hex()
+    return v[2:] if v[:2] == "0x" else v
+
+
+def _int_bits(typ: str) -> int:
+    """ Size of int/uint type `typ`; 0 if it is not an integer type. """
+    if not typ.startswith(("int", "uint")):
+        return 0
+    return int(typ[4 if typ[0] == "u" else 3:] or 256)
+
+
+def _wide_int_dtype(typ: str) -> Optional[str]:
+    """ "int256" or "uint256" if `typ` is an integer type wider than 64 bits. """
+    return ("uint256" if typ[0] == "u" else "int256") if _int_bits(typ) > 64 else None
+
+
+def _decode_words(words: np.ndarray, typ: str, compact_ints: bool=False) -> Any:
+    """ Decode an (n, 32) uint8 array of ABI words of type `typ`.
+    """
+    n = len(words)
+    if typ == "address":
+        keys = np.ascontiguousarray(words[:, 12:]).view("V20").ravel()
+        uniques, codes = np.unique(keys, return_inverse=True)
+        values = np.array([Addr(_.tobytes()).value for _ in uniques], dtype=object)
+        return values[codes.ravel()]
+    elif typ == "bool":
+        return words[:, -1] != 0
+    elif typ.startswith("bytes"):
+        size = int(typ[5:])
+        buf = np.ascontiguousarray(words[:, :size]).tobytes()
+        return [buf[i * size:(i + 1) * size] for i in range(n)]
+    signed = typ.startswith("int")
+    if compact_ints and _wide_int_dtype(typ) is not None:
+        from .uint256 import UInt256Array, Int256Array
+        return (Int256Array if signed else UInt256Array).from_words(words)
+    low = np.ascontiguousarray(words[:, 24:]).view(">i8" if signed else ">u8").ravel()
+    high = words[:, :24]
+    # the high 24 bytes of a word are all 0x00 (or 0xff for negative ints) iff it fits in 64 bits
+    if signed:
+        fits = ((high == 0).all(axis=1) & (low >= 0)) | ((high == 0xff).all(axis=1) & (low < 0))
+    else:
+        fits = (high == 0).all(axis=1)
+    if fits.all():
+        if not signed and n > 0 and low.max() < 2 ** 63:
+            low = low.astype(np.int64)
+        return low
+    buf = words.tobytes()
+    return pd.Series([int.from_bytes(buf[i * 32:(i + 1) * 32], "big", signed=signed) for i in range(n)])
+
+
+def decode_logs(raw_logs: List[Dict[str, Any]], event: Any, *, compact_ints: bool=False) -> pd.DataFrame:
+    """ Decode `raw_logs` of `event` into a DataFrame.
+    The columns are the same as those of flattening the output of
+    `event.process_log`, i.e. args_<name>, event, logIndex, transactionIndex,
+    transactionHash, address, blockHash and blockNumber.
+
+    Parameters
+    ----------
+    raw_logs : list
+        Logs as returned by `eth.get_logs`.
+    event : ContractEvent
+        e.g. `contract.events.Transfer()`. Logs of events with dynamic
+        argument types, or not laid out as expected, are decoded by its
+        `process_log` instead.
+    compact_ints : bool
+        If True, arguments of int/uint types wider than 64 bits, e.g. ERC20
+        values, are columns of dtype "int256"/"uint256" (see `uint256`)
+        rather than object columns of Python ints.
+    """
+    if not raw_logs:
+        return pd.DataFrame()
+    abi = event.abi
+    inputs = abi["inputs"]
+    indexed = [_ for _ in inputs if _.get("indexed", False)]
+    non_indexed = [_ for _ in inputs if not _.get("indexed", False)]
+    data_size = 32 * len(non_indexed)
+    n_topics = 1 + len(indexed)
+
+    if not _is_static(abi) or any(
+            len(_["topics"]) != n_topics or len(_["data"]) != data_size for _ in raw_logs):
+        df = _decode_logs_slow(raw_logs, event)
+        if compact_ints:
+            for arg in inputs:
+                dtype = _wide_int_dtype(arg["type"])
+                if dtype is not None and f"args_{arg['name']}" in df.columns:
+                    from . import uint256 # registers the dtypes
+                    df[f"args_{arg['name']}"] = df[f"args_{arg['name']}"].astype(dtype)
+        return df
+
+    n = len(raw_logs)
+    topics = np.frombuffer(b"".join(bytes(t) for _ in raw_logs for t in _["topics"]), dtype=np.uint8).reshape(n, n_topics, 32)
+    data = np.frombuffer(b"".join(bytes(_["data"]) for _ in raw_logs), dtype=np.uint8).reshape(n, len(non_indexed), 32)
+    topic0 = np.frombuffer(event_abi_to_log_topic(abi), dtype=np.uint8)
+    mismatched = (topics[:, 0, :] != topic0).any(axis=1)
+    if mismatched.any():
+        raise ValueError(f"{mismatched.sum()} logs are not of event {abi['name']}")
+
+    columns = {}
+    i_topic = 1
+    i_data = 0
+    for arg in inputs:
+        if arg.get("indexed", False):
+            words = topics[:, i_topic, :]
+            i_topic += 1
+        else:
+            words = data[:, i_data, :]
+            i_data += 1
+        columns[f"args_{arg['name']}"] = _decode_words(words, arg["type"], compact_ints)
+    columns["event"] = abi["name"]
+    columns["logIndex"] = [_["logIndex"] for _ in raw_logs]
+    columns["transactionIndex"] = [_["transactionIndex"] for _ in raw_logs]
+    columns["transactionHash"] = [_hex(_["transactionHash"]) for _ in raw_logs]
+    columns["address"] = [_["address"] for _ in raw_logs]
+    columns["blockHash"] = [_hex(_["blockHash"]) for _ in raw_logs]
+    columns["blockNumber"] = [_["blockNumber"] for _ in raw_logs]
+    return pd.DataFrame(columns)
+
+
+def _decode_logs_slow(raw_logs: List[Dict[str, Any]], event: Any) -> pd.DataFrame:
+    from .utils import flatten_dict
+    log.debug(f"decoding {len(raw_logs)} logs of {event.abi['name']} one by one")
+    return pd.DataFrame([flatten_dict(dict(event.process_log(_))) for _ in raw_logs])
+
+
+def _log_key(address: str, topic0: Any) -> Tuple[str, bytes]:
+    return address.lower(), bytes.fromhex(_hex(topic0)) if isinstance(topic0, str) else bytes(topic0)
+
+
+def demux_logs(raw_logs: List[Dict[str, Any]],
+               events: Dict[Hashable, Any],
+               *,
+               compact_ints: bool=False,
+               ) -> Dict[Hashable, pd.DataFrame]:
+    """ Split `raw_logs` of several contracts and events, e.g. from one
+    `eth.get_logs` with a list of addresses and topic0s, by (address, topic0)
+    and decode each part.
+
+    Parameters
+    ----------
+    raw_logs : list
+        Logs as returned by `eth.get_logs`.
+    events : dict
+        Any key -> ContractEvent, e.g. `contract.events.Transfer()`.
+        Logs not matching any of the events are dropped.
+    compact_ints : bool
+        As in `decode_logs`.
+
+    Returns
+    -------
+    The DataFrame of logs of each key of `events`; empty if there are none.
+    """
+    keys: Dict[Tuple[str, bytes], List[Hashable]] = {}
+    for k, event in events.items():
+        keys.setdefault(_log_key(event.address, event_abi_to_log_topic(event.abi)), []).append(k)
+    groups: Dict[Tuple[str, bytes], List[Dict[str, Any]]] = {_: [] for _ in keys}
+    n_dropped = 0
+    for raw_log in raw_logs:
+        if not raw_log["topics"]:
+            n_dropped += 1
+            continue
+        group = groups.get(_log_key(raw_log["address"], raw_log["topics"][0]))
+        if group is None:
+            n_dropped += 1
+        else:
+            group.append(raw_log)
+    if n_dropped > 0:
+        log.debug(f"dropped {n_dropped} logs of other events")
+    dfs = {}
+    for key, group in groups.items():
+        for k in keys[key]:
+            dfs[k] = decode_logs(group, events[k], compact_ints=compact_ints)
+    return dfs
@@ -8,13 +8,18 @@ from web3.datastructures import AttributeDict
 from web3.types import TxReceipt
 from eth_account import Account
 from ens import ENS
-from typing import Optional, Dict, List, Any, Callable
+from web3.exceptions import ContractLogicError, Web3RPCError
+from typing import Optional, Dict, List, Any, Callable, Tuple, Hashable, TYPE_CHECKING
 
 from .core import Chain, ERC20, ERC20ContractBook
 from .mktdata import ChainLinkPriceFeed
 from .timestamp import utcnow, to_int
 from .. import log
 
+if TYPE_CHECKING:
+    from .stream import LogStream
+    from .fees import FeeOracle
+
 
 __all__ = [
     "FastW3",
@@ -27,6 +32,8 @@ class FastW3(Etherscanner, ERC20ContractBook, ChainLinkPriceFeed):
 
     _ens: ENS
     _acct: Account
+    _fee_oracle: Optional["FeeOracle"] = None
+    _gas_estimates: Dict[Hashable, int] = {} # (chain id, contract, selector, arg shape) -> gas estimate
     
     def init_acct(self,
                   *,
@@ -42,10 +49,36 @@ class FastW3(Etherscanner, ERC20ContractBook, ChainLinkPriceFeed):
         assert _web3.eth.chain_id == 1, f"ens is only supported on {Chain(1)}, got {Chain(_web3.eth.chain_id)}"
         self._ens = ENS.from_web3(_web3)
     
+    def init_fee_oracle(self, **kw) -> "FeeOracle":
+        """ Poll fees in the background, for transactions to be sent with
+        EIP-1559 fees from memory rather than `eth.gas_price`. See `FeeOracle`.
+        """
+        from .fees import FeeOracle
+        if self._fee_oracle is not None:
+            self._fee_oracle.stop()
+        self._fee_oracle = FeeOracle(self.web3, **kw).start()
+        return self._fee_oracle
+
     @property
     def acct(self) -> Account:
         return self._acct
 
+    @property
+    def fee_oracle(self) -> Optional["FeeOracle"]:
+        return self._fee_oracle
+
+    def _fee_args(self, speed: str="normal") -> Dict[str, int]:
+        """ Fees of a new transaction: suggested by the fee oracle if any,
+        otherwise, or if its fees are stale and can't be polled, the gas
+        price of the node.
+        """
+        if self._fee_oracle is not None:
+            try:
+                return self._fee_oracle.suggest(speed)
+            except Exception as e:
+                log.warning(f"failed to suggest fees, using the gas price: {e}")
+        return {"gasPrice": self.eth.gas_price}
+
     @property
     def ens(self) -> ENS:
         return self._ens
@@ -72,26 +105,81 @@ class FastW3(Etherscanner, ERC20ContractBook, ChainLinkPriceFeed):
         log.debug(f"block number {block_number} timestamp = {dt}")
         return dt
 
+    @staticmethod
+    def _arg_shape(args: tuple) -> tuple:
+        """ Types of `args`, and lengths of sequences, on which gas usually depends. """
+        return tuple(
+            (type(_).__name__, len(_)) if isinstance(_, (list, tuple, bytes, str)) else type(_).__name__
+            for _ in args)
+
+    def preflight(self,
+                  tx: Dict[str, Any],
+                  *,
+                  key: Optional[Hashable]=None,
+                  block: str="pending",
+                  gas_margin: float=1.2,
+                  ) -> int:
+        """ Simulate `tx` with `eth_call` at `block` and return its gas limit:
+        `tx["gas"]` if set, otherwise the gas estimate times `gas_margin`.
+        `eth_call` is sent with that limit, so that running out of gas is
+        caught like a revert; if the limit isn't known yet, it is sent with
+        `eth_estimateGas` as one batch request, whose estimate is then the
+        least gas that `tx` needs. Raise ContractLogicError if `tx` reverts,
+        or Web3RPCError if it runs out of gas, before anything is sent.
+        """
+        msg = {k: tx[k] for k in ("from", "to", "value", "data") if k in tx}
+        estimate = self._gas_estimates.get(key) if key is not None else None
+        gas = int(tx["gas"]) if tx.get("gas") else None
+        if gas is None and estimate is not None:
+            gas = int(estimate * gas_margin)
+        try:
+            if gas is None or (estimate is None and key is not None):
+                with self.web3.batch_requests() as batch:
+                    batch.add(self.eth.call(msg if gas is None else {**msg, "gas": gas}, block))
+                    batch.add(self.eth.estimate_gas(msg, block))
+                    _, estimate = batch.execute()
+                if key is not None:
+                    self._gas_estimates[key] = int(estimate)
+                if gas is None:
+                    gas = int(estimate * gas_margin)
+            else:
+                self.eth.call({**msg, "gas": gas}, block)
+        except ContractLogicError as e:
+            log.warning(f"rejecting transaction to {msg.get('to')}, which reverts: {e}")
+            raise e
+        except Web3RPCError as e:
+            log.warning(f"rejecting transaction to {msg.get('to')} with gas limit {gas}: {e}")
+            raise e
+        log.info(f"simulated transaction to {msg.get('to')}; gas estimate {estimate}, limit {gas}")
+        return gas
+
     def call(self,
              func: ContractFunction,
              *,
              value: float=0, # value in *ETH*
-             gas: float, # gas, unit = gwei
+             gas: Optional[float]=None, # gas limit; if None, estimated by preflight
              hold: bool=False, # if True, only build tx, not send it
              max_retries: int=5,
+             speed: str="normal", # of fees suggested by the fee oracle
+             simulate: bool=True, # if True, reject reverting tx before sending; see `preflight`
+             gas_margin: float=1.2, # gas limit = estimate * gas_margin
              **kw: dict, # other transaction args than from, nounce, value, gas
              ) -> AttributeDict:
         """ Execute a transaction.
         """
+        assert simulate or gas is not None, "gas is required without simulation"
         tx_args = {
             "from": self.acct.address,
             "nonce": self.web3.eth.get_transaction_count(self.acct.address),
             "value": self.web3.to_wei(value, "ether"), # not that this won't count as an API call
-            "gas": int(gas),
-            "gasPrice": self.eth.gas_price,
+            "gas": int(gas) if gas is not None else 0, # set after preflight; 0 not to let web3 estimate it
+            **({} if "gasPrice" in kw or "maxFeePerGas" in kw else self._fee_args(speed)),
             **kw,
         }
         tx = func.build_transaction(tx_args)
+        if simulate:
+            key = (tx.get("chainId"), tx["to"], tx["data"][:10], self._arg_shape(func.args) + self._arg_shape(tuple(func.kwargs.values())))
+            tx["gas"] = self.preflight(tx, key=key, gas_margin=gas_margin)
         if hold is True: # build but don't send
             log.info(f"holding tx because hold is {hold}")
             return AttributeDict(tx)
@@ -128,9 +216,19 @@ class FastW3(Etherscanner, ERC20ContractBook, ChainLinkPriceFeed):
                         log.info(f"retry No.{retries} with nonce {tx['nonce']}")
                     elif ("max fee per gas less than block base fee" in err_msg or
                         "already known" in err_msg or
+                        "replacement transaction underpriced" in err_msg or
                         "is not in the chain after" in err_msg):
-                        tx["gasPrice"] = int(tx["gasPrice"] * 1.2)
-                        log.info(f"retry No.{retries} with gasPrice {tx['gasPrice']}")
+                        if "maxFeePerGas" in tx and self._fee_oracle is not None:
+                            tx.update(self._fee_oracle.bump(tx))
+                            log.info(f"retry No.{retries} with maxFeePerGas {tx['maxFeePerGas']}, "
+                                     f"maxPriorityFeePerGas {tx['maxPriorityFeePerGas']}")
+                        elif "maxFeePerGas" in tx:
+                            tx["maxFeePerGas"] = int(tx["maxFeePerGas"] * 1.2)
+                            tx["maxPriorityFeePerGas"] = int(tx["maxPriorityFeePerGas"] * 1.2)
+                            log.info(f"retry No.{retries} with maxFeePerGas {tx['maxFeePerGas']}")
+                        else:
+                            tx["gasPrice"] = int(tx["gasPrice"] * 1.2)
+                            log.info(f"retry No.{retries} with gasPrice {tx['gasPrice']}")
                     else:
                         raise Exception(f"unable to handle error; exiting")
         
@@ -152,10 +250,17 @@ class FastW3(Etherscanner, ERC20ContractBook, ChainLinkPriceFeed):
             "to": to,
             "value": self.web3.to_wei(value, unit),
             "gas": int(gas),
-            "gasPrice": self.eth.gas_price,
+            **self._fee_args(),
         }
         return self._sign_and_send(tx, max_retries=max_retries)
     
+    def _get_block_range(self, stime: pd.Timestamp, etime: pd.Timestamp) -> Tuple[int, int]:
+        """ Blocks from `stime` (inclusive) to `etime` (exclusive).
+        """
+        from_block = self.scan.get_block_number_by_timestamp(to_int(stime, "s"))
+        to_block = self.scan.get_block_number_by_timestamp(to_int(etime, "s")) - 1
+        return from_block, to_block
+
     def get_logs_as_df(self,
         *,
         stime: pd.Timestamp,
@@ -163,6 +268,8 @@ class FastW3(Etherscanner, ERC20ContractBook, ChainLinkPriceFeed):
         batch_size: Optional[pd.Timedelta]=None,
         contract_name: str, # contract key
         event_name: str,
+        compact_ints: bool=False,
+        max_workers: int=1,
         **kw,
         ) -> pd.DataFrame:
         """
@@ -170,17 +277,17 @@ class FastW3(Etherscanner, ERC20ContractBook, ChainLinkPriceFeed):
             batch_size: if None, get all logs in one shot; other wise batch by this size
             contract_name: name of contract. must be already cached
             event_name: name of event.
+            compact_ints: if True, int/uint arguments wider than 64 bits are "int256"/"uint256" columns; see `decode_logs`
+            max_workers: number of batches fetched at a time; see `batch_run`
         """
         c_ = self.contract(contract_name)
         address = c_.address
         func = c_.events[event_name]()
         topics = func._get_event_filter_params(func.abi)["topics"]
-        log_processor = func.process_log
 
         def get_logs_as_df_single(stime: pd.Timestamp, etime: pd.Timestamp) -> pd.DataFrame:
-            from .utils import flatten_dict
-            from_block = self.scan.get_block_number_by_timestamp(to_int(stime, "s"))
-            to_block = self.scan.get_block_number_by_timestamp(to_int(etime, "s")) - 1
+            from .decode import decode_logs
+            from_block, to_block = self._get_block_range(stime, etime)
             filter_params = {
                 **{
                     "fromBlock": from_block,
@@ -193,9 +300,7 @@ class FastW3(Etherscanner, ERC20ContractBook, ChainLinkPriceFeed):
             log.info(f"filtering logs {filter_params} . (number of blocks: {to_block - from_block})")
             raw_logs = self.eth.get_logs(filter_params)
             log.info(f"number of logs: {len(raw_logs)}")
-            processed_logs = [flatten_dict(dict(log_processor(raw_log))) for raw_log in raw_logs]
-            df = pd.DataFrame(processed_logs)
-            return df
+            return decode_logs(raw_logs, func, compact_ints=compact_ints)
         
         if batch_size is None:
             return get_logs_as_df_single(stime, etime)
@@ -205,6 +310,83 @@ class FastW3(Etherscanner, ERC20ContractBook, ChainLinkPriceFeed):
                 func=get_logs_as_df_single,
                 start=stime,
                 end=etime,
-                batch_size=batch_size)
+                batch_size=batch_size,
+                max_workers=max_workers)
             df = pd.concat(dfs).reset_index(drop=True)
-            return df
\ No newline at end of file
+            return df
+
+    def get_multi_logs_as_df(self,
+        *,
+        stime: pd.Timestamp,
+        etime: pd.Timestamp,
+        batch_size: Optional[pd.Timedelta]=None,
+        events: List[Tuple[str, str]], # (contract key, event name)
+        compact_ints: bool=False,
+        max_workers: int=1,
+        **kw,
+        ) -> Dict[Tuple[str, str], pd.DataFrame]:
+        """ Get logs of several events of several contracts, with one
+        `eth_getLogs` per time range for all of them (filtering on the list of
+        addresses and any of the event topics), and split them by event.
+
+        Args:
+            batch_size: if None, get all logs in one shot; other wise batch by this size
+            events: (name of contract, name of event) pairs. contracts must be already cached
+            compact_ints: as in `get_logs_as_df`
+            max_workers: as in `get_logs_as_df`
+        Returns:
+            (name of contract, name of event) -> logs as by `get_logs_as_df`
+        """
+        from eth_utils import event_abi_to_log_topic
+        from .decode import demux_logs
+        assert len(events) > 0, "no event is given"
+        funcs = {(c, e): self.contract(c).events[e]() for c, e in events}
+        addresses = list(dict.fromkeys(_.address for _ in funcs.values()))
+        topic0s = list(dict.fromkeys("0x" + event_abi_to_log_topic(_.abi).hex() for _ in funcs.values()))
+
+        def get_multi_logs_as_df_single(stime: pd.Timestamp, etime: pd.Timestamp) -> Dict[Tuple[str, str], pd.DataFrame]:
+            from_block, to_block = self._get_block_range(stime, etime)
+            filter_params = {
+                **{
+                    "fromBlock": from_block,
+                    "toBlock": to_block,
+                    "address": addresses,
+                    "topics": [topic0s],
+                },
+                **kw,
+            }
+            log.info(f"filtering logs {filter_params} . (number of blocks: {to_block - from_block})")
+            raw_logs = self.eth.get_logs(filter_params)
+            log.info(f"number of logs: {len(raw_logs)}")
+            return demux_logs(raw_logs, funcs, compact_ints=compact_ints)
+
+        if batch_size is None:
+            return get_multi_logs_as_df_single(stime, etime)
+        else:
+            from ..algo import batch_run
+            batches = batch_run(
+                func=get_multi_logs_as_df_single,
+                start=stime,
+                end=etime,
+                batch_size=batch_size,
+                max_workers=max_workers)
+            return {k: pd.concat([_[k] for _ in batches]).reset_index(drop=True) for k in funcs}
+
+    def stream_logs(self,
+        *,
+        ws_url: str,
+        events: List[Tuple[str, str]], # (contract key, event name)
+        from_block: Optional[int]=None,
+        **kw,
+        ) -> "LogStream":
+        """ Stream logs of several events of several contracts over a
+        WebSocket subscription, as they are mined. See `LogStream`.
+
+        Args:
+            ws_url: WebSocket endpoint of the node
+            events: (name of contract, name of event) pairs. contracts must be already cached
+            from_block: if set, backfill logs since this block first
+        """
+        from .stream import LogStream
+        funcs = {(c, e): self.contract(c).events[e]() for c, e in events}
+        return LogStream(ws_url, funcs, from_block=from_block, **kw)
@@ -0,0 +1,148 @@
+"""
+EIP-1559 fee suggestions from `eth_feeHistory`, polled in the background.
+
+`FeeOracle` keeps the base fee and percentiles of priority fees of recent
+blocks, so that fees of a transaction are suggested from memory, without a
+round trip to the node at send time.
+
+* maxPriorityFeePerGas: median over recent blocks of a percentile of the
+  priority fees paid ("slow", "normal", "fast").
+* maxFeePerGas: `base_fee_multiplier` times the base fee of the next block
+  plus the priority fee; 2x stays above the base fee for 6 full blocks.
+
+Examples
+--------
+>>> oracle = FeeOracle(fw.web3).start()
+>>> tx = {**tx, **oracle.suggest("fast")}
+"""
+import time
+import threading
+from typing import Dict, List, Tuple, Optional, Any
+from . import log
+
+
+__all__ = [
+    "FeeOracle",
+]
+
+
+class FeeOracle:
+    """ Fees of recent blocks from `eth_feeHistory`, for suggestions.
+
+    Parameters
+    ----------
+    web3 : Web3
+    percentiles : tuple
+        Percentiles of priority fees of "slow", "normal" and "fast".
+    n_blocks : int
+        Number of recent blocks to suggest from.
+    poll_interval : float
+        Seconds between polls of the background thread.
+    base_fee_multiplier : float
+        maxFeePerGas = base_fee_multiplier * next base fee + priority fee.
+    max_age : float
+        Seconds after the last update past which suggestions poll again
+        first, e.g. when the background thread failed or stopped.
+    """
+
+    speeds = ("slow", "normal", "fast")
+
+    def __init__(self,
+                 web3,
+                 *,
+                 percentiles: Tuple[float, float, float]=(10, 50, 90),
+                 n_blocks: int=20,
+                 poll_interval: float=2.0,
+                 base_fee_multiplier: float=2.0,
+                 max_age: float=30.0,
+                 ):
+        assert len(percentiles) == len(self.speeds), f"percentiles {percentiles} are not one per {self.speeds}"
+        assert n_blocks > 0, f"n_blocks {n_blocks} <= 0"
+        self._web3 = web3
+        self._percentiles = list(percentiles)
+        self._n_blocks = n_blocks
+        self._poll_interval = poll_interval
+        self._base_fee_multiplier = base_fee_multiplier
+        self._max_age = max_age
+        self._lock = threading.Lock()
+        self._blocks: Dict[int, Tuple[int, List[int]]] = {} # block number -> (base fee, priority fee per percentile)
+        self._next_base_fee: Optional[int] = None
+        self._updated_at: Optional[float] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def next_base_fee(self) -> Optional[int]:
+        """ Base fee of the next block, in wei. """
+        return self._next_base_fee
+
+    @property
+    def age(self) -> Optional[float]:
+        """ Seconds since the last update. """
+        return None if self._updated_at is None else time.monotonic() - self._updated_at
+
+    def update(self):
+        """ Poll `eth_feeHistory` of the latest blocks once. """
+        h = self._web3.eth.fee_history(self._n_blocks, "latest", self._percentiles)
+        oldest = int(h["oldestBlock"])
+        base_fees = [int(_) for _ in h["baseFeePerGas"]]
+        rewards = h.get("reward") or [[0] * len(self._percentiles)] * (len(base_fees) - 1)
+        with self._lock:
+            for i, reward in enumerate(rewards):
+                self._blocks[oldest + i] = (base_fees[i], [int(_) for _ in reward])
+            for n in sorted(self._blocks)[:-self._n_blocks]:
+                del self._blocks[n]
+            # the last base fee is of the block after the newest one
+            self._next_base_fee = base_fees[-1]
+            self._updated_at = time.monotonic()
+        log.debug(f"fee history of blocks {oldest} to {oldest + len(rewards) - 1}; next base fee {base_fees[-1]}")
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.update()
+            except Exception as e:
+                log.warning(f"failed to poll fee history: {e}")
+            self._stop.wait(self._poll_interval)
+
+    def start(self) -> "FeeOracle":
+        """ Poll in a background thread until `stop`. """
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="FeeOracle", daemon=True)
+            self._thread.start()
+            log.info(f"polling fee history every {self._poll_interval}s")
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def priority_fee(self, speed: str="normal") -> int:
+        """ Median over recent blocks of the percentile of priority fees of `speed`, in wei. """
+        assert speed in self.speeds, f"{speed} is not one of {self.speeds}"
+        if self._updated_at is None or self.age > self._max_age: # not polled yet, or stale
+            self.update()
+        i = self.speeds.index(speed)
+        with self._lock:
+            fees = sorted(_[1][i] for _ in self._blocks.values())
+        return fees[len(fees) // 2] if fees else 0
+
+    def suggest(self, speed: str="normal") -> Dict[str, int]:
+        """ maxFeePerGas and maxPriorityFeePerGas of a transaction, in wei. """
+        priority_fee = self.priority_fee(speed)
+        return {
+            "maxFeePerGas": int(self._base_fee_multiplier * self._next_base_fee) + priority_fee,
+            "maxPriorityFeePerGas": priority_fee,
+        }
+
+    def bump(self, tx: Dict[str, Any], factor: float=1.125) -> Dict[str, Any]:
+        """ Fees of `tx` raised by at least `factor` (nodes require 10% to
+        replace a pending transaction), and to the "fast" suggestion if higher.
+        """
+        fast = self.suggest("fast")
+        priority_fee = max(int(tx["maxPriorityFeePerGas"] * factor) + 1, fast["maxPriorityFeePerGas"])
+        max_fee = max(int(tx["maxFeePerGas"] * factor) + 1, fast["maxFeePerGas"], priority_fee)
+        return {**tx, "maxFeePerGas": max_fee, "maxPriorityFeePerGas": priority_fee}
@@ -1,40 +1,144 @@
 import os
+import time
 import sqlite3
+import hashlib
 import json
+import threading
+import queue
+from collections import OrderedDict
+from concurrent.futures import Future
 from . import log
 import pandas as pd
 import numpy as np
-from typing import Union, List, Optional, Any
-from functools import wraps
+from typing import Union, List, Optional, Any, Callable, Iterable, Set, Tuple, Dict
+from functools import wraps, partial
 from pandas.api.types import is_string_dtype
+from .storage import StorageBackend, Filter, connect_storage
 
 
 __all__ = [
     "SQLConnector",
-    "SQLCache"
+    "SQLCache",
+    "sql_cache",
 ]
 
 
-class SQLConnector:
-    
-    _con: sqlite3.Connection
-   
+def _is_int(value: Any) -> bool:
+    return isinstance(value, (int, np.integer)) and not isinstance(value, bool)
+
+
+def _int_text_range(col: str, start: Optional[int], end: Optional[int]) -> Tuple[str, list]:
+    """ Condition of text column `col` of ints, as written by `write`, to be
+    in [start, end): one text range per number of digits, so that the index
+    of `col` is used. With a bound missing or negative, `col` is cast to
+    compare as numbers instead, which scans the table.
+    """
+    if start is None or end is None or start < 0:
+        bounds = [(">=", start), ("<", end)]
+        return (" AND ".join(f"CAST({col} AS INTEGER) {op} ?" for op, v in bounds if v is not None),
+                [int(v) for _, v in bounds if v is not None])
+    conds, params = [], []
+    for n in range(len(str(start)), len(str(max(end - 1, start))) + 1):
+        lo, hi = max(start, 10 ** (n - 1) if n > 1 else 0), min(end, 10 ** n) - 1
+        if lo <= hi:
+            conds.append(f"({col} BETWEEN ? AND ? AND length({col}) = {n})")
+            params += [str(lo), str(hi)]
+    return "(" + (" OR ".join(conds) or "0") + ")", params
+
+
+class SQLConnector(StorageBackend):
+    """ SQLite connector that can be shared by threads.
+
+    Each thread reads through its own connection. Writes are queued to a
+    single writer thread with its own connection, so they are serialized;
+    the database is in WAL mode, so readers don't wait for the writer.
+    """
+
+    _path: str
+    _kw: dict
+    _local: threading.local
+    _cons: List[sqlite3.Connection] = []
+    _queue: queue.Queue
+    _writer: Optional[threading.Thread] = None
+
     def connect(self, path: str, **kw):
+        if self._writer is not None or self._cons: # reconnecting
+            self.close()
         self._path = path
+        self._kw = {"timeout": 30, **kw, "check_same_thread": False}
+        self._local = threading.local()
+        self._cons = []
+        self._lock = threading.Lock()
+        self._queue = queue.Queue()
+        self._writer = None
         try:
-            self._con = sqlite3.connect(path, **kw)
+            self.con.execute("PRAGMA journal_mode=WAL")
         except Exception as e:
             log.error(f"failed to open {path}, error: {e}")
 
+    def _connect(self) -> sqlite3.Connection:
+        con = sqlite3.connect(self._path, **self._kw)
+        with self._lock:
+            self._cons.append(con)
+        return con
+
     @property
     def con(self) -> sqlite3.Connection:
-        return self._con
-    
+        """ The connection of the current thread. """
+        con = getattr(self._local, "con", None)
+        if con is None:
+            con = self._local.con = self._connect()
+        return con
+
+    def _write_loop(self):
+        con = self._connect()
+        while True:
+            task = self._queue.get()
+            if task is None:
+                break
+            func, future = task
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                res = func(con)
+                con.commit()
+                future.set_result(res)
+            except Exception as e:
+                con.rollback()
+                future.set_exception(e)
+
+    def submit_write(self, func: Callable[[sqlite3.Connection], Any]) -> Future:
+        """ Run `func(con)` then commit, in the writer thread.
+        """
+        with self._lock:
+            if self._writer is None:
+                self._writer = threading.Thread(target=self._write_loop, daemon=True, name="SQLConnector-writer")
+                self._writer.start()
+        future = Future()
+        self._queue.put((func, future))
+        return future
+
+    def close(self):
+        """ Finish queued writes and close all connections. """
+        if self._writer is not None:
+            self._queue.put(None)
+            self._writer.join()
+            self._writer = None
+        with self._lock:
+            for con in self._cons:
+                con.close()
+            self._cons.clear()
+        self._local = threading.local()
+
     def write(self,
               df: pd.DataFrame,
               *,
               table_name: str,
-              index: Union[str, List[str]]):
+              index: Union[str, List[str]],
+              wait: bool=True) -> Optional[Future]:
+        """ Write `df` through the writer thread.
+        If `wait` is False, return the Future of the write instead of waiting.
+        """
 
         def get_sql_dtype(log_: dict) -> dict:
             return {k: "TEXT" for k, _ in log_.items()}
@@ -44,42 +148,68 @@ class SQLConnector:
         if isinstance(index, str):
             index = [index]
         assert all([_ in df.columns for _ in index]), f"not all of {index} are found in {df.columns}"
-        
-        if not self.table_exists(table_name):
-            query = """CREATE TABLE IF NOT EXISTS {} ({}, PRIMARY KEY ({}));""".format(
-                table_name,
-                ",".join([k + " " + v for k, v in dtype.items()]),
-                ",".join(index))
-            self.execute(query, verbose=True)
-            log.info(f"created table {table_name} at {self._path}; index = {index}")
 
+        create_query = """CREATE TABLE IF NOT EXISTS {} ({}, PRIMARY KEY ({}));""".format(
+            table_name,
+            ",".join([k + " " + v for k, v in dtype.items()]),
+            ",".join(index))
         query = "REPLACE INTO {} ({}) VALUES ({}) ".format(table_name, ', '.join(df.columns), ', '.join(["?"]*len(df.columns)))
-        for i in range(len(df)):
-            self.execute(query, tuple(df.iloc[i]))
-        self.con.commit()
-        log.info(f"{len(df)} rows are written to {self._path}:{table_name}.")
-        
-    def read(self, query: str, parse_str_columns=True) -> pd.DataFrame:
+        rows = list(df.itertuples(index=False, name=None))
+
+        def _write(con: sqlite3.Connection):
+            con.execute(create_query)
+            con.executemany(query, rows)
+            log.info(f"{len(rows)} rows are written to {self._path}:{table_name}.")
+
+        future = self.submit_write(_write)
+        if wait:
+            future.result()
+        else:
+            return future
+
+    def read(self, query: str, parse_str_columns=True, params: Optional[list]=None) -> pd.DataFrame:
         log.info(f"querying dataframe from {query}")
-        df = pd.read_sql_query(query, self.con)
+        df = pd.read_sql_query(query, self.con, params=params)
         if parse_str_columns is True:
             self.parse_str_columns(df, inplace=True)
         return df
-    
-    def read_table(self, table_name: str, parse_str_columns=True) -> pd.DataFrame:
-        query = f"SELECT * from {table_name}"
-        return self.read(query, parse_str_columns=parse_str_columns)
 
-    def delete_table(self, table_name: str) -> bool:
-        """ Return True if deleted is done.
-        """
-        input_table_name = input(f"type table name to delete {table_name}:")
-        if input_table_name == table_name or input_table_name == table_name[-3:]:
-            self.execute(f"DROP TABLE {table_name}")
-            return True
-        else:
-            log.info(f"input table name {input_table_name} doesn't match with {table_name}; aborted")
-            return False
+    def _filter_column(self, table_name: str, col: str, value: Any) -> str:
+        # columns written by `write` are text, to which ints bound compare as
+        # text, through the index (ranges of ints are in `_where`); floats are
+        # cast to compare as numbers
+        if isinstance(value, (float, np.floating)) and not self._is_integer_column(table_name, col):
+            return f"CAST({col} AS REAL)"
+        return col
+
+    def _where(self, table_name: str, filters: Optional[List[Filter]]) -> Tuple[str, list]:
+        # ranges of ints of text columns are merged per column, to be looked up as text
+        ranges: Dict[str, List[Optional[int]]] = {} # col -> [start, end)
+        rest = []
+        for col, op, value in filters or []:
+            if op in ("<", "<=", ">", ">=") and _is_int(value) and not self._is_integer_column(table_name, col):
+                bounds = ranges.setdefault(col, [None, None])
+                if op in (">", ">="):
+                    v = int(value) + (op == ">")
+                    bounds[0] = v if bounds[0] is None else max(bounds[0], v)
+                else:
+                    v = int(value) + (op == "<=")
+                    bounds[1] = v if bounds[1] is None else min(bounds[1], v)
+            else:
+                rest.append((col, op, value))
+        where, params = super()._where(table_name, rest)
+        conds = [where[len(" WHERE "):]] if where else []
+        for col, (start, end) in ranges.items():
+            cond, params_ = _int_text_range(col, start, end)
+            conds.append(cond)
+            params += params_
+        return (" WHERE " + " AND ".join(conds) if conds else ""), params
+
+    def execute_write(self, query: str, params: Optional[list]=None):
+        self.submit_write(lambda con: con.execute(query, params or [])).result()
+
+    def _drop_table(self, table_name: str):
+        self.execute_write(f"DROP TABLE {table_name}")
 
     def execute(self, query: str, *a, verbose=False, **kw):
         try:
@@ -94,6 +224,98 @@ class SQLConnector:
         c = self.execute(f'''SELECT name FROM sqlite_master WHERE type='table' AND name='{table_name}' ''')
         return c.fetchone() is not None
 
+    def _is_integer_column(self, table_name: str, col: str) -> bool:
+        for _, name, typ, *_ in self.execute(f"PRAGMA table_info({table_name})"):
+            if name == col:
+                return "INT" in typ.upper()
+        raise ValueError(f"{col} is not found in {table_name}")
+
+    def existing_keys(self,
+                      table_name: str,
+                      key_cols: Union[str, List[str]],
+                      keys: Optional[Iterable[Any]]=None,
+                      *,
+                      start: Optional[int]=None,
+                      end: Optional[int]=None,
+                      chunk_size: int=500,
+                      ) -> Set[Any]:
+        """ Keys found in a table, without reading it into pandas.
+
+        Parameters
+        ----------
+        key_cols : str | list
+            Key column(s); a key is a value if it's one column, or a tuple.
+        keys : iterable | None
+            If set, return those of `keys` that are found, looked up in
+            chunks through the index of `key_cols`.
+        start, end : int | None
+            Otherwise, return the keys whose first column is in [start, end),
+            or all keys. Digit strings are returned as int, as written by
+            `write`.
+        """
+        single = isinstance(key_cols, str)
+        key_cols = [key_cols] if single else list(key_cols)
+        if not self.table_exists(table_name):
+            return set()
+        cols = ", ".join(key_cols)
+        if keys is not None:
+            keys = list(keys)
+            found = set()
+            row_marks = "(" + ", ".join(["?"] * len(key_cols)) + ")"
+            for i in range(0, len(keys), chunk_size):
+                chunk = keys[i:i + chunk_size]
+                params = [str(v) for k in chunk for v in ([k] if single else k)]
+                query = f"SELECT {cols} FROM {table_name} WHERE ({cols}) IN (VALUES {', '.join([row_marks] * len(chunk))})"
+                rows = {tuple(str(v) for v in row) for row in self.execute(query, params)}
+                found.update(k for k in chunk if (tuple([str(k)]) if single else tuple(str(v) for v in k)) in rows)
+            return found
+        query = f"SELECT {cols} FROM {table_name}"
+        params = []
+        if start is not None or end is not None:
+            if self._is_integer_column(table_name, key_cols[0]):
+                bounds = [(">=", start), ("<", end)]
+                cond = " AND ".join(f"{key_cols[0]} {op} ?" for op, v in bounds if v is not None)
+                params = [v for _, v in bounds if v is not None]
+            else:
+                cond, params = _int_text_range(key_cols[0], start, end)
+            query += " WHERE " + cond
+
+        def _parse(v):
+            return int(v) if isinstance(v, str) and v.lstrip("-").isdigit() else v
+        rows = self.execute(query, params)
+        if single:
+            return {_parse(row[0]) for row in rows}
+        return {tuple(_parse(v) for v in row) for row in rows}
+
+    def missing_ranges(self,
+                       table_name: str,
+                       col: str,
+                       start: int,
+                       end: int,
+                       step: int=1,
+                       ) -> List[Tuple[int, int]]:
+        """ Gaps of `range(start, end, step)` in column `col`, as a list of
+        [gap start, gap end) with the same step, e.g. to resume a download.
+        The gaps are computed in SQL, one index lookup per value.
+        """
+        assert step > 0, f"step {step} <= 0"
+        if start >= end:
+            return []
+        if not self.table_exists(table_name):
+            return [(start, end)]
+        value = "grid.v" if self._is_integer_column(table_name, col) else "CAST(grid.v AS TEXT)"
+        query = f"""
+            WITH RECURSIVE grid(v) AS (
+                SELECT ? UNION ALL SELECT v + ? FROM grid WHERE v + ? < ?
+            ), missing AS (
+                SELECT v FROM grid WHERE NOT EXISTS (SELECT 1 FROM {table_name} WHERE {col} = {value})
+            )
+            SELECT MIN(v), MAX(v) FROM (
+                SELECT v, (v - ?) / ? - ROW_NUMBER() OVER (ORDER BY v) AS island FROM missing
+            ) GROUP BY island ORDER BY 1"""
+        rows = self.execute(query, (start, step, step, end, start, step)).fetchall()
+        return [(lo, hi + step) for lo, hi in rows]
+
     @staticmethod
     def parse_str_columns(df: pd.DataFrame, inplace: bool=True) -> Optional[pd.DataFrame]:
         """ Auto-parse string columns.
@@ -126,47 +348,152 @@ class SQLConnector:
 
 
 class SQLCache:
+    """ Memoization of pure functions in a storage backend, SQLite by
+    default, with an LRU in process.
+
+    Each cached function has a table of (key, value, created, accessed),
+    where key is a hash of its arguments and value is the JSON of its return
+    value. The storage at `_db_path` is connected on first use with
+    `connect_storage`, so `_backend`, UNKNOWN_STORAGE_BACKEND or a ".duckdb"
+    path switch the backend.
+
+    Examples
+    --------
+    >>> @sql_cache
+    ... def get_decimals(token: str) -> int: ...
+    >>> @sql_cache(ttl=3600, max_rows=10_000)
+    ... def get_price(token: str, block: int) -> float: ...
+    """
 
-    _sql: SQLConnector = SQLConnector()
     _db_path: str=os.path.expandvars("$UNKNOWN_SQL_CACHE_DIR/_SQLCache.db")
-    
+    _backend: Optional[str] = None # see connect_storage
+    _storages: Dict[str, StorageBackend] = {} # db path -> storage
+    _tables: Set[Tuple[str, str]] = set() # (db path, table name) of tables created
+    _storages_lock = threading.Lock()
+    _lrus: Dict[str, Tuple[OrderedDict, threading.Lock]] = {} # table name -> LRU of the cached function, its lock
+
     @classmethod
     def __get_table_name(cls, table_identifier):
         return f"{cls.__name__}_{table_identifier}"
-    
+
+    @classmethod
+    def _storage(cls) -> StorageBackend:
+        """ The storage of `_db_path`, shared by threads. """
+        with cls._storages_lock:
+            storage = cls._storages.get(cls._db_path)
+            if storage is None:
+                storage = cls._storages[cls._db_path] = connect_storage(cls._db_path, cls._backend)
+        return storage
+
+    @classmethod
+    def _table(cls, table_name: str) -> StorageBackend:
+        """ The storage, with `table_name` created. """
+        storage = cls._storage()
+        if (cls._db_path, table_name) not in cls._tables:
+            storage.execute_write(f'''CREATE TABLE IF NOT EXISTS "{table_name}" (
+                key BLOB PRIMARY KEY, value TEXT, created DOUBLE, accessed DOUBLE)''')
+            storage.execute_write(f'''CREATE INDEX IF NOT EXISTS "{table_name}_accessed" ON "{table_name}" (accessed)''')
+            with cls._storages_lock:
+                cls._tables.add((cls._db_path, table_name))
+        return storage
+
+    @classmethod
+    def close(cls):
+        """ Close the storage of `_db_path`. """
+        with cls._storages_lock:
+            storage = cls._storages.pop(cls._db_path, None)
+            cls._tables = {_ for _ in cls._tables if _[0] != cls._db_path}
+        if storage is not None:
+            storage.close()
+
+    @staticmethod
+    def _make_key(args: tuple, kw: dict) -> bytes:
+        return hashlib.blake2b(
+            json.dumps([args, kw], sort_keys=True, default=str).encode(), digest_size=16).digest()
+
     @classmethod
     def reset(cls, table_identifier):
-        cls._sql.delete_table(cls.__get_table_name(table_identifier))
+        """ Drop the table of `table_identifier`, and clear the LRU of its function. """
+        table_name = cls.__get_table_name(table_identifier)
+        cls._storage().execute_write(f'''DROP TABLE IF EXISTS "{table_name}"''')
+        with cls._storages_lock:
+            cls._tables.discard((cls._db_path, table_name))
+        if table_name in cls._lrus:
+            lru, lock = cls._lrus[table_name]
+            with lock:
+                lru.clear()
 
     @classmethod
-    def cache(cls, func):
-        """ Note: func must be a pure function.
+    def cache(cls,
+              func: Optional[Callable]=None,
+              *,
+              ttl: Optional[float]=None,
+              max_rows: Optional[int]=None,
+              lru_size: int=1024,
+              ) -> Callable:
+        """ Note: func must be a pure function, and its arguments and return
+        value JSON-serializable.
+
+        Parameters
+        ----------
+        ttl : float | None
+            Seconds after which a value is recomputed.
+        max_rows : int | None
+            Max number of values kept in storage; the least recently read
+            from storage are evicted first.
+        lru_size : int
+            Max number of values kept in process.
         """
+        if func is None:
+            return partial(cls.cache, ttl=ttl, max_rows=max_rows, lru_size=lru_size)
+
+        table_identifier = f"{func.__module__}_{func.__name__}"
+        table_name = cls.__get_table_name(table_identifier)
+        lru: OrderedDict = OrderedDict() # key -> (value, expiry time)
+        lock = threading.Lock()
+        cls._lrus[table_name] = (lru, lock)
+
         @wraps(func)
-        def new_func(**kw: dict) -> Any:
-            table_identifier = f"{func.__module__}_{func.__name__}"
-            table_name = cls.__get_table_name(table_identifier)
-            cls._sql.connect(cls._db_path)
-            if not cls._sql.table_exists(table_name):
-                pass
+        def new_func(*a, **kw) -> Any:
+            key = cls._make_key(a, kw)
+            with lock:
+                hit = lru.get(key)
+                if hit is not None and (hit[1] is None or hit[1] > time.time()):
+                    lru.move_to_end(key)
+                    return hit[0]
+            now = time.time()
+            storage = cls._table(table_name)
+            row = storage.execute(f'''SELECT value, created FROM "{table_name}" WHERE key = ?''', [key]).fetchone()
+            if row is not None and (ttl is None or row[1] + ttl > now):
+                __value = json.loads(row[0])
+                created = row[1]
+                if max_rows is not None:
+                    storage.execute_write(f'''UPDATE "{table_name}" SET accessed = ? WHERE key = ?''', [now, key])
             else:
-                table = cls._sql.read(f"SELECT * from {table_name} WHERE " +
-                    " AND ".join([f"{k} = {v}" for k, v in kw.items()])
-                    , parse_str_columns=False)
-                if len(table) > 2:
-                    raise ValueError(f"found multiple records {table}")
-                elif len(table) == 1:
-                    __value = json.loads(table["__value"].iloc[0])
-                    return __value
-                else:
-                    pass
-            __value = func(**kw)
-            row = pd.DataFrame({**kw, "__value": json.dumps(__value)}, index=list(kw.keys()))
-            cls._sql.write(row, table_name=table_name, index=sorted(list[kw.keys()]))
-            cls._sql.con.close()
+                __value = func(*a, **kw)
+                created = now
+                storage.execute_write(f'''INSERT OR REPLACE INTO "{table_name}" VALUES (?, ?, ?, ?)''',
+                                      [key, json.dumps(__value), now, now])
+                if max_rows is not None:
+                    storage.execute_write(f'''DELETE FROM "{table_name}" WHERE key NOT IN
+                        (SELECT key FROM "{table_name}" ORDER BY accessed DESC LIMIT ?)''', [max_rows])
+            with lock:
+                lru[key] = (__value, None if ttl is None else created + ttl)
+                lru.move_to_end(key)
+                while len(lru) > lru_size:
+                    lru.popitem(last=False)
             return __value
+
+        def cache_clear():
+            """ Clear values of func both in process and in storage. """
+            with lock:
+                lru.clear()
+            cls._table(table_name).execute_write(f'''DELETE FROM "{table_name}"''')
+
+        new_func.cache_clear = cache_clear
+        new_func.lru_clear = lru.clear
         return new_func
 
 
-def sql_cache(func):
-    return SQLCache.cache(func)
\ No newline at end of file
+def sql_cache(func: Optional[Callable]=None, **kw):
+    return SQLCache.cache(func, **kw)
@@ -0,0 +1,269 @@
+"""
+Storage backends of tables of logs, prices, etc.
+
+All backends have the surface of `SQLConnector`: connect, write, read,
+read_table (with column and predicate pushdown), table_exists,
+existing_keys, missing_ranges and close; plus execute and execute_write
+of SQL statements, e.g. for `SQLCache`.
+
+* "sqlite": `SQLConnector`, a row store; good for point lookups and small
+  incremental writes.
+* "duckdb": `DuckDBConnector`, an embedded columnar store; good for scans
+  and aggregations over hundreds of millions of rows. Requires `duckdb`.
+
+`connect_storage` picks the backend by argument, by the environment variable
+UNKNOWN_STORAGE_BACKEND, or by file extension (".duckdb").
+"""
+import os
+import threading
+import pandas as pd
+from typing import Union, List, Optional, Any, Iterable, Set, Tuple, Dict
+from . import log
+
+
+__all__ = [
+    "StorageBackend",
+    "DuckDBConnector",
+    "connect_storage",
+]
+
+
+Filter = Tuple[str, str, Any] # (column, operator, value), e.g. ("blockNumber", ">=", 17_000_000)
+
+_filter_ops = {"==": "=", "!=": "!=", "<": "<", "<=": "<=", ">": ">", ">=": ">=", "in": "IN", "not in": "NOT IN"}
+
+
+class StorageBackend:
+    """ Interface of storage backends.
+    """
+
+    def connect(self, path: str, **kw):
+        raise NotImplementedError
+
+    def close(self):
+        raise NotImplementedError
+
+    def write(self, df: pd.DataFrame, *, table_name: str, index: Union[str, List[str]]):
+        """ Upsert `df` into `table_name`, created with primary key `index` if not existing. """
+        raise NotImplementedError
+
+    def read(self, query: str, parse_str_columns=True, params: Optional[list]=None) -> pd.DataFrame:
+        raise NotImplementedError
+
+    def table_exists(self, table_name: str) -> bool:
+        raise NotImplementedError
+
+    def execute(self, query: str, *a, verbose=False, **kw):
+        """ Run a query in the current thread; return its cursor. """
+        raise NotImplementedError
+
+    def execute_write(self, query: str, params: Optional[list]=None):
+        """ Run a statement serialized with the other writes, and commit. """
+        raise NotImplementedError
+
+    def _drop_table(self, table_name: str):
+        raise NotImplementedError
+
+    def delete_table(self, table_name: str) -> bool:
+        """ Return True if deleted is done.
+        """
+        input_table_name = input(f"type table name to delete {table_name}:")
+        if input_table_name == table_name or input_table_name == table_name[-3:]:
+            self._drop_table(table_name)
+            return True
+        else:
+            log.info(f"input table name {input_table_name} doesn't match with {table_name}; aborted")
+            return False
+
+    def existing_keys(self, table_name: str, key_cols: Union[str, List[str]], keys: Optional[Iterable[Any]]=None, **kw) -> Set[Any]:
+        raise NotImplementedError
+
+    def missing_ranges(self, table_name: str, col: str, start: int, end: int, step: int=1) -> List[Tuple[int, int]]:
+        raise NotImplementedError
+
+    def _filter_column(self, table_name: str, col: str, value: Any) -> str:
+        """ SQL expression of `col` to compare with `value`. """
+        return col
+
+    def _where(self, table_name: str, filters: Optional[List[Filter]]) -> Tuple[str, list]:
+        """ WHERE clause (with placeholders) and its parameters. """
+        if not filters:
+            return "", []
+        conds, params = [], []
+        for col, op, value in filters:
+            assert op in _filter_ops, f"{op} is not one of {list(_filter_ops.keys())}"
+            if op in ("in", "not in"):
+                values = list(value)
+                expr = self._filter_column(table_name, col, values[0] if values else None)
+                conds.append(f"{expr} {_filter_ops[op]} ({', '.join(['?'] * len(values))})")
+                params += values
+            else:
+                conds.append(f"{self._filter_column(table_name, col, value)} {_filter_ops[op]} ?")
+                params.append(value)
+        return " WHERE " + " AND ".join(conds), params
+
+    def read_table(self,
+                   table_name: str,
+                   parse_str_columns=True,
+                   *,
+                   columns: Optional[List[str]]=None,
+                   filters: Optional[List[Filter]]=None,
+                   ) -> pd.DataFrame:
+        """ Read `columns` (default all) of the rows matching all `filters`;
+        both are pushed down to the backend rather than applied in pandas.
+        """
+        where, params = self._where(table_name, filters)
+        query = f"SELECT {', '.join(columns) if columns else '*'} FROM {table_name}{where}"
+        return self.read(query, parse_str_columns=parse_str_columns, params=params)
+
+
+class DuckDBConnector(StorageBackend):
+    """ Tables in an embedded DuckDB database, stored by column with their
+    pandas types (unlike `SQLConnector.write`, which stores text).
+    Each thread reads through its own cursor; writes are serialized.
+    """
+
+    def connect(self, path: str, **kw):
+        import duckdb
+        self._path = path
+        self._con = duckdb.connect(path, **kw)
+        self._local = threading.local()
+        self._write_lock = threading.Lock()
+
+    def close(self):
+        self._con.close()
+
+    @property
+    def con(self):
+        """ The cursor of the current thread. """
+        con = getattr(self._local, "con", None)
+        if con is None:
+            con = self._local.con = self._con.cursor()
+        return con
+
+    def execute(self, query: str, *a, verbose=False, **kw):
+        try:
+            if verbose:
+                log.info(f"executing query = {query}, args = {a}")
+            return self.con.execute(query, *a, **kw)
+        except Exception as e:
+            log.error(f"{query} failed with error {e}")
+            raise e
+
+    def table_exists(self, table_name: str) -> bool:
+        return self.execute(
+            "SELECT 1 FROM information_schema.tables WHERE table_name = ?", [table_name]).fetchone() is not None
+
+    def execute_write(self, query: str, params: Optional[list]=None):
+        with self._write_lock:
+            self.execute(query, params or [])
+
+    def _drop_table(self, table_name: str):
+        self.execute_write(f"DROP TABLE {table_name}")
+
+    def write(self,
+              df: pd.DataFrame,
+              *,
+              table_name: str,
+              index: Union[str, List[str]]):
+        if isinstance(index, str):
+            index = [index]
+        assert all([_ in df.columns for _ in index]), f"not all of {index} are found in {df.columns}"
+        # DuckDB has no 256-bit integers; they are stored as text as by SQLConnector
+        df = df.astype({_: str for _ in df.columns if str(df[_].dtype) in ("uint256", "int256")})
+        cols = ", ".join(df.columns)
+        with self._write_lock:
+            con = self.con
+            con.register("_df", df)
+            try:
+                if not self.table_exists(table_name):
+                    types = con.execute("DESCRIBE SELECT * FROM _df").fetchall()
+                    con.execute("CREATE TABLE {} ({}, PRIMARY KEY ({}))".format(
+                        table_name, ", ".join(f"{name} {typ}" for name, typ, *_ in types), ", ".join(index)))
+                    log.info(f"created table {table_name} at {self._path}; index = {index}")
+                con.execute(f"INSERT OR REPLACE INTO {table_name} ({cols}) SELECT {cols} FROM _df")
+            finally:
+                con.unregister("_df")
+        log.info(f"{len(df)} rows are written to {self._path}:{table_name}.")
+
+    def read(self, query: str, parse_str_columns=False, params: Optional[list]=None) -> pd.DataFrame:
+        log.info(f"querying dataframe from {query}")
+        df = self.execute(query, params or []).df()
+        if parse_str_columns is True:
+            from .sql import SQLConnector
+            SQLConnector.parse_str_columns(df, inplace=True)
+        return df
+
+    def existing_keys(self,
+                      table_name: str,
+                      key_cols: Union[str, List[str]],
+                      keys: Optional[Iterable[Any]]=None,
+                      *,
+                      start: Optional[int]=None,
+                      end: Optional[int]=None,
+                      ) -> Set[Any]:
+        """ As `SQLConnector.existing_keys`; `keys` are joined as a table. """
+        single = isinstance(key_cols, str)
+        key_cols = [key_cols] if single else list(key_cols)
+        if not self.table_exists(table_name):
+            return set()
+        cols = ", ".join(key_cols)
+        if keys is not None:
+            df_keys = pd.DataFrame([[k] if single else list(k) for k in keys], columns=key_cols)
+            con = self.con
+            con.register("_keys", df_keys)
+            try:
+                rows = con.execute(f"SELECT {cols} FROM _keys SEMI JOIN {table_name} USING ({cols})").fetchall()
+            finally:
+                con.unregister("_keys")
+        else:
+            where, params = self._where(table_name, (
+                [(key_cols[0], ">=", start)] if start is not None else []) + (
+                [(key_cols[0], "<", end)] if end is not None else []))
+            rows = self.execute(f"SELECT {cols} FROM {table_name}{where}", params).fetchall()
+        return {row[0] for row in rows} if single else {tuple(row) for row in rows}
+
+    def missing_ranges(self,
+                       table_name: str,
+                       col: str,
+                       start: int,
+                       end: int,
+                       step: int=1,
+                       ) -> List[Tuple[int, int]]:
+        """ As `SQLConnector.missing_ranges`. """
+        assert step > 0, f"step {step} <= 0"
+        if start >= end:
+            return []
+        if not self.table_exists(table_name):
+            return [(start, end)]
+        query = f"""
+            WITH missing AS (
+                SELECT range AS v FROM range(?, ?, ?) grid
+                WHERE NOT EXISTS (SELECT 1 FROM {table_name} WHERE {col} = grid.range)
+            )
+            SELECT MIN(v), MAX(v) FROM (
+                SELECT v, (v - ?) // ? - ROW_NUMBER() OVER (ORDER BY v) AS island FROM missing
+            ) GROUP BY island ORDER BY 1"""
+        rows = self.execute(query, [start, end, step, start, step]).fetchall()
+        return [(int(lo), int(hi) + step) for lo, hi in rows]
+
+
+_backends: Dict[str, str] = {
+    "sqlite": ".sql:SQLConnector",
+    "duckdb": ".storage:DuckDBConnector",
+}
+
+
+def connect_storage(path: str, backend: Optional[str]=None, **kw) -> StorageBackend:
+    """ Connect to `path` with `backend`, or UNKNOWN_STORAGE_BACKEND if not
+    set, or "duckdb" if `path` ends with ".duckdb", or "sqlite".
+    """
+    import importlib
+    if backend is None:
+        backend = os.environ.get("UNKNOWN_STORAGE_BACKEND") or ("duckdb" if path.endswith(".duckdb") else "sqlite")
+    assert backend in _backends, f"{backend} is not one of {list(_backends.keys())}"
+    module_name, class_name = _backends[backend].split(":")
+    storage = getattr(importlib.import_module(module_name, __package__), class_name)()
+    storage.connect(path, **kw)
+    log.info(f"connected to {path} with backend {backend}")
+    return storage
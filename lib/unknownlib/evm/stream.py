@@ -0,0 +1,238 @@
+"""
+Streaming of event logs over a WebSocket subscription.
+
+`LogStream` subscribes to `newHeads` and `logs` with `eth_subscribe` and
+yields each decoded log as soon as the node pushes it.
+
+* Logs that a reorg removes are yielded again with `removed` set, either
+  as pushed by the node, or found by comparing block hashes on reconnect.
+* On reconnect, logs are backfilled with `eth_getLogs` from the last block
+  seen, so no block is skipped; logs already yielded are not repeated.
+
+Examples
+--------
+>>> stream = LogStream("ws://localhost:8546", {"weth_tfer": weth.events.Transfer()})
+>>> for key, row in stream:
+...     print(key, row["args_value"], row["removed"])
+"""
+import asyncio
+import json
+from collections import deque
+from typing import Dict, List, Any, Hashable, Tuple, Optional, Iterator, AsyncIterator, Callable
+from hexbytes import HexBytes
+from eth_utils import event_abi_to_log_topic
+from .core.addr import Addr
+from .decode import decode_logs
+from .. import log
+
+
+__all__ = [
+    "LogStream",
+]
+
+
+def _parse_log(r: Dict[str, Any]) -> Dict[str, Any]:
+    """ A log of JSON-RPC as returned by `eth.get_logs`.
+    """
+    return {
+        "address": Addr(r["address"]).value,
+        "topics": [HexBytes(_) for _ in r["topics"]],
+        "data": HexBytes(r["data"]),
+        "blockNumber": int(r["blockNumber"], 16),
+        "transactionHash": HexBytes(r["transactionHash"]),
+        "transactionIndex": int(r["transactionIndex"], 16),
+        "blockHash": HexBytes(r["blockHash"]),
+        "logIndex": int(r["logIndex"], 16),
+        "removed": r.get("removed", False),
+    }
+
+
+class LogStream:
+    """ Logs of `events`, i.e. key -> ContractEvent as in `demux_logs`,
+    yielded as (key, row) where row has the columns of `get_logs_as_df`
+    plus `removed`. Iterate with `for` or `async for`.
+
+    Parameters
+    ----------
+    ws_url : str
+        WebSocket endpoint of the node.
+    events : dict
+        Any key -> ContractEvent, e.g. `contract.events.Transfer()`.
+    from_block : int | None
+        If set, logs since this block are backfilled first;
+        otherwise streaming starts at the current block.
+    reorg_depth : int
+        Number of recent blocks whose hashes and logs are kept to detect
+        reorgs across reconnects.
+    reconnect_wait : float
+        Seconds to wait before reconnecting.
+    on_head : callable | None
+        Called with (number, hash, parent hash) of each new head,
+        e.g. `ConfirmationBuffer.add_block`.
+    """
+
+    def __init__(self,
+                 ws_url: str,
+                 events: Dict[Hashable, Any],
+                 *,
+                 from_block: Optional[int]=None,
+                 reorg_depth: int=64,
+                 reconnect_wait: float=1.0,
+                 on_head: Optional[Callable[[int, str, str], None]]=None,
+                 ):
+        assert len(events) > 0, "no event is given"
+        self._ws_url = ws_url
+        self._events = events
+        self._reorg_depth = reorg_depth
+        self._reconnect_wait = reconnect_wait
+        self._on_head = on_head
+        self._keys: Dict[Tuple[str, str], List[Hashable]] = {}
+        for k, event in events.items():
+            topic0 = "0x" + event_abi_to_log_topic(event.abi).hex()
+            self._keys.setdefault((event.address.lower(), topic0), []).append(k)
+        self._filter = {
+            "address": list(dict.fromkeys(_.address for _ in events.values())),
+            "topics": [list(dict.fromkeys(_[1] for _ in self._keys))],
+        }
+        self._next_block = from_block # first block not backfilled yet
+        self._hashes: Dict[int, str] = {} # recent block number -> hash
+        self._logs: Dict[str, Dict[int, Dict[str, Any]]] = {} # block hash -> log index -> yielded log
+        self._request_id = 0
+
+    @property
+    def last_block(self) -> Optional[int]:
+        """ The latest block seen. """
+        return max(self._hashes) if self._hashes else None
+
+    async def _call(self, ws, pending: deque, method: str, params: list) -> Any:
+        """ Send a request and wait for its response; notifications received
+        meanwhile are queued in `pending`.
+        """
+        self._request_id += 1
+        request_id = self._request_id
+        await ws.send(json.dumps({"jsonrpc": "2.0", "id": request_id, "method": method, "params": params}))
+        while True:
+            msg = json.loads(await ws.recv())
+            if msg.get("id") == request_id:
+                if "error" in msg:
+                    raise RuntimeError(f"{method} failed: {msg['error']}")
+                return msg["result"]
+            pending.append(msg)
+
+    def _see_block(self, number: int, block_hash: str):
+        if number in self._hashes and self._hashes[number] != block_hash:
+            # a new head replaces this and the later blocks; their logs are
+            # dropped as the node pushes them as removed
+            for n in [_ for _ in self._hashes if _ >= number]:
+                del self._hashes[n]
+        self._hashes[number] = block_hash
+        oldest = max(self._hashes) - self._reorg_depth
+        for n in [_ for _ in self._hashes if _ < oldest]:
+            del self._hashes[n]
+        # including logs of replaced blocks that the node never pushed as removed
+        for h in [h for h, logs in self._logs.items() if next(iter(logs.values()))["blockNumber"] < oldest]:
+            del self._logs[h]
+
+    def _accept(self, raw_log: Dict[str, Any]) -> bool:
+        """ Record `raw_log`; False if it was already yielded (or never was,
+        if it is removed).
+        """
+        block_hash = raw_log["blockHash"].to_0x_hex()
+        if raw_log["removed"]:
+            logs = self._logs.get(block_hash, {})
+            accepted = logs.pop(raw_log["logIndex"], None) is not None
+            if not logs:
+                self._logs.pop(block_hash, None)
+            return accepted
+        logs = self._logs.setdefault(block_hash, {})
+        if raw_log["logIndex"] in logs:
+            return False
+        logs[raw_log["logIndex"]] = raw_log
+        self._see_block(raw_log["blockNumber"], block_hash)
+        return True
+
+    def _decode(self, raw_logs: List[Dict[str, Any]]) -> List[Tuple[Hashable, Dict[str, Any]]]:
+        """ Decode `raw_logs` in batches per event, keeping their order.
+        """
+        groups: Dict[Hashable, List[int]] = {}
+        for i, raw_log in enumerate(raw_logs):
+            for k in self._keys.get((raw_log["address"].lower(), raw_log["topics"][0].to_0x_hex()), []):
+                groups.setdefault(k, []).append(i)
+        items = []
+        for k, idx in groups.items():
+            rows = decode_logs([raw_logs[i] for i in idx], self._events[k]).to_dict("records")
+            for i, row in zip(idx, rows):
+                row["removed"] = raw_logs[i]["removed"]
+                items.append((i, k, row))
+        return [(k, row) for _, k, row in sorted(items, key=lambda _: _[0])]
+
+    async def _replay_reorg(self, ws, pending: deque) -> List[Dict[str, Any]]:
+        """ Compare recent block hashes with the chain; return the logs of
+        blocks that were replaced, as removed, and rewind the next block to
+        backfill to the latest block that is still on the chain.
+        """
+        removed = []
+        for n in sorted(self._hashes, reverse=True):
+            block = await self._call(ws, pending, "eth_getBlockByNumber", [hex(n), False])
+            if block is not None and block["hash"] == self._hashes[n]:
+                break
+            block_hash = self._hashes.pop(n)
+            log.info(f"block {n} {block_hash} was reorged")
+            removed += [{**_, "removed": True} for _ in self._logs.get(block_hash, {}).values()]
+            self._next_block = n if self._next_block is None else min(self._next_block, n)
+        return sorted(removed, key=lambda _: (_["blockNumber"], _["logIndex"]), reverse=True)
+
+    async def _backfill(self, ws, pending: deque) -> List[Dict[str, Any]]:
+        head = int(await self._call(ws, pending, "eth_blockNumber", []), 16)
+        if self._next_block is None: # start streaming from the next block
+            self._next_block = head + 1
+        if self._next_block > head:
+            return []
+        log.info(f"backfilling logs of blocks {self._next_block} to {head}")
+        raw_logs = await self._call(ws, pending, "eth_getLogs", [{
+            **self._filter, "fromBlock": hex(self._next_block), "toBlock": hex(head)}])
+        self._next_block = head
+        return [_parse_log(_) for _ in raw_logs]
+
+    async def __aiter__(self) -> AsyncIterator[Tuple[Hashable, Dict[str, Any]]]:
+        from websockets.asyncio.client import connect
+        from websockets.exceptions import ConnectionClosed
+        while True:
+            try:
+                async with connect(self._ws_url, max_size=None) as ws:
+                    pending = deque()
+                    # subscribe before backfilling, so that no block falls in between
+                    heads_id = await self._call(ws, pending, "eth_subscribe", ["newHeads"])
+                    logs_id = await self._call(ws, pending, "eth_subscribe", ["logs", self._filter])
+                    log.info(f"subscribed to logs of {self._filter} at {self._ws_url}")
+                    raw_logs = await self._replay_reorg(ws, pending) + await self._backfill(ws, pending)
+                    for item in self._decode([_ for _ in raw_logs if self._accept(_)]):
+                        yield item
+                    while True:
+                        msg = pending.popleft() if pending else json.loads(await ws.recv())
+                        if msg.get("method") != "eth_subscription":
+                            continue
+                        subscription, result = msg["params"]["subscription"], msg["params"]["result"]
+                        if subscription == heads_id:
+                            self._see_block(int(result["number"], 16), result["hash"])
+                            self._next_block = self.last_block # on reconnect, backfill from here
+                            if self._on_head is not None:
+                                self._on_head(int(result["number"], 16), result["hash"], result["parentHash"])
+                        elif subscription == logs_id:
+                            raw_log = _parse_log(result)
+                            if self._accept(raw_log):
+                                for item in self._decode([raw_log]):
+                                    yield item
+            except (ConnectionClosed, OSError) as e:
+                log.warning(f"lost connection to {self._ws_url}: {e}; reconnecting in {self._reconnect_wait}s")
+                await asyncio.sleep(self._reconnect_wait)
+
+    def __iter__(self) -> Iterator[Tuple[Hashable, Dict[str, Any]]]:
+        loop = asyncio.new_event_loop()
+        agen = self.__aiter__()
+        try:
+            while True:
+                yield loop.run_until_complete(agen.__anext__())
+        finally:
+            loop.run_until_complete(agen.aclose())
+            loop.close()
@@ -0,0 +1,621 @@
+"""
+256-bit integer columns in pandas.
+
+ERC20 values, Uniswap amounts, sqrtPriceX96, etc. are uint256 or int256,
+which do not fit in int64. A column of them as Python ints is an object
+column: every value is a boxed object and every operation goes through
+Python. `UInt256Array` and `Int256Array` store each value as 4 uint64 limbs
+(int256 in two's complement) plus a mask of NA, so that add, sub, compare,
+sort, sum, min, max and conversion to float run in numpy. Statistics
+(mean, std, var, median, quantiles, hence `describe`) are in float64.
+
+Importing this module registers the dtypes "uint256" and "int256".
+
+Examples
+--------
+>>> s = pd.Series([2 ** 200, 10 ** 18], dtype="uint256")
+>>> (s + s > s).all()
+True
+>>> scale_decimals(s, 18)  # float64, in units of the token
+"""
+import numbers
+import numpy as np
+import pandas as pd
+from typing import Optional, Tuple, List
+from pandas.api.extensions import ExtensionArray, ExtensionDtype, register_extension_dtype
+from pandas.api.types import is_list_like, pandas_dtype
+
+
+__all__ = [
+    "UInt256Dtype",
+    "Int256Dtype",
+    "UInt256Array",
+    "Int256Array",
+    "scale_decimals",
+]
+
+
+_N_LIMBS = 4
+_LIMB_WEIGHTS = 2.0 ** (64 * np.arange(_N_LIMBS - 1, -1, -1))
+_MAX_LIMB = np.uint64(0xffffffffffffffff)
+_SIGN_BIT = np.uint64(1 << 63)
+
+
+def _add_limbs(a: np.ndarray, b: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """ a + b mod 2 ** 256, and the carry out of the top limb. """
+    out = np.empty(np.broadcast_shapes(a.shape, b.shape), dtype=np.uint64)
+    carry = np.zeros(out.shape[1], dtype=bool)
+    for k in range(_N_LIMBS - 1, -1, -1):
+        t = np.add(a[k], b[k], out=out[k])
+        c1 = t < a[k]
+        t += carry
+        carry = c1 | (t < carry)
+    return out, carry
+
+
+def _sub_limbs(a: np.ndarray, b: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """ a - b mod 2 ** 256, and the borrow out of the top limb. """
+    out = np.empty(np.broadcast_shapes(a.shape, b.shape), dtype=np.uint64)
+    borrow = np.zeros(out.shape[1], dtype=bool)
+    for k in range(_N_LIMBS - 1, -1, -1):
+        t = np.subtract(a[k], b[k], out=out[k])
+        b1 = a[k] < b[k]
+        b2 = (t == 0) & borrow
+        t -= borrow
+        borrow = b1 | b2
+    return out, borrow
+
+
+def _negate(data: np.ndarray) -> np.ndarray:
+    return _sub_limbs(np.zeros((_N_LIMBS, 1), dtype=np.uint64), data)[0]
+
+
+def _compare(a_nonneg: np.ndarray, a: np.ndarray, b_nonneg: np.ndarray, b: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """ (a < b, a == b), ordering by sign first then by limbs. """
+    lt = a_nonneg < b_nonneg
+    eq = a_nonneg == b_nonneg
+    for k in range(_N_LIMBS):
+        lt = lt | (eq & (a[k] < b[k]))
+        eq = eq & (a[k] == b[k])
+    return lt, eq
+
+
+def _sort_keys(data: np.ndarray, nonneg: np.ndarray) -> List[np.ndarray]:
+    """ Keys of `np.lexsort`, least significant first; constant ones,
+    e.g. high limbs of small values, are skipped.
+    """
+    keys = [data[k] for k in range(_N_LIMBS - 1, -1, -1)] + [nonneg]
+    return [_ for _ in keys if len(_) > 0 and (_ != _[0]).any()]
+
+
+def _sum_by_group(data: np.ndarray, ids: np.ndarray, ngroups: int) -> Tuple[np.ndarray, np.ndarray]:
+    """ Sums of `data` by group mod 2 ** 256, and the multiples of 2 ** 256
+    carried out. Limbs are summed by pieces with `np.bincount`, whose float64
+    sums are exact if (number of rows) * 2 ** (bits of a piece) <= 2 ** 53.
+    """
+    bits = 32 if len(ids) <= 2 ** 21 else 16
+    n_pieces = 64 // bits
+    piece_mask = np.uint64((1 << bits) - 1)
+    pieces = np.zeros((n_pieces * _N_LIMBS, ngroups), dtype=np.uint64) # most significant first
+    for k in range(_N_LIMBS):
+        if not data[k].any():
+            continue
+        for s in range(n_pieces):
+            weights = (data[k] >> np.uint64(64 - bits * (s + 1))) & piece_mask
+            pieces[n_pieces * k + s] = np.bincount(ids, weights=weights, minlength=ngroups)
+    out = np.zeros((_N_LIMBS, ngroups), dtype=np.uint64)
+    carry = np.zeros(ngroups, dtype=np.uint64)
+    for j in range(n_pieces * _N_LIMBS - 1, -1, -1):
+        t = pieces[j] + carry
+        out[j // n_pieces] |= (t & piece_mask) << np.uint64(64 - bits * (j % n_pieces + 1))
+        carry = t >> np.uint64(bits)
+    return out, carry
+
+
+class _Word256Dtype(ExtensionDtype):
+    type = int
+    kind = "O"
+    na_value = pd.NA
+    signed: bool
+    _is_numeric = True
+
+
+@register_extension_dtype
+class UInt256Dtype(_Word256Dtype):
+    """ Integers in [0, 2 ** 256). """
+    name = "uint256"
+    signed = False
+
+    @classmethod
+    def construct_array_type(cls):
+        return UInt256Array
+
+
+@register_extension_dtype
+class Int256Dtype(_Word256Dtype):
+    """ Integers in [-2 ** 255, 2 ** 255). """
+    name = "int256"
+    signed = True
+
+    @classmethod
+    def construct_array_type(cls):
+        return Int256Array
+
+
+class _Word256Array(ExtensionArray):
+    """ Base of `UInt256Array` and `Int256Array`.
+
+    Parameters
+    ----------
+    data : np.ndarray
+        (4, n) uint64 limbs, most significant first; each limb is contiguous.
+    mask : np.ndarray | None
+        True where the value is NA.
+    """
+
+    _dtype: _Word256Dtype
+
+    def __init__(self, data: np.ndarray, mask: Optional[np.ndarray]=None):
+        data = np.ascontiguousarray(data, dtype=np.uint64)
+        assert data.ndim == 2 and data.shape[0] == _N_LIMBS, f"data of shape {data.shape} is not ({_N_LIMBS}, n)"
+        self._data = data
+        self._mask = np.zeros(data.shape[1], dtype=bool) if mask is None else np.asarray(mask, dtype=bool)
+        assert self._mask.shape == (data.shape[1],), f"mask of shape {self._mask.shape} does not match data"
+
+    # construction
+
+    @classmethod
+    def from_words(cls, words: np.ndarray) -> "_Word256Array":
+        """ From an (n, 32) uint8 array of big-endian words, e.g. ABI-encoded
+        log data, without going through Python ints.
+        """
+        words = np.ascontiguousarray(words, dtype=np.uint8)
+        assert words.ndim == 2 and words.shape[1] == 32, f"words of shape {words.shape} is not (n, 32)"
+        return cls(words.view(">u8").T)
+
+    @classmethod
+    def _from_int_array(cls, values: np.ndarray) -> "_Word256Array":
+        data = np.zeros((_N_LIMBS, len(values)), dtype=np.uint64)
+        if values.dtype.kind == "i":
+            neg = values < 0
+            if not cls._dtype.signed and neg.any():
+                raise OverflowError(f"{values[neg][0]} is out of range of {cls._dtype}")
+            data[-1] = values.astype(np.int64).astype(np.uint64)
+            data[:-1, neg] = _MAX_LIMB
+        else:
+            data[-1] = values.astype(np.uint64)
+        return cls(data)
+
+    @classmethod
+    def _from_sequence(cls, scalars, *, dtype=None, copy=False):
+        if isinstance(scalars, (pd.Series, pd.Index)):
+            scalars = scalars.array
+        if isinstance(scalars, _Word256Array):
+            return scalars._cast(cls._dtype, copy=copy)
+        values = np.asarray(scalars)
+        if values.dtype.kind in "iub":
+            return cls._from_int_array(values)
+        signed = cls._dtype.signed
+        mask = np.zeros(len(values), dtype=bool)
+        buf = bytearray(32 * len(values))
+        for i, v in enumerate(values.tolist() if values.dtype.kind != "O" else values):
+            if v is None or v is pd.NA or (isinstance(v, float) and np.isnan(v)):
+                mask[i] = True
+                continue
+            if isinstance(v, str):
+                v = int(v, 0)
+            elif isinstance(v, float) and v.is_integer():
+                v = int(v)
+            elif not isinstance(v, numbers.Integral):
+                raise TypeError(f"{v!r} of type {type(v)} is not an integer")
+            try:
+                buf[32 * i:32 * (i + 1)] = int(v).to_bytes(32, "big", signed=signed)
+            except OverflowError:
+                raise OverflowError(f"{v} is out of range of {cls._dtype}")
+        return cls(np.frombuffer(bytes(buf), dtype=">u8").reshape(-1, _N_LIMBS).T, mask)
+
+    @classmethod
+    def _from_sequence_of_strings(cls, strings, *, dtype=None, copy=False):
+        return cls._from_sequence([pd.NA if pd.isna(_) else int(_, 0) for _ in strings])
+
+    @classmethod
+    def _from_factorized(cls, values, original):
+        return cls._from_sequence(values)
+
+    @classmethod
+    def _concat_same_type(cls, to_concat):
+        return cls(np.concatenate([_._data for _ in to_concat], axis=1), np.concatenate([_._mask for _ in to_concat]))
+
+    # conversion
+
+    def _negative(self) -> np.ndarray:
+        if not self._dtype.signed:
+            return np.zeros(len(self), dtype=bool)
+        return self._data[0] >= _SIGN_BIT
+
+    def _cast(self, dtype: _Word256Dtype, copy: bool=False) -> "_Word256Array":
+        if dtype == self._dtype:
+            return self.copy() if copy else self
+        # same bits; values outside of the target range are rejected
+        out_of_range = (self._data[0] >= _SIGN_BIT) & ~self._mask
+        if out_of_range.any():
+            raise OverflowError(f"{self[int(np.argmax(out_of_range))]} is out of range of {dtype}")
+        return dtype.construct_array_type()(self._data.copy(), self._mask.copy())
+
+    def _to_ints(self) -> np.ndarray:
+        """ Python ints, or NA, in an object array. """
+        out = np.empty(len(self), dtype=object)
+        small = ~self._data[:-1].any(axis=0)
+        out[small] = self._data[-1, small].tolist()
+        big = np.flatnonzero(~small)
+        buf = self._data[:, big].T.astype(">u8").tobytes()
+        signed = self._dtype.signed
+        out[big] = [int.from_bytes(buf[32 * i:32 * (i + 1)], "big", signed=signed) for i in range(len(big))]
+        out[self._mask] = pd.NA
+        return out
+
+    def to_float(self, decimals: int=0) -> np.ndarray:
+        """ float64 values divided by 10 ** `decimals`, e.g. amounts of a
+        token in its units; NaN where NA.
+        """
+        data = self._data
+        neg = self._negative()
+        if neg.any():
+            data = data.copy()
+            data[:, neg] = _negate(data[:, neg])
+        res = data[-1].astype(np.float64)
+        for k in range(_N_LIMBS - 1):
+            res += data[k] * _LIMB_WEIGHTS[k]
+        res[neg] = -res[neg]
+        if decimals:
+            res /= 10.0 ** decimals
+        res[self._mask] = np.nan
+        return res
+
+    def __array__(self, dtype=None, copy=None):
+        if copy is False:
+            raise ValueError(f"{type(self).__name__} cannot be converted to numpy without a copy")
+        if dtype is not None and np.dtype(dtype).kind == "f":
+            return self.to_float().astype(dtype)
+        res = self._to_ints()
+        return res if dtype is None else res.astype(dtype)
+
+    def astype(self, dtype, copy=True):
+        dtype = pandas_dtype(dtype)
+        if isinstance(dtype, _Word256Dtype):
+            return self._cast(dtype, copy=copy)
+        if isinstance(dtype, np.dtype) and dtype.kind == "f":
+            return self.to_float().astype(dtype, copy=False)
+        return super().astype(dtype, copy=copy)
+
+    def __iter__(self):
+        return iter(self._to_ints())
+
+    # ExtensionArray interface
+
+    @property
+    def dtype(self) -> _Word256Dtype:
+        return self._dtype
+
+    @property
+    def nbytes(self) -> int:
+        return self._data.nbytes + self._mask.nbytes
+
+    def __len__(self) -> int:
+        return self._data.shape[1]
+
+    def _scalar(self, limbs: np.ndarray) -> int:
+        return int.from_bytes(limbs.astype(">u8").tobytes(), "big", signed=self._dtype.signed)
+
+    def __getitem__(self, item):
+        if isinstance(item, numbers.Integral):
+            return pd.NA if self._mask[item] else self._scalar(self._data[:, item])
+        if isinstance(item, tuple):
+            item = tuple(_ for _ in item if _ is not Ellipsis)
+            if len(item) > 1:
+                raise IndexError(f"too many indices for a 1-dimensional array: {item}")
+            item = item[0] if item else Ellipsis
+        if item is Ellipsis:
+            item = slice(None)
+        item = pd.api.indexers.check_array_indexer(self, item)
+        return type(self)(self._data[:, item], self._mask[item])
+
+    def __setitem__(self, key, value):
+        key = pd.api.indexers.check_array_indexer(self, key)
+        if isinstance(value, _Word256Array):
+            value = value._cast(self._dtype)
+        else:
+            value = type(self)._from_sequence(value if is_list_like(value) else [value])
+        if isinstance(key, numbers.Integral):
+            if len(value) != 1:
+                raise ValueError(f"cannot set {len(value)} values to a single element")
+            self._data[:, key] = value._data[:, 0]
+            self._mask[key] = value._mask[0]
+        else:
+            self._data[:, key] = value._data
+            self._mask[key] = value._mask
+
+    def isna(self) -> np.ndarray:
+        return self._mask.copy()
+
+    def copy(self):
+        return type(self)(self._data.copy(), self._mask.copy())
+
+    def take(self, indices, *, allow_fill=False, fill_value=None):
+        indices = np.asarray(indices, dtype=np.intp)
+        if not allow_fill:
+            return type(self)(self._data.take(indices, axis=1), self._mask.take(indices))
+        if (indices < -1).any():
+            raise ValueError(f"invalid index {indices.min()} with allow_fill; only -1 is allowed")
+        fill = indices == -1
+        if len(self) == 0:
+            if not fill.all():
+                raise IndexError("cannot do a non-empty take from an empty array")
+            res = type(self)(np.zeros((_N_LIMBS, len(indices)), dtype=np.uint64), np.ones(len(indices), dtype=bool))
+        else:
+            idx = np.where(fill, 0, indices)
+            res = type(self)(self._data.take(idx, axis=1), self._mask.take(idx) | fill)
+        if fill.any() and fill_value is not None and not pd.isna(fill_value):
+            res[fill] = fill_value
+        return res
+
+    # sorting and reductions
+
+    def _values_for_factorize(self):
+        return self._to_ints(), pd.NA
+
+    def _values_for_argsort(self) -> np.ndarray:
+        """ Sortable structured array of (sign, limbs). """
+        res = np.empty(len(self), dtype=[("nonneg", "?")] + [(f"limb{k}", "u8") for k in range(_N_LIMBS)])
+        res["nonneg"] = ~self._negative()
+        for k in range(_N_LIMBS):
+            res[f"limb{k}"] = self._data[k]
+        return res
+
+    def argsort(self, *, ascending: bool=True, kind: str="quicksort", na_position: str="last", **kwargs) -> np.ndarray:
+        valid = np.flatnonzero(~self._mask)
+        keys = _sort_keys(self._data[:, valid], ~self._negative()[valid])
+        if not keys:
+            order = valid
+        elif ascending:
+            order = valid[np.lexsort(keys)]
+        else:
+            # as `nargsort`, equal values keep their order
+            order = valid[::-1][np.lexsort([_[::-1] for _ in keys])][::-1]
+        na = np.flatnonzero(self._mask)
+        return np.concatenate([order, na] if na_position == "last" else [na, order])
+
+    def _argext(self, data: np.ndarray, nonneg: np.ndarray, largest: bool) -> int:
+        """ Index of the smallest (or largest) value in `data`. """
+        idx = np.arange(data.shape[1])
+        for key in [nonneg] + list(data):
+            v = key[idx]
+            idx = idx[v == (v.max() if largest else v.min())]
+        return int(idx[0])
+
+    def _argminmax(self, largest: bool, skipna: bool) -> int:
+        name = "argmax" if largest else "argmin"
+        if len(self) == 0:
+            raise ValueError(f"attempt to get {name} of an empty sequence")
+        if not skipna and self._mask.any():
+            raise ValueError(f"Encountered an NA value with skipna=False in {name}")
+        if self._mask.all():
+            raise ValueError(f"Encountered all NA values in {name}")
+        valid = np.flatnonzero(~self._mask)
+        return int(valid[self._argext(self._data[:, valid], ~self._negative()[valid], largest)])
+
+    def argmin(self, skipna: bool=True) -> int:
+        return self._argminmax(False, skipna)
+
+    def argmax(self, skipna: bool=True) -> int:
+        return self._argminmax(True, skipna)
+
+    def _reduce(self, name: str, *, skipna: bool=True, keepdims: bool=False, **kwargs):
+        data, nonneg = self._data, ~self._negative()
+        if self._mask.any():
+            if not skipna:
+                return pd.NA
+            data, nonneg = data[:, ~self._mask], nonneg[~self._mask]
+        if name == "sum":
+            # sums of 32-bit halves are exact in uint64 for up to 2 ** 32 rows
+            res = sum((int((d >> np.uint64(32)).sum()) << (64 * (_N_LIMBS - 1 - k) + 32))
+                      + (int((d & np.uint64(0xffffffff)).sum()) << (64 * (_N_LIMBS - 1 - k)))
+                      for k, d in enumerate(data))
+            res -= int((~nonneg).sum()) << 256 # negative int256 are stored as 2 ** 256 + value
+        elif name in ("min", "max"):
+            if data.shape[1] == 0:
+                return pd.NA
+            res = self._scalar(data[:, self._argext(data, nonneg, name == "max")])
+        elif name == "mean":
+            return np.nanmean(self.to_float()) if data.shape[1] > 0 else np.nan
+        elif name in ("var", "std", "median"):
+            # in float64, like mean
+            values = self.to_float()[~self._mask]
+            if name == "median":
+                return np.median(values) if len(values) > 0 else np.nan
+            ddof = kwargs.get("ddof", 1)
+            var = np.var(values, ddof=ddof) if len(values) > ddof else np.nan
+            return np.sqrt(var) if name == "std" else var
+        elif name in ("any", "all"):
+            nonzero = data.any(axis=0)
+            return nonzero.any() if name == "any" else nonzero.all()
+        else:
+            return super()._reduce(name, skipna=skipna, keepdims=keepdims, **kwargs)
+        if keepdims:
+            return type(self)._from_sequence([res])
+        return res
+
+    def _quantile(self, qs: np.ndarray, interpolation: str) -> np.ndarray:
+        # in float64, like mean
+        values = self.to_float()[~self._mask]
+        if len(values) == 0:
+            return np.full(len(qs), np.nan)
+        return np.quantile(values, qs, method=interpolation)
+
+    def _groupby_op(self, *, how: str, has_dropped_na: bool, min_count: int, ngroups: int, ids: np.ndarray, **kwargs):
+        if how == "mean":
+            valid = (ids >= 0) & ~self._mask
+            counts = np.bincount(ids[valid], minlength=ngroups)
+            sums = np.bincount(ids[valid], weights=self.to_float()[valid], minlength=ngroups)
+            with np.errstate(invalid="ignore", divide="ignore"):
+                return sums / counts
+        if how not in ("sum", "min", "max", "first", "last"):
+            return super()._groupby_op(how=how, has_dropped_na=has_dropped_na, min_count=min_count,
+                                       ngroups=ngroups, ids=ids, **kwargs)
+        has_na = np.bincount(ids[(ids >= 0) & self._mask], minlength=ngroups) > 0
+        data, nonneg = self._data, ~self._negative()
+        if has_dropped_na or self._mask.any():
+            valid = (ids >= 0) & ~self._mask
+            data, ids, nonneg = data[:, valid], ids[valid], nonneg[valid]
+        counts = np.bincount(ids, minlength=ngroups)
+        mask = counts < max(min_count, 0 if how == "sum" else 1)
+        if not kwargs.get("skipna", True):
+            mask |= has_na
+        if how == "sum":
+            out, carry = _sum_by_group(data, ids, ngroups)
+            if self._dtype.signed:
+                # the sum is out + (carry - number of negatives) * 2 ** 256
+                excess = carry.astype(np.int64) - np.bincount(ids, weights=~nonneg, minlength=ngroups).astype(np.int64)
+                top = out[0] >= _SIGN_BIT
+                overflow = ~(((excess == 0) & ~top) | ((excess == -1) & top))
+            else:
+                overflow = carry > 0
+            if (overflow & ~mask).any():
+                raise OverflowError(f"sums of {int((overflow & ~mask).sum())} groups are out of range of {self._dtype}")
+            return type(self)(out, mask)
+        if how in ("first", "last"):
+            order = np.argsort(ids, kind="stable")
+        else:
+            order = np.lexsort(_sort_keys(data, nonneg) + [ids])
+        out = np.zeros((_N_LIMBS, ngroups), dtype=np.uint64)
+        if len(ids) > 0:
+            groups, starts = np.unique(ids[order], return_index=True)
+            ends = np.append(starts[1:], len(ids)) - 1
+            out[:, groups] = data[:, order[starts if how in ("min", "first") else ends]]
+        return type(self)(out, mask)
+
+    # arithmetic and comparison
+
+    def _coerce(self, other) -> Optional["_Word256Array"]:
+        """ `other` as an array of ours, or None if it is not integers. """
+        if isinstance(other, (pd.Series, pd.Index, pd.DataFrame)):
+            return None
+        if isinstance(other, _Word256Array):
+            return other
+        if isinstance(other, numbers.Real) and not isinstance(other, (bool, numbers.Integral)):
+            if not float(other).is_integer(): # NaN and inf included
+                return None
+            other = int(other)
+        if isinstance(other, numbers.Integral) and not isinstance(other, bool):
+            cls = Int256Array if other < 0 else type(self)
+            return cls._from_sequence([int(other)])
+        if isinstance(other, (np.ndarray, ExtensionArray, list)):
+            values = np.asarray(other)
+            if values.dtype.kind == "f":
+                na = np.isnan(values)
+                if not np.isfinite(values[~na]).all() or (values[~na] != np.floor(values[~na])).any():
+                    return None
+                values = np.array([None if n else int(v) for v, n in zip(values.tolist(), na)], dtype=object)
+            if values.dtype.kind not in "iuO":
+                return None
+            try:
+                return type(self)._from_sequence(values)
+            except OverflowError:
+                return Int256Array._from_sequence(values)
+            except TypeError:
+                return None
+        return None
+
+    def _binop(self, other, op: str, reverse: bool=False):
+        other = self._coerce(other)
+        if other is None:
+            return NotImplemented
+        a, b = (other, self) if reverse else (self, other)
+        cls = Int256Array if a._dtype.signed or b._dtype.signed else UInt256Array
+        a, b = a._cast(cls._dtype), b._cast(cls._dtype)
+        mask = a._mask | b._mask
+        if op == "add":
+            data, carry = _add_limbs(a._data, b._data)
+        else:
+            data, carry = _sub_limbs(a._data, b._data)
+        if cls._dtype.signed:
+            sign_a, sign_b, sign = a._data[0] >= _SIGN_BIT, b._data[0] >= _SIGN_BIT, data[0] >= _SIGN_BIT
+            same = sign_a == sign_b if op == "add" else sign_a != sign_b
+            overflow = same & (sign != sign_a)
+        else:
+            overflow = carry
+        if (overflow & ~mask).any():
+            raise OverflowError(f"{op} of {int((overflow & ~mask).sum())} values is out of range of {cls._dtype}"
+                                + ("" if cls._dtype.signed else "; cast to int256 for negative results"))
+        return cls(data, mask)
+
+    def __add__(self, other):
+        return self._binop(other, "add")
+
+    def __radd__(self, other):
+        return self._binop(other, "add", reverse=True)
+
+    def __sub__(self, other):
+        return self._binop(other, "sub")
+
+    def __rsub__(self, other):
+        return self._binop(other, "sub", reverse=True)
+
+    def __neg__(self):
+        return 0 - self._cast(Int256Dtype())
+
+    def __abs__(self):
+        neg = self._negative()
+        if not neg.any():
+            return self.copy()
+        res = self.copy()
+        res[neg] = -self[neg]
+        return res
+
+    def _cmp(self, other, op: str):
+        other = self._coerce(other)
+        if other is None:
+            if op in ("eq", "ne"):
+                return np.full(len(self), op == "ne")
+            return NotImplemented
+        lt, eq = _compare(~self._negative(), self._data, ~other._negative(), other._data)
+        res = {"eq": eq, "ne": ~eq, "lt": lt, "le": lt | eq, "gt": ~(lt | eq), "ge": ~lt}[op]
+        return np.where(self._mask | other._mask, op == "ne", res)
+
+    def __eq__(self, other):
+        return self._cmp(other, "eq")
+
+    def __ne__(self, other):
+        return self._cmp(other, "ne")
+
+    def __lt__(self, other):
+        return self._cmp(other, "lt")
+
+    def __le__(self, other):
+        return self._cmp(other, "le")
+
+    def __gt__(self, other):
+        return self._cmp(other, "gt")
+
+    def __ge__(self, other):
+        return self._cmp(other, "ge")
+
+
+class UInt256Array(_Word256Array):
+    """ Array of uint256; see `_Word256Array`. """
+    _dtype = UInt256Dtype()
+
+
+class Int256Array(_Word256Array):
+    """ Array of int256 in two's complement; see `_Word256Array`. """
+    _dtype = Int256Dtype()
+
+
+def scale_decimals(s: pd.Series, decimals: int) -> pd.Series:
+    """ float64 of `s` divided by 10 ** `decimals`, e.g. raw amounts of an
+    ERC20 to amounts in units of the token, with decimals from
+    `ERC20ContractBook.get_decimals`.
+    """
+    if isinstance(s.dtype, _Word256Dtype):
+        return pd.Series(s.array.to_float(decimals), index=s.index, name=s.name)
+    return s.astype(float) / 10.0 ** decimals
@@ -0,0 +1,227 @@
+"""
+Vectorized analytics of Uniswap V2/V3 pools, on logs decoded by
+`get_logs_as_df` (columns "args_<name>"), in integer, object or
+"uint256"/"int256" columns.
+
+* `v2_swaps`, `v3_swaps`: swaps as trades of token0, with amounts in units
+  of the tokens, execution price and volumes.
+* `v2_sync_prices`, `sqrt_price_to_price`: pool prices from reserves or
+  sqrtPriceX96.
+* `liquidity_flows`: Mint/Burn as signed amounts of the tokens.
+* `ohlcv`: bars of trades by blocks or time.
+* `trader_pnl`: positions and PnL of traders, marked to a price.
+
+Prices are in token1 per token0 (e.g. USDC per WETH of a WETH/USDC pool),
+or token0 per token1 with `invert=True`. Token decimals are ints, or keys
+of the tokens in an `ERC20ContractBook` such as `FastW3`.
+
+Examples
+--------
+>>> dfs = fw.get_multi_logs_as_df(stime=stime, etime=etime, events=[("pool", "Swap")])
+>>> swaps = v3_swaps(dfs[("pool", "Swap")], decimals0=ERC20.USDC, decimals1=ERC20.WETH, book=fw, invert=True)
+>>> bars = ohlcv(swaps, 300) # 300 blocks per bar
+"""
+import numpy as np
+import pandas as pd
+from typing import Union, Optional, Hashable, TYPE_CHECKING
+from .core.enums import ERC20
+from .uint256 import scale_decimals
+
+if TYPE_CHECKING:
+    from .core import ERC20ContractBook
+
+
+__all__ = [
+    "resolve_decimals",
+    "sqrt_price_to_price",
+    "v2_swaps",
+    "v3_swaps",
+    "v2_sync_prices",
+    "liquidity_flows",
+    "ohlcv",
+    "trader_pnl",
+]
+
+
+Decimals = Union[int, Hashable] # decimals, or key of the token in an ERC20ContractBook
+
+_log_cols = ["blockNumber", "logIndex", "transactionHash", "timestamp"]
+
+
+def resolve_decimals(token: Decimals, book: Optional["ERC20ContractBook"]=None) -> int:
+    """ `token` if an int, otherwise the decimals of token `token` of `book`.
+    """
+    if isinstance(token, (int, np.integer)):
+        return int(token)
+    assert book is not None, f"no contract book to get the decimals of {token}"
+    if isinstance(token, ERC20):
+        book.init_erc20(token)
+    return book.get_decimals(token)
+
+
+def _safe_div(x: np.ndarray, y: np.ndarray) -> np.ndarray:
+    return np.divide(x, y, out=np.full(len(x), np.nan), where=y != 0)
+
+
+def _frame(df: pd.DataFrame) -> pd.DataFrame:
+    """ The log columns of `df`, to add analytics to. """
+    return df[[_ for _ in _log_cols if _ in df.columns]].copy()
+
+
+def sqrt_price_to_price(sqrt_price_x96: pd.Series, decimals0: int, decimals1: int, invert: bool=False) -> pd.Series:
+    """ Price of token0 in token1 of the Q64.96 square roots of V3 pools,
+    i.e. (sqrtPriceX96 / 2 ** 96) ** 2 * 10 ** (decimals0 - decimals1).
+    """
+    sqrt_price = scale_decimals(sqrt_price_x96, 0).to_numpy(float) / 2.0 ** 96
+    price = sqrt_price * sqrt_price * 10.0 ** (decimals0 - decimals1)
+    if invert:
+        price = _safe_div(np.ones(len(price)), price)
+    return pd.Series(price, index=sqrt_price_x96.index, name="pool_price")
+
+
+def _trades(df: pd.DataFrame, amount0: np.ndarray, amount1: np.ndarray, trader: str, invert: bool) -> pd.DataFrame:
+    """ Trades of token0 with amounts received by the trader. """
+    res = _frame(df)
+    res["trader"] = df[trader].to_numpy()
+    res["amount0"] = amount0
+    res["amount1"] = amount1
+    res["volume0"] = np.abs(amount0)
+    res["volume1"] = np.abs(amount1)
+    res["price"] = (_safe_div(res["volume0"].to_numpy(), res["volume1"].to_numpy()) if invert else
+                    _safe_div(res["volume1"].to_numpy(), res["volume0"].to_numpy()))
+    res["side"] = np.where(amount0 > 0, 1, -1) # 1 if token0 is bought from the pool
+    return res
+
+
+def v2_swaps(df: pd.DataFrame,
+             *,
+             decimals0: Decimals,
+             decimals1: Decimals,
+             book: Optional["ERC20ContractBook"]=None,
+             invert: bool=False,
+             ) -> pd.DataFrame:
+    """ Trades of Swap(sender, amount0In, amount1In, amount0Out, amount1Out, to)
+    logs of V2 pools: trader (`to`), amount0 and amount1 received by the
+    trader (negative if paid), volume0, volume1, price and side.
+    """
+    d0, d1 = resolve_decimals(decimals0, book), resolve_decimals(decimals1, book)
+    amount0 = (scale_decimals(df["args_amount0Out"], d0) - scale_decimals(df["args_amount0In"], d0)).to_numpy(float)
+    amount1 = (scale_decimals(df["args_amount1Out"], d1) - scale_decimals(df["args_amount1In"], d1)).to_numpy(float)
+    return _trades(df, amount0, amount1, "args_to", invert)
+
+
+def v3_swaps(df: pd.DataFrame,
+             *,
+             decimals0: Decimals,
+             decimals1: Decimals,
+             book: Optional["ERC20ContractBook"]=None,
+             invert: bool=False,
+             ) -> pd.DataFrame:
+    """ Trades of Swap(sender, recipient, amount0, amount1, sqrtPriceX96,
+    liquidity, tick) logs of V3 pools: as `v2_swaps`, with trader
+    (`recipient`), plus pool_price after the swap and tick.
+    """
+    d0, d1 = resolve_decimals(decimals0, book), resolve_decimals(decimals1, book)
+    # amounts of the logs are received by the pool
+    amount0 = -scale_decimals(df["args_amount0"], d0).to_numpy(float)
+    amount1 = -scale_decimals(df["args_amount1"], d1).to_numpy(float)
+    res = _trades(df, amount0, amount1, "args_recipient", invert)
+    res["pool_price"] = sqrt_price_to_price(df["args_sqrtPriceX96"], d0, d1, invert).to_numpy()
+    res["tick"] = df["args_tick"].to_numpy()
+    return res
+
+
+def v2_sync_prices(df: pd.DataFrame,
+                   *,
+                   decimals0: Decimals,
+                   decimals1: Decimals,
+                   book: Optional["ERC20ContractBook"]=None,
+                   invert: bool=False,
+                   ) -> pd.DataFrame:
+    """ Reserves of Sync(reserve0, reserve1) logs of V2 pools in units of
+    the tokens, and pool_price of token0 in token1.
+    """
+    d0, d1 = resolve_decimals(decimals0, book), resolve_decimals(decimals1, book)
+    res = _frame(df)
+    res["reserve0"] = scale_decimals(df["args_reserve0"], d0).to_numpy(float)
+    res["reserve1"] = scale_decimals(df["args_reserve1"], d1).to_numpy(float)
+    res["pool_price"] = (_safe_div(res["reserve0"].to_numpy(), res["reserve1"].to_numpy()) if invert else
+                         _safe_div(res["reserve1"].to_numpy(), res["reserve0"].to_numpy()))
+    return res
+
+
+def liquidity_flows(df_mint: pd.DataFrame,
+                    df_burn: pd.DataFrame,
+                    *,
+                    decimals0: Decimals,
+                    decimals1: Decimals,
+                    book: Optional["ERC20ContractBook"]=None,
+                    ) -> pd.DataFrame:
+    """ Mint and Burn logs of V2 or V3 pools, by block and log index, as
+    amount0 and amount1 added to the pool (negative if removed) and the
+    owner (`owner` of V3, `sender` of V2 Mint and `to` of V2 Burn).
+    """
+    d0, d1 = resolve_decimals(decimals0, book), resolve_decimals(decimals1, book)
+    dfs = []
+    for df, sign, owners in [(df_mint, 1, ["args_owner", "args_sender"]), (df_burn, -1, ["args_owner", "args_to"])]:
+        res = _frame(df)
+        res["owner"] = df[[_ for _ in owners if _ in df.columns][0]].to_numpy()
+        res["amount0"] = sign * scale_decimals(df["args_amount0"], d0).to_numpy(float)
+        res["amount1"] = sign * scale_decimals(df["args_amount1"], d1).to_numpy(float)
+        dfs.append(res)
+    return pd.concat(dfs, ignore_index=True).sort_values(["blockNumber", "logIndex"], ignore_index=True)
+
+
+def ohlcv(trades: pd.DataFrame,
+          freq: Union[int, str, pd.Timedelta],
+          *,
+          price: str="price",
+          invert: bool=False,
+          ) -> pd.DataFrame:
+    """ Bars of `trades`, e.g. of `v3_swaps`, by `freq` blocks if an int,
+    or by `freq` of "timestamp" otherwise (e.g. "5min"): open, high, low,
+    close, volume0, volume1, vwap and n_trades, indexed by the first
+    block or the start time of the bars. Bars without trades are omitted.
+    `invert` is as for the trades, for vwap to be in the unit of the prices.
+    """
+    trades = trades.sort_values(["blockNumber", "logIndex"])
+    if isinstance(freq, (int, np.integer)):
+        assert freq > 0, f"freq {freq} <= 0"
+        bucket = trades["blockNumber"].to_numpy(np.int64) // freq * freq
+        name = "blockNumber"
+    else:
+        assert "timestamp" in trades.columns, "no timestamp column for bars by time; see interpolate_timestamp"
+        bucket = trades["timestamp"].dt.floor(freq).to_numpy()
+        name = "timestamp"
+    bars = trades.groupby(pd.Index(bucket, name=name), sort=True).agg(
+        open=(price, "first"),
+        high=(price, "max"),
+        low=(price, "min"),
+        close=(price, "last"),
+        volume0=("volume0", "sum"),
+        volume1=("volume1", "sum"),
+        n_trades=(price, "size"),
+    )
+    bars["vwap"] = (_safe_div(bars["volume0"].to_numpy(), bars["volume1"].to_numpy()) if invert else
+                    _safe_div(bars["volume1"].to_numpy(), bars["volume0"].to_numpy()))
+    return bars
+
+
+def trader_pnl(trades: pd.DataFrame, *, mark_price: Optional[float]=None, by: str="trader") -> pd.DataFrame:
+    """ Per trader of `trades`: position in token0, cash flow in token1,
+    volume1, n_trades and pnl in token1 of the position marked to
+    `mark_price` in token1 per token0, by default volume1 / volume0 of the
+    last trade, whether prices of `trades` are inverted or not.
+    """
+    if mark_price is None:
+        last = trades.sort_values(["blockNumber", "logIndex"])
+        last = last[last["volume0"] > 0]
+        mark_price = last["volume1"].iloc[-1] / last["volume0"].iloc[-1] if len(last) else np.nan
+    res = trades.groupby(by, sort=False).agg(
+        position=("amount0", "sum"),
+        cash=("amount1", "sum"),
+        volume1=("volume1", "sum"),
+        n_trades=("amount0", "size"),
+    )
+    res["pnl"] = res["cash"] + res["position"] * mark_price
+    return res.sort_values("pnl", ascending=False)
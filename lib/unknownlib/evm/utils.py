@@ -2,15 +2,20 @@
 Some generic utility functions.
 """
 from . import log
-from .core import Web3Connector
+import numpy as np
 import pandas as pd
 import typing
 from hexbytes import HexBytes
+from .core.addr import Addr
+
+if typing.TYPE_CHECKING:
+    from .core import Web3Connector
 
 
 __all__ = [
     "flatten_dict",
     "interpolate_timestamp",
+    "normalize_addresses",
 ]
 
 
@@ -38,7 +43,7 @@ def flatten_dict(d: dict, sep: str="_") -> dict:
     return _flatten_dict_helper(d)
 
 
-def interpolate_timestamp(d: pd.DataFrame, w3: Web3Connector,  block_number_col: str="blockNumber"):
+def interpolate_timestamp(d: pd.DataFrame, w3: "Web3Connector",  block_number_col: str="blockNumber"):
 
     min_block = int(d[block_number_col].min())
     max_block = int(d[block_number_col].max())
@@ -49,4 +54,29 @@ def interpolate_timestamp(d: pd.DataFrame, w3: Web3Connector,  block_number_col:
         d["timestamp"] = stime
     else:
         d["timestamp"] = (etime - stime) / (max_block - min_block) * (d[block_number_col] - min_block) + stime
-    return d
\ No newline at end of file
+    return d
+
+
+def normalize_addresses(s: pd.Series, checksum: bool=True) -> pd.Series:
+    """ Validate and normalize a column of addresses, e.g. from logs.
+    Each distinct address is checksummed once, however often it appears.
+
+    Parameters
+    ----------
+    s : pd.Series
+        Addresses as str ("0x" followed by 40 hex digits in any case) or Addr;
+        missing values (None, NaN) stay None.
+    checksum : bool
+        If True, return checksum addresses; otherwise lowercase.
+    """
+    codes, uniques = pd.factorize(s) # validate and checksum distinct values only
+    addrs = []
+    for u in uniques:
+        try:
+            addrs.append(Addr(u))
+        except ValueError:
+            raise ValueError(f"invalid address {u}")
+    uniques = np.array([_.value if checksum else "0x" + _.raw_bytes.hex() for _ in addrs] + [None], dtype=object)
+    # code -1 of missing values takes the None appended, not the last address
+    codes = np.where(codes < 0, len(addrs), codes)
+    return pd.Series(uniques.take(codes), index=s.index, name=s.name)
@@ -1,17 +1,25 @@
 import os
+import re
 import sys
-import pandas as pd
 from glob import glob
 from pathlib import Path
-from typing import Union, Sequence, Any
+from contextlib import contextmanager
+from typing import Union, Sequence, Any, Iterable, Iterator, Callable, Optional, IO, TYPE_CHECKING
 from . import log
 
+if TYPE_CHECKING:
+    import pandas as pd
+
 
 __all__ = [
     "save_df",
     "collect_df",
     "load_json",
     "dump_json",
+    "atomic_write",
+    "iter_ndjson",
+    "read_ndjson",
+    "write_ndjson",
 ]
 
 
@@ -25,7 +33,7 @@ def make_sure_parent_dir_exists(path: Union[str, Path]) -> Union[str, Path]:
     return path
 
 
-def save_df(df: pd.DataFrame,
+def save_df(df: "pd.DataFrame",
             file: Union[str, Path],
             **kw) -> str:
     """ Write dataframe to csv, creating parent dir if not exists.
@@ -48,9 +56,10 @@ def _repr_seq(s: Sequence, head: int=1, tail: int=1) -> str:
     return r
 
 
-def collect_df(p: str, cores=1, filepath=False, **kw) -> pd.DataFrame:
+def collect_df(p: str, cores=1, filepath=False, **kw) -> "pd.DataFrame":
     """ Read and combine all files that match pattern `p`.
     """
+    import pandas as pd
     if isinstance(p, str):
         p = [p]
     else:
@@ -81,16 +90,137 @@ def collect_df(p: str, cores=1, filepath=False, **kw) -> pd.DataFrame:
     return df
 
 
+_wide_int = re.compile(rb"\d{20,}") # may not fit in 64 bits
+
+
+def _loads() -> Callable[[bytes], Any]:
+    """ JSON of a line, by orjson if installed; lines with integers that
+    may be wider than 64 bits (which orjson parses as floats) by json.
+    """
+    import json
+    try:
+        import orjson
+    except ImportError:
+        return json.loads
+    return lambda line: json.loads(line) if _wide_int.search(line) else orjson.loads(line)
+
+
+def _dumps(default: Optional[Callable[[Any], Any]]=None) -> Callable[[Any], bytes]:
+    """ One-line JSON of an object, as bytes, by orjson if installed; objects
+    orjson rejects (e.g. integers wider than 64 bits, non-str keys) by json.
+    """
+    import json
+
+    def default_(obj: Any) -> Any:
+        if type(obj).__module__ == "numpy": # as orjson
+            return obj.tolist()
+        if default is None:
+            raise TypeError(f"{type(obj)} is not JSON serializable")
+        return default(obj)
+
+    def dumps(obj: Any) -> bytes:
+        return json.dumps(obj, default=default_, separators=(",", ":")).encode()
+
+    try:
+        import orjson
+    except ImportError:
+        return dumps
+
+    def dumps_fast(obj: Any) -> bytes:
+        try:
+            return orjson.dumps(obj, default=default, option=orjson.OPT_SERIALIZE_NUMPY)
+        except TypeError:
+            return dumps(obj)
+
+    return dumps_fast
+
+
+def _open(path: Union[Path, str], mode: str) -> IO[bytes]:
+    """ A binary file, compressed if `path` ends with ".gz" or ".zst". """
+    path = str(path)
+    if path.endswith(".gz"):
+        import gzip
+        return gzip.open(path, mode)
+    if path.endswith(".zst") or path.endswith(".zstd"):
+        import zstandard
+        return zstandard.open(path, mode)
+    return open(path, mode)
+
+
+@contextmanager
+def atomic_write(path: Union[Path, str], mode: str="wb") -> Iterator[IO]:
+    """ A file to write `path` with, compressed as by its extension, which
+    replaces `path` only once fully written; on error, `path` is untouched.
+    """
+    path = str(make_sure_parent_dir_exists(path))
+    tmp = f"{path}.tmp{os.getpid()}"
+    # the temp file keeps the extension to compress the same way
+    tmp = tmp + "".join(Path(path).suffixes[-1:])
+    try:
+        with _open(tmp, mode) as f:
+            yield f
+        # on disk before it replaces `path`
+        fd = os.open(tmp, os.O_RDWR)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+        os.replace(tmp, path)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+
+
+def iter_ndjson(f_: Union[Path, str]) -> Iterator[Any]:
+    """ Records of a line-delimited JSON file, one at a time; ".gz" and
+    ".zst" files are decompressed on the fly.
+    """
+    loads = _loads()
+    with _open(f_, "rb") as f:
+        for line in f:
+            if line.strip():
+                yield loads(line)
+
+
+def read_ndjson(f_: Union[Path, str]) -> list:
+    log.info(f"reading {f_}")
+    return list(iter_ndjson(f_))
+
+
+def write_ndjson(records: Iterable[Any],
+                 f_: Union[Path, str],
+                 *,
+                 append: bool=False,
+                 default: Optional[Callable[[Any], Any]]=None,
+                 ) -> int:
+    """ Write `records`, e.g. a generator, to a line-delimited JSON file,
+    compressed as by its extension, and return the number of records.
+    The file is replaced atomically, or appended to with `append`.
+    `default` converts objects that are not JSON types, e.g. `str`.
+    """
+    dumps = _dumps(default)
+    n = 0
+    if append:
+        out = _open(make_sure_parent_dir_exists(f_), "ab")
+    else:
+        out = atomic_write(f_)
+    with out as f:
+        for record in records:
+            f.write(dumps(record) + b"\n")
+            n += 1
+    log.info(f"{n} records written to {f_}")
+    return n
+
+
 def load_json(f_: Union[Path, str]) -> Any:
     import json
     log.info(f"reading {f_}")
-    with open(str(f_), "r") as f:
+    with _open(f_, "rb") as f:
         return json.load(f)
 
 
 def dump_json(j: Union[list, dict], f_: Union[Path, str]):
     import json
     log.info(f"writing {f_}")
-    f_ = make_sure_parent_dir_exists(f_)
-    with open(str(f_), "w") as f:
-        json.dump(j, f, indent=4)
\ No newline at end of file
+    with atomic_write(f_, "wb") as f:
+        f.write(json.dumps(j, indent=4).encode())
\ No newline at end of file
@@ -1,13 +1,27 @@
+import sys
+import numpy as np
 import pandas as pd
 from typing import Union, List, Optional, Tuple
 from bokeh.io import output_notebook
 from bokeh.resources import INLINE
+from bokeh.models import ColumnDataSource, Span
 from bokeh.plotting import figure, gridplot
 from bokeh.plotting import show as _show
-from pandas.api.types import is_string_dtype
 from bokeh.palettes import Set1
+from .downsample import downsample
 
-output_notebook(INLINE)
+_notebook_initialized = False
+
+
+def _show_figure(p):
+    """ Show `p`, setting bokeh output to the notebook on first call in
+    a notebook, instead of as a side effect of importing this module.
+    """
+    global _notebook_initialized
+    if not _notebook_initialized and "ipykernel" in sys.modules:
+        output_notebook(INLINE)
+        _notebook_initialized = True
+    _show(p)
 
 
 def _colors(n: int) -> List[str]:
@@ -26,6 +40,40 @@ def parse_str_list(s: _StrListLike, sep=",") -> List[str]:
         raise TypeError(type(s))
 
 
+def _to_numpy(s: pd.Series) -> np.ndarray:
+    """ Datetimes are converted to tz-naive UTC, which bokeh takes natively.
+    """
+    if isinstance(s.dtype, pd.DatetimeTZDtype):
+        s = s.dt.tz_convert(None)
+    return s.to_numpy()
+
+
+def _as_float(a: np.ndarray) -> np.ndarray:
+    if np.issubdtype(a.dtype, np.datetime64) or np.issubdtype(a.dtype, np.timedelta64):
+        return a.view(np.int64).astype(float)
+    return a.astype(float)
+
+
+def _decimate(x: np.ndarray,
+              y: np.ndarray,
+              max_points: Optional[int],
+              method: str,
+              ) -> Tuple[np.ndarray, np.ndarray]:
+    """ Downsample (x, y) to at most `max_points` points, sorted by x.
+    """
+    if max_points is None or len(x) <= max_points:
+        return x, y
+    xf, yf = _as_float(x), _as_float(y)
+    keep = ~np.isnan(yf)
+    if not keep.all():
+        x, y, xf, yf = x[keep], y[keep], xf[keep], yf[keep]
+    if not np.all(xf[1:] >= xf[:-1]):
+        order = np.argsort(xf, kind="stable")
+        x, y, xf, yf = x[order], y[order], xf[order], yf[order]
+    idx = downsample(xf, yf, max_points, method=method)
+    return x[idx], y[idx]
+
+
 def plot(df: pd.DataFrame,
          *,
          x: str,
@@ -38,30 +86,31 @@ def plot(df: pd.DataFrame,
          title: Optional[str]=None,
          show: bool=True,
          tools: str="pan,reset,wheel_zoom,box_zoom,save",
+         max_points: Optional[int]=10_000,
+         downsample_method: str="lttb",
          ):
-
+    """
+    Parameters
+    ----------
+    max_points : int | None
+        Max number of points plotted per hue; longer series are downsampled.
+        None to plot all points.
+    downsample_method : str
+        "lttb" (shape-preserving, for lines) or "minmax" (keeps every
+        extreme, for scatters).
+    """
     if isinstance(y, list):
         assert hue is None
-        df = pd.melt(df,
-                     id_vars=x,
-                     value_vars=y,
-                     var_name=" variable",
-                     value_name=" value",
-                     )
-        y = " value"
-        hue = " variable"
+        series = [(y_, df[x], df[y_]) for y_ in y]
+        if title is None:
+            title = ", ".join(y)
+    elif hue is None:
+        series = [(y, df[x], df[y])]
     else:
-        df = df.copy()
-    
-    if hue is None:
-        df["dummy"] = y
-        hue = "dummy"
-
-    if not is_string_dtype(df[hue]):
-        df[hue] = df[hue].astype(str)
+        series = [(str(hue_), df_hue[x], df_hue[y])
+                  for hue_, df_hue in df.groupby(hue, sort=False, dropna=False)]
 
-    unique_hues = df[hue].unique()
-    palette = _colors(len(unique_hues))
+    palette = _colors(len(series))
 
     w, h = figsize
     if title is None:
@@ -73,22 +122,22 @@ def plot(df: pd.DataFrame,
     p.toolbar.active_scroll = None
 
     line_types = parse_str_list(line_types, sep=",")
-    for color, hue_ in zip(palette, unique_hues):
+    for color, (legend_label, x_, y_) in zip(palette, series):
 
-        legend_label = hue_
-        df_hue = df[df[hue] == hue_].copy()
+        xs, ys = _decimate(_to_numpy(x_), _to_numpy(y_), max_points, downsample_method)
+        source = ColumnDataSource(data={"x": xs, "y": ys})
         for line_type in line_types:
             line_func = getattr(p, line_type)
-            line_func(df_hue[x], df_hue[y], color=color, legend_label=legend_label)
-    
+            line_func("x", "y", source=source, color=color, legend_label=legend_label)
+
     for hl in hlines:
-        p.line(df_hue[x], hl, color="black", line_dash="dashed")
+        p.add_layout(Span(location=hl, dimension="width", line_color="black", line_dash="dashed"))
 
     for vl in vlines:
-        p.line(df_hue[vl], hl, color="black", line_dash="dashed")
+        p.add_layout(Span(location=vl, dimension="height", line_color="black", line_dash="dashed"))
 
     if show is True:
-        _show(p)
+        _show_figure(p)
 
     return p
 
@@ -114,5 +163,5 @@ def tsplot(df,
         years="%Y", months="%Y%m", days="%Y%m%d",
         hours="%Y%m%d %Hh", minutes="%Y%m%d-%H:%M")
     if show is True:
-        _show(p)
+        _show_figure(p)
     return p
\ No newline at end of file
@@ -0,0 +1,72 @@
+"""
+Decimation of series for plotting.
+Each function returns the sorted indices of the points to keep.
+"""
+import numpy as np
+
+
+__all__ = [
+    "lttb",
+    "minmax",
+    "downsample",
+]
+
+
+def lttb(x: np.ndarray, y: np.ndarray, n_out: int) -> np.ndarray:
+    """ Largest-Triangle-Three-Buckets.
+    Keep the first and last points, and from each of the `n_out - 2` buckets
+    in between, the point that forms the largest triangle with the point kept
+    from the previous bucket and the average of the next bucket.
+    `x` is expected to be sorted.
+    """
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64) # n_out - 2 buckets over [1, n-1)
+    idx = np.empty(n_out, dtype=np.int64)
+    idx[0] = 0
+    idx[-1] = n - 1
+    a = 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        if i < n_out - 3:
+            next_lo, next_hi = edges[i + 1], edges[i + 2]
+        else:
+            next_lo, next_hi = n - 1, n
+        avg_x = x[next_lo:next_hi].mean()
+        avg_y = y[next_lo:next_hi].mean()
+        area = np.abs((x[a] - avg_x) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (avg_y - y[a]))
+        a = lo + int(np.argmax(area))
+        idx[i + 1] = a
+    return idx
+
+
+def minmax(x: np.ndarray, y: np.ndarray, n_out: int) -> np.ndarray:
+    """ Keep the min and the max of each of `n_out // 2` equal-count buckets.
+    Unlike lttb, every extreme is preserved; better for scatter plots.
+    `x` is expected to be sorted.
+    """
+    n = len(y)
+    n_buckets = n_out // 2
+    if n_out >= n or n_buckets < 1:
+        return np.arange(n)
+    bucket = np.arange(n) * n_buckets // n # sorted
+    order = np.lexsort((y, bucket)) # by bucket, then y
+    starts = np.searchsorted(bucket, np.arange(n_buckets))
+    ends = np.append(starts[1:], n) - 1
+    return np.unique(np.concatenate([order[starts], order[ends]]))
+
+
+_methods = {
+    "lttb": lttb,
+    "minmax": minmax,
+}
+
+
+def downsample(x: np.ndarray, y: np.ndarray, max_points: int, method: str="lttb") -> np.ndarray:
+    """ Indices of at most `max_points` points to plot.
+    """
+    assert method in _methods, f"{method} is not one of {list(_methods.keys())}"
+    return _methods[method](x, y, max_points)
@@ -0,0 +1,163 @@
+"""
+Live-updating charts served by a local bokeh server.
+
+New points are appended with ColumnDataSource.stream, so browsers update
+in place instead of re-rendering the figure.
+
+Examples
+--------
+>>> chart = StreamingChart(x="time", y=["price"], rollover=5000)
+>>> chart.serve(port=5006) # open http://localhost:5006
+>>> chart.push({"time": [pd.Timestamp.utcnow()], "price": [1.0]})
+"""
+import asyncio
+import socket
+import threading
+from collections import deque
+from functools import partial
+from typing import Dict, List, Optional, Tuple, Union
+import pandas as pd
+from bokeh.document import Document
+from bokeh.models import ColumnDataSource, DatetimeTickFormatter
+from bokeh.palettes import Set1
+from bokeh.plotting import figure
+from .. import log
+
+
+__all__ = [
+    "StreamingChart",
+]
+
+
+class StreamingChart:
+    """ A chart of one or more y columns against x, fed by `push`.
+    Each browser session gets its own document, seeded with the latest
+    `rollover` points; pushes are then streamed to every open session.
+    """
+
+    _x: str
+    _y: List[str]
+    _rollover: int
+    _buffer: Dict[str, deque]
+    _docs: Dict[Document, ColumnDataSource]
+    _lock: threading.Lock
+    _server = None
+    _thread: Optional[threading.Thread] = None
+
+    def __init__(self,
+                 *,
+                 x: str,
+                 y: Union[str, List[str]],
+                 rollover: int=10_000,
+                 line_types: str="line",
+                 title: Optional[str]=None,
+                 figsize: Tuple[float]=(800, 500),
+                 datetime_x: bool=True,
+                 ):
+        self._x = x
+        self._y = [y] if isinstance(y, str) else list(y)
+        assert len(self._y) <= 8, f"{len(self._y)} > 8 is not supported"
+        self._rollover = rollover
+        self._line_types = line_types.split(",")
+        self._title = title or ", ".join(self._y)
+        self._figsize = figsize
+        self._datetime_x = datetime_x
+        self._buffer = {k: deque(maxlen=rollover) for k in [x] + self._y}
+        self._docs = {}
+        self._lock = threading.Lock()
+
+    @property
+    def columns(self) -> List[str]:
+        return [self._x] + self._y
+
+    def make_doc(self, doc: Document):
+        """ Build the figure of a new session; the bokeh app handler.
+        """
+        with self._lock:
+            source = ColumnDataSource(data={k: list(v) for k, v in self._buffer.items()})
+            self._docs[doc] = source
+        w, h = self._figsize
+        p = figure(title=self._title, width=w, height=h,
+                   tools="pan,reset,wheel_zoom,box_zoom,save",
+                   x_axis_type="datetime" if self._datetime_x else "linear")
+        if self._datetime_x:
+            p.xaxis.formatter = DatetimeTickFormatter(
+                years="%Y", months="%Y%m", days="%Y%m%d",
+                hours="%Y%m%d %Hh", minutes="%Y%m%d-%H:%M")
+        for color, y in zip(Set1[8], self._y):
+            for line_type in self._line_types:
+                getattr(p, line_type)(self._x, y, source=source, color=color, legend_label=y)
+        doc.add_root(p)
+        doc.on_session_destroyed(lambda _: self._docs.pop(doc, None))
+
+    def push(self, data: Dict[str, list]):
+        """ Append points; `data` maps every column to a list of equal length.
+        Safe to call from any thread.
+        """
+        assert set(data.keys()) == set(self.columns), f"expected columns {self.columns}, got {list(data.keys())}"
+        data = {k: list(v) for k, v in data.items()}
+        if self._datetime_x: # bokeh datetime axes take ms since epoch
+            ts = pd.DatetimeIndex(pd.to_datetime(data[self._x]))
+            if ts.tz is not None:
+                ts = ts.tz_convert(None)
+            data[self._x] = list((ts - pd.Timestamp(0)) / pd.Timedelta("1ms"))
+        with self._lock:
+            for k, v in data.items():
+                self._buffer[k].extend(v)
+            docs = list(self._docs.items())
+        for doc, source in docs:
+            doc.add_next_tick_callback(partial(source.stream, data, self._rollover))
+
+    def push_df(self, df: pd.DataFrame):
+        """ Append the rows of `df`, e.g. newly polled logs.
+        """
+        self.push({k: df[k].to_numpy() for k in self.columns})
+
+    def serve(self, port: int=5006, show: bool=False) -> int:
+        """ Start a bokeh server in a background thread, and return its port:
+        `port`, or a free one if 0. Raise OSError if the port is taken.
+        """
+        from bokeh.application import Application
+        from bokeh.application.handlers.function import FunctionHandler
+        from bokeh.server.server import Server
+        from tornado.ioloop import IOLoop
+        if port == 0: # pick a free port, for websocket origins to be known
+            with socket.socket() as sock:
+                sock.bind(("", 0))
+                port = sock.getsockname()[1]
+        started = threading.Event()
+        errors = []
+
+        def _run():
+            try:
+                asyncio.set_event_loop(asyncio.new_event_loop())
+                self._server = Server(
+                    {"/": Application(FunctionHandler(self.make_doc))},
+                    io_loop=IOLoop.current(),
+                    port=port,
+                    allow_websocket_origin=[f"localhost:{port}", f"127.0.0.1:{port}"])
+                self._server.start()
+            except Exception as e:
+                self._server = None
+                errors.append(e)
+                return
+            finally:
+                started.set()
+            self._server.io_loop.start()
+
+        self._thread = threading.Thread(target=_run, daemon=True)
+        self._thread.start()
+        started.wait()
+        if errors:
+            self._thread.join()
+            raise errors[0]
+        log.info(f"serving streaming chart at http://localhost:{port}/")
+        if show:
+            self._server.io_loop.add_callback(self._server.show, "/")
+        return port
+
+    def stop(self):
+        if self._server is not None:
+            self._server.io_loop.add_callback(self._server.io_loop.stop)
+            self._thread.join()
+            self._server = None
@@ -1,2 +1,12 @@
-from .element import *
-from .logging import log
\ No newline at end of file
+from . import element
+from .element.base import * # the built-in elements of element.__all__ are lazy, below
+from .logging import log
+from .._lazy import lazy_getattr
+
+
+# built-in elements and the profiler are imported on first use
+__all__ = element.__all__ + ["log", "ElementProfiler"]
+__getattr__ = lazy_getattr(__name__, {
+    **{k: ".element" for k in element._builtin_element_modules},
+    "ElementProfiler": ".profiling",
+})
@@ -1,7 +1,33 @@
+"""
+Built-in elements are imported on first use, either by attribute access,
+e.g. `from unknownlib.scheme.element import Serializer`, or by type name
+in a config, e.g. "serializer".
+"""
 from .base import *
-from .logger import *
-from .scheduler import *
-from .boobook import *
-from .serializer import *
-from .executor import *
-from .optimizer import *
\ No newline at end of file
+from .base import __all__ as _base_all, snake_case
+from ..._lazy import lazy_getattr
+
+
+_builtin_element_modules = {
+    "Logger": ".logger",
+    "Scheduler": ".scheduler",
+    "SimpleScheduler": ".scheduler",
+    "FreqScheduler": ".scheduler",
+    "Boobook": ".boobook",
+    "Serializer": ".serializer",
+    "Executor": ".executor",
+    "Optimizer": ".optimizer",
+    "Profiler": ".profiler",
+    "LiveChart": ".live_chart",
+}
+
+for _class_name, _module_name in _builtin_element_modules.items():
+    ElementCatalog.register_lazy_element_type(
+        snake_case(_class_name), f"{__name__}{_module_name}:{_class_name}")
+
+__all__ = _base_all + list(_builtin_element_modules)
+__getattr__ = lazy_getattr(__name__, _builtin_element_modules)
+
+
+def __dir__():
+    return sorted(list(globals().keys()) + list(_builtin_element_modules.keys()))
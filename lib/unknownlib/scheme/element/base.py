@@ -1,6 +1,13 @@
 from ..logging import log
+from ...io import make_sure_parent_dir_exists
+import os
 import re
-from typing import Optional, Dict, Any, Self, Union
+import pickle
+from importlib import import_module
+from typing import Optional, Dict, Any, Self, Union, List, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from ..profiling import ElementProfiler
 
 
 __all__ = [
@@ -10,6 +17,12 @@ __all__ = [
 ]
 
 
+def snake_case(s: str) -> str:
+    """ E.g., "SimpleScheduler" -> "simple_scheduler".
+    """
+    return re.sub(r'(?<!^)(?=[A-Z])', '_', s).lower()
+
+
 class Element:
     """ The basic class and building block of the scheme.
     """
@@ -40,6 +53,13 @@ class Element:
         """ A portal to refer to other elements. """
         return self._manager.get_element_by_type(type_)
 
+    def resolve_peers(self):
+        """ Look up other elements and keep the handles, instead of looking
+        them up at every calc. This is called for all elements before any
+        `init`, so the handles can already be used in `init`.
+        """
+        pass
+
     def init(self):
         """ Initialize the element. Typically an element parses its parameters,
         initialize its member variables, etc.
@@ -62,59 +82,149 @@ class Element:
         """
         raise NotImplementedError(s)
 
+    def get_state(self) -> Optional[Dict[str, Any]]:
+        """ The in-memory state to checkpoint, which must be picklable.
+        None (default) means the element is stateless and is not checkpointed.
+        """
+        return None
+
+    def set_state(self, state: Dict[str, Any]):
+        """ Restore from a state returned by `get_state`.
+        This is called after `init`, when resuming from a checkpoint.
+        """
+        raise NotImplementedError(f"`set_state` is not implemented for {self.__class__}")
+
     @classmethod
     def type_name(cls) -> str:
         """ A string that represent the class.
         By default, the name is the class name snake-casified.
         E.g., class "SimpleScheduler" -> type_name "simple_scheduler".
         """
-        return re.sub(r'(?<!^)(?=[A-Z])', '_', cls.__name__).lower()
+        return snake_case(cls.__name__)
 
 
 class ElementCatalog:
     """ A class that maintains a mapping from type names to types, e.g.,
     "scheduler" -> Scheduler
     "optimizer" -> Optimizer
+
+    A type can be registered either eagerly by `register_element_type` (also
+    usable as a class decorator), or lazily by the "module:ClassName" path by
+    `register_lazy_element_type` or the "unknownlib.scheme.elements" entry
+    points, in which case the module is only imported when the type is used.
     """
 
     _catalog: Dict[str, type] = {}
+    _lazy_catalog: Dict[str, str] = {}
+    _entry_point_group: str = "unknownlib.scheme.elements"
+    _entry_points_loaded: bool = False
 
     @classmethod
-    def register_element_type(cls, type_: type):
+    def register_element_type(cls, type_: type) -> type:
         type_name = type_.type_name()
-        assert type_name not in cls._catalog, "type {type_name} is already registered!"
-        log.info(f"registered: name = {type_name}, type = {type_}")
+        assert cls._catalog.get(type_name, type_) is type_, f"type {type_name} is already registered!"
+        log.debug(f"registered: name = {type_name}, type = {type_}")
         cls._catalog[type_name] = type_
+        return type_
+
+    @classmethod
+    def register_lazy_element_type(cls, type_name: str, path: str):
+        """ Register "module:ClassName" to be imported on first use of `type_name`.
+        """
+        cls._lazy_catalog[type_name] = path
+
+    @classmethod
+    def register_entry_points(cls):
+        """ Lazily register types declared by installed packages, e.g. in pyproject.toml:
+        [project.entry-points."unknownlib.scheme.elements"]
+        my_optimizer = "mypkg.optimizer:MyOptimizer"
+        """
+        from importlib.metadata import entry_points
+        for ep in entry_points(group=cls._entry_point_group):
+            cls.register_lazy_element_type(ep.name, ep.value)
+        cls._entry_points_loaded = True
+
+    @staticmethod
+    def search_subclasses(type_: type) -> List[type]:
+        """ All subclasses of `type_`, each once, in depth-first order.
+        """
+        res = []
+        seen = set()
+        stack = list(reversed(type_.__subclasses__()))
+        while stack:
+            t = stack.pop()
+            if t in seen:
+                continue
+            seen.add(t)
+            res.append(t)
+            stack.extend(reversed(t.__subclasses__()))
+        return res
 
     @classmethod
     def register_all_element_types(cls):
-        """ Recursively find and register all subclasses of Element.
-        This should be called before building a scheme.
+        """ Find and register all imported subclasses of Element.
+        Not required before building a scheme, since `get_element_type`
+        falls back to it, but still useful to reset the catalog.
         """
         cls._catalog = {} # reset
-        def search_subclasses(cls):
-            return cls.__subclasses__() + sum(
-                [search_subclasses(_) for _ in cls.__subclasses__()], [])
-        all_element_types = search_subclasses(Element)
-        for type_ in all_element_types:
+        for type_ in cls.search_subclasses(Element):
             cls.register_element_type(type_)
 
     @classmethod
     def get_element_type(cls, type_name: str) -> type:
         """ Find the type (aka subclass of Element) given a type name.
+        Look up registered types first, then lazily registered types and
+        entry points, and finally subclasses of Element imported so far.
         """
-        assert type_name in cls._catalog, f"{type_name} is not found in {list(cls._catalog.keys())}"
+        if type_name in cls._catalog:
+            return cls._catalog[type_name]
+        if type_name not in cls._lazy_catalog and not cls._entry_points_loaded:
+            cls.register_entry_points()
+        if type_name in cls._lazy_catalog:
+            module_name, class_name = cls._lazy_catalog[type_name].split(":")
+            log.info(f"importing {class_name} from {module_name} for {type_name}")
+            type_ = getattr(import_module(module_name), class_name)
+            assert type_.type_name() == type_name, f"{type_} has type name {type_.type_name()}, expected {type_name}"
+            return cls.register_element_type(type_)
+        for type_ in cls.search_subclasses(Element):
+            if type_.type_name() not in cls._catalog:
+                cls.register_element_type(type_)
+        assert type_name in cls._catalog, f"{type_name} is not found in {sorted(set(cls._catalog) | set(cls._lazy_catalog))}"
         return cls._catalog[type_name]
-    
+
 
 class ElementManager:
     """ A central entiry that creates, initializes and triggers element.
     """
     
-    _elements: Dict[str, type]
+    _elements: Dict[str, Element]
+    _elements_by_type: Dict[type, List[Element]]
+    _profiler: Optional["ElementProfiler"]
+    _checkpoint_file: Optional[str]
+    _checkpoint_every: int
+    _tick_count: int
 
     def __init__(self) -> None:
         self._elements = {}
+        self._elements_by_type = {}
+        self._profiler = None
+        self._checkpoint_file = None
+        self._checkpoint_every = 100
+        self._tick_count = 0
+
+    def enable_profiling(self, **kw) -> "ElementProfiler":
+        """ Record the time spent by every element in every phase from now on.
+        Keyword arguments are passed to ElementProfiler.
+        """
+        from ..profiling import ElementProfiler
+        if self._profiler is None:
+            self._profiler = ElementProfiler(**kw)
+            log.info("element profiling is enabled")
+        return self._profiler
+
+    @property
+    def profiler(self) -> Optional["ElementProfiler"]:
+        return self._profiler
     
     def create_element(self, name: str, params: Dict[str, Any]):
         """ Create an element with given name and parameters.
@@ -125,6 +235,8 @@ class ElementManager:
         e = type_(name, params)
         e.set_manager(self)
         self._elements[name] = e
+        for t in type_.__mro__: # index by all base classes for `get_element_by_type`
+            self._elements_by_type.setdefault(t, []).append(e)
 
     def get_element_by_name(self, name: str) -> Element:
         """ Get the unique element that has the given name.
@@ -134,7 +246,7 @@ class ElementManager:
     def get_element_by_type(self, type_: type) -> Element:
         """ Get the unique element that match the given type.
         """
-        es = [e for _, e in self.iter_elements() if isinstance(e, type_)]
+        es = self._elements_by_type.get(type_, [])
         assert len(es) == 1, f"found {len(es)} elements of type {type_}; expected 1."
         return es[0]
 
@@ -145,22 +257,82 @@ class ElementManager:
             yield n, e
     
     def init_elements(self):
-        """ Initialize all elements sequentially.
+        """ Resolve peers of all elements, then initialize all elements sequentially.
         """
         for _, e in self.iter_elements():
-            e.init()
+            e.resolve_peers()
+        if self._profiler is None:
+            for _, e in self.iter_elements():
+                e.init()
+        else:
+            for n, e in self.iter_elements():
+                self._profiler.call(n, "init", e.init)
     
     def calc_elements(self, time: int):
         """ Calc all elements sequentially.
         """
-        for _, e in self.iter_elements():
-            e.calc(time)
+        if self._profiler is None:
+            for _, e in self.iter_elements():
+                e.calc(time)
+        else:
+            self._profiler.start_tick()
+            for n, e in self.iter_elements():
+                self._profiler.call(n, "calc", e.calc, time)
+            self._profiler.end_tick()
+        if self._checkpoint_file is not None:
+            self._tick_count += 1
+            if self._tick_count % self._checkpoint_every == 0:
+                self.checkpoint(self._checkpoint_file)
     
     def done_elements(self):
         """ Finish up all elements sequentially.
         """
-        for _, e in self.iter_elements():
-            e.done()
+        if self._profiler is None:
+            for _, e in self.iter_elements():
+                e.done()
+        else:
+            for n, e in self.iter_elements():
+                self._profiler.call(n, "done", e.done)
+
+    def enable_checkpoint(self, filename: str, every: int=100):
+        """ Checkpoint the states of all elements to `filename` after every
+        `every` rounds of calc. States such as the rows of a Serializer grow
+        with the rounds, and are written whole each time: checkpointing every
+        round would be quadratic.
+        """
+        self._checkpoint_file = filename
+        self._checkpoint_every = every
+        log.info(f"checkpointing to {filename} every {every} calc rounds")
+
+    def checkpoint(self, filename: str):
+        """ Write states of all stateful elements to `filename` atomically,
+        i.e. the file is either the previous or the new checkpoint, never partial.
+        """
+        states = {}
+        for n, e in self.iter_elements():
+            state = e.get_state()
+            if state is not None:
+                states[n] = state
+        make_sure_parent_dir_exists(filename)
+        tmp_file = f"{filename}.tmp"
+        with open(tmp_file, "wb") as f:
+            pickle.dump(states, f, protocol=pickle.HIGHEST_PROTOCOL)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_file, filename)
+        log.debug(f"checkpointed {list(states.keys())} to {filename}")
+
+    def restore(self, filename: str):
+        """ Set states of elements from a checkpoint written by `checkpoint`.
+        Elements must be initialized already.
+        """
+        log.info(f"restoring from {filename}")
+        with open(filename, "rb") as f:
+            states = pickle.load(f)
+        for n, state in states.items():
+            assert n in self._elements, f"{n} in checkpoint is not found in elements {list(self._elements.keys())}"
+            self._elements[n].set_state(state)
+            log.info(f"restored {n}")
 
 
 class ElementParams:
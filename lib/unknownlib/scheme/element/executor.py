@@ -5,8 +5,16 @@ from .optimizer import Optimizer
 
 
 class Executor(Element):
-    
-    def calc(self):
 
-        side, qty = self.get_element_by_type(Optimizer).get_order()
-        pass
\ No newline at end of file
+    _optimizer: Optimizer
+
+    def resolve_peers(self):
+        self._optimizer = self.get_element_by_type(Optimizer)
+
+    def init(self):
+        pass
+
+    def calc(self, time):
+
+        side, qty = self._optimizer.get_order()
+        pass
@@ -0,0 +1,53 @@
+from ..logging import log
+from .base import Element
+from typing import List, Tuple
+
+
+__all__ = [
+    "LiveChart"
+]
+
+
+class LiveChart(Element):
+    """ Stream variables to a live chart served by a local bokeh server,
+    updated in place at every calc.
+
+    Params
+    ------
+    vars : list
+        Like Serializer, e.g. ["booboobook.price"].
+    port : int
+        Default 5006.
+    rollover : int
+        Number of latest points kept in the chart. Default 10000.
+    datetime_x : bool
+        Whether calc times are timestamps. Default True.
+    """
+
+    _snaps: List[Tuple[str, Element, str]] # (var, element, field)
+
+    def resolve_peers(self):
+        self._snaps = []
+        for var in self._params["vars"]:
+            elem_name, field = var.split(".")
+            self._snaps.append((var, self.get_element_by_name(elem_name), field))
+
+    def init(self):
+        from ...plt.stream import StreamingChart
+        self._chart = StreamingChart(
+            x="time",
+            y=self._params["vars"],
+            rollover=self._params.get("rollover", 10_000),
+            title=self._name,
+            datetime_x=self._params.get("datetime_x", True))
+        self._chart.serve(port=self._params.get("port", 5006))
+
+    def calc(self, time):
+        data = {"time": [time]}
+        for var, elem, field in self._snaps:
+            data[var] = [elem.field(field)]
+        self._chart.push(data)
+
+    def done(self):
+        self._chart.stop()
+        log.info(f"{self._name} done.")
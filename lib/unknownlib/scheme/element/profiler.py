@@ -0,0 +1,79 @@
+from ..logging import log
+from .base import Element
+from ...io import save_df
+from typing import Optional
+import pandas as pd
+
+
+__all__ = [
+    "Profiler"
+]
+
+
+class Profiler(Element):
+    """ Enable timing instrumentation of all elements and log periodic summaries.
+
+    Params
+    ------
+    freq : int
+        Log a summary every `freq` ticks. Default 100.
+    deadline : str | None
+        Parsable by pd.Timedelta, e.g. the freq of a FreqScheduler. A warning
+        naming the slowest element is logged for every tick slower than this.
+    output_file : str | None
+        If set, the per-element stats are written to this csv at the end.
+    cprofile_element : str | None
+        Name of an element whose `calc` is run under cProfile.
+    cprofile_file : str | None
+        Where to dump the cProfile stats; required with `cprofile_element`.
+    """
+
+    _freq: int
+    _deadline: Optional[float]
+    _last_checked_tick: int
+
+    def set_manager(self, manager):
+        # enable profiling at creation, so that `init` of all elements is covered
+        super().set_manager(manager)
+        manager.enable_profiling()
+
+    @property
+    def profiler(self):
+        return self._manager.profiler
+
+    def init(self):
+        self._freq = int(self._params.get("freq", 100))
+        deadline = self._params.get("deadline")
+        self._deadline = pd.Timedelta(deadline).total_seconds() if deadline else None
+        self._last_checked_tick = 0
+        if self._params.get("cprofile_element"):
+            assert self._params.get("cprofile_file"), "cprofile_file is required with cprofile_element"
+            self.profiler.set_cprofile_element(self._params["cprofile_element"])
+
+    def calc(self, time):
+        # the current tick is still running; look at the last completed one
+        n = self.profiler.tick_count
+        if n == self._last_checked_tick:
+            return
+        self._last_checked_tick = n
+        latency = self.profiler.last_tick_latency
+        if self._deadline is not None and latency > self._deadline:
+            walls = self.profiler.last_tick_walls
+            slowest = max(walls, key=walls.get)
+            log.warning(f"tick {n} took {latency:.6f}s > deadline {self._deadline}s; "
+                        f"slowest element: {slowest} ({walls[slowest]:.6f}s)")
+        if n % self._freq == 0:
+            self.log_summary()
+
+    def log_summary(self):
+        s = self.profiler.tick_summary()
+        log.info(f"ticks: {s['n']}, latency p50: {s['p50']:.6f}s, "
+                 f"p99: {s['p99']:.6f}s, max: {s['max']:.6f}s\n"
+                 f"{self.profiler.to_df().to_string()}")
+
+    def done(self):
+        self.log_summary()
+        if self._params.get("output_file"):
+            save_df(self.profiler.to_df(), self._params["output_file"], index=False)
+        if self._params.get("cprofile_element"):
+            self.profiler.dump_cprofile(self._params["cprofile_file"])
@@ -26,6 +26,8 @@ class Scheduler(Element):
 
 class SimpleScheduler(Scheduler):
 
+    _last_time: int = None
+
     def init(self):
         self._calc_times = range(
             self._params["start"],
@@ -34,9 +36,18 @@ class SimpleScheduler(Scheduler):
 
     def schedule(self) -> int:
         for time_ in self._calc_times:
+            if self._last_time is not None and time_ <= self._last_time:
+                continue # already calculated before resuming
             log.info(f"scheduling calc time {time_}")
+            self._last_time = time_
             yield time_
 
+    def get_state(self) -> dict:
+        return {"last_time": self._last_time}
+
+    def set_state(self, state: dict):
+        self._last_time = state["last_time"]
+
 
 class FreqScheduler(Scheduler):
 
@@ -64,6 +75,14 @@ class FreqScheduler(Scheduler):
             self._end = pd.to_datetime(self._params["end"])
         log.info(f"start: {self._start}, end: {self._end}")
 
+    def get_state(self) -> dict:
+        return {"cur_time": self._cur_time, "end": self._end}
+
+    def set_state(self, state: dict):
+        self._cur_time = state["cur_time"]
+        self._end = state["end"]
+        log.info(f"resuming from {self._cur_time}, end: {self._end}")
+
     def schedule(self) -> pd.Timestamp:
         yield utcnow() # trigger on start!!!
         while True:
@@ -1,7 +1,7 @@
 from ..logging import log
 from .base import Element
 from ...io import save_df
-from typing import Dict, Union
+from typing import Dict, Union, Tuple
 import pandas as pd
 
 
@@ -12,20 +12,38 @@ __all__ = [
 
 class Serializer(Element):
     
-    _data: Dict[str, list] = {}
+    _data: Dict[str, list]
+    _snaps: Dict[str, Tuple[Element, str]] # var -> (element, field)
+
+    def resolve_peers(self):
+        self._snaps = {}
+        for var in self._params["vars"]:
+            elem_name, field = var.split(".")
+            self._snaps[var] = (self.get_element_by_name(elem_name), field)
 
     def init(self):
-        self._data["time"] = []
+        self._data = {"time": []}
         for var in self._params["vars"]:
             self._data[var] = []
     
     def calc(self, time):
         self._data["time"].append(time)
-        for var in self._params["vars"]:
+        for var in self._snaps:
             self._data[var].append(self.snap_var(var))
 
+    def get_state(self) -> dict:
+        return {"data": self._data}
+
+    def set_state(self, state: dict):
+        self._data = state["data"]
+
+    def to_df(self) -> pd.DataFrame:
+        """ The snapped variables so far, one row per calc time.
+        """
+        return pd.DataFrame(self._data)
+
     def done(self):
-        df = pd.DataFrame(self._data)
+        df = self.to_df()
         save_df(
             df,
             self._params["output_file"],
@@ -33,5 +51,5 @@ class Serializer(Element):
         )
 
     def snap_var(self, var) -> Union[str, float, int, bool]:
-        elem_name, field = var.split(".")
-        return self.get_element_by_name(elem_name).field(field)
\ No newline at end of file
+        elem, field = self._snaps[var]
+        return elem.field(field)
\ No newline at end of file
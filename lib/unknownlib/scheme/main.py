@@ -1,35 +1,73 @@
-from .element import *
+from .element import ElementManager
+from .logging import log
 from argparse import ArgumentParser
+from typing import Dict, Any, Optional
+import os
 import yaml
 
 
 parser = ArgumentParser()
 parser.add_argument("cfg_file")
+parser.add_argument("--checkpoint-file", help="where to checkpoint element states")
+parser.add_argument("--checkpoint-every", type=int, default=100, help="checkpoint every n calc rounds")
+parser.add_argument("--resume", action="store_true", help="resume from the checkpoint file if it exists")
 
 
-def main():
-
-    ElementCatalog.register_all_element_types()
-
-    args = parser.parse_args()
-    cfg_file = args.cfg_file
+def load_config(cfg_file: str) -> Dict[str, Any]:
     log.info(f"parsing {cfg_file}")
     with open(cfg_file, "r") as f:
-        config = yaml.safe_load(f)
+        return yaml.safe_load(f)
 
+
+def run_scheme(config: Dict[str, Any],
+               *,
+               checkpoint_file: Optional[str]=None,
+               checkpoint_every: int=100,
+               resume: bool=False,
+               ) -> ElementManager:
+    """ Create, init, calc and finish all elements of `config`.
+    Element types must be registered beforehand.
+    Return the manager, so that caller can inspect the elements.
+
+    If `checkpoint_file` is set, element states are checkpointed every
+    `checkpoint_every` calc rounds; with `resume`, they are restored from
+    the file (if it exists) right after init.
+    """
     manager = ElementManager()
     for name, params in config.items():
         manager.create_element(name, params)
 
     manager.init_elements()
-        
+
+    if checkpoint_file is not None:
+        if resume:
+            if os.path.exists(checkpoint_file):
+                manager.restore(checkpoint_file)
+            else:
+                log.warning(f"checkpoint {checkpoint_file} doesn't exist; starting from scratch")
+        manager.enable_checkpoint(checkpoint_file, every=checkpoint_every)
+    else:
+        assert not resume, "checkpoint file is required to resume"
+
+    from .element.scheduler import Scheduler
     scheduler = manager.get_element_by_type(Scheduler)
     for time_ in scheduler.schedule():
         manager.calc_elements(time_)
 
     manager.done_elements()
+    return manager
+
+
+def main():
+
+    args = parser.parse_args()
+    config = load_config(args.cfg_file)
+    run_scheme(config,
+               checkpoint_file=args.checkpoint_file,
+               checkpoint_every=args.checkpoint_every,
+               resume=args.resume)
+
 
-        
 if __name__ == "__main__":
 
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,137 @@
+"""
+Timing instrumentation of elements.
+"""
+import time
+import cProfile
+from collections import deque
+from typing import Dict, Tuple, Optional, Callable, Any
+import numpy as np
+import pandas as pd
+from .logging import log
+
+
+__all__ = [
+    "ElementProfiler",
+]
+
+
+class ElementProfiler:
+    """ Record wall/cpu time per element per phase ("init", "calc", "done"),
+    and the latency of each tick (i.e., one round of `calc_elements`).
+
+    Counters are plain lists keyed by (element name, phase) so that recording
+    a call costs two clock reads and a few additions.
+    """
+
+    _stats: Dict[Tuple[str, str], list] # [count, wall, cpu, wall_max]
+    _tick_latencies: deque
+    _tick_max: float
+    _tick_count: int
+    _tick_start: float
+    _tick_walls: Dict[str, float]
+    _last_tick_walls: Dict[str, float]
+    _cprofile_element: Optional[str]
+    _cprofile: Optional[cProfile.Profile]
+
+    def __init__(self, max_ticks: int=100_000) -> None:
+        """
+        Parameters
+        ----------
+        max_ticks : int
+            Number of most recent tick latencies kept for the percentiles.
+        """
+        self._stats = {}
+        self._tick_latencies = deque(maxlen=max_ticks)
+        self._tick_max = 0.
+        self._tick_count = 0
+        self._tick_start = 0.
+        self._tick_walls = {}
+        self._last_tick_walls = {}
+        self._cprofile_element = None
+        self._cprofile = None
+
+    def set_cprofile_element(self, name: str):
+        """ Run the `calc` of element `name` under cProfile.
+        """
+        self._cprofile_element = name
+        self._cprofile = cProfile.Profile()
+
+    def dump_cprofile(self, filename: str):
+        """ Write the cProfile stats collected so far; readable by `pstats`.
+        """
+        assert self._cprofile is not None, "cprofile element is not set"
+        self._cprofile.dump_stats(filename)
+        log.info(f"cprofile stats of {self._cprofile_element} written to: {filename}")
+
+    def call(self, name: str, phase: str, func: Callable, *a) -> Any:
+        """ Call `func(*a)` and record its time under (name, phase).
+        """
+        wall_start = time.perf_counter()
+        cpu_start = time.process_time()
+        if name == self._cprofile_element and phase == "calc":
+            res = self._cprofile.runcall(func, *a)
+        else:
+            res = func(*a)
+        wall = time.perf_counter() - wall_start
+        cpu = time.process_time() - cpu_start
+        self._tick_walls[name] = wall
+        key = (name, phase)
+        s = self._stats.get(key)
+        if s is None:
+            self._stats[key] = [1, wall, cpu, wall]
+        else:
+            s[0] += 1
+            s[1] += wall
+            s[2] += cpu
+            if wall > s[3]:
+                s[3] = wall
+        return res
+
+    def start_tick(self):
+        self._tick_walls = {}
+        self._tick_start = time.perf_counter()
+
+    def end_tick(self) -> float:
+        """ Record and return the latency of the current tick in seconds.
+        """
+        latency = time.perf_counter() - self._tick_start
+        self._last_tick_walls = self._tick_walls
+        self._tick_latencies.append(latency)
+        self._tick_count += 1
+        if latency > self._tick_max:
+            self._tick_max = latency
+        return latency
+
+    @property
+    def tick_count(self) -> int:
+        return self._tick_count
+
+    @property
+    def last_tick_latency(self) -> float:
+        return self._tick_latencies[-1] if self._tick_latencies else np.nan
+
+    @property
+    def last_tick_walls(self) -> Dict[str, float]:
+        """ Wall time of each element in the last completed tick.
+        """
+        return self._last_tick_walls
+
+    def tick_summary(self) -> Dict[str, float]:
+        """ Percentiles of tick latency in seconds.
+        `max` is over all ticks; `p50` and `p99` are over the most recent ticks.
+        """
+        if len(self._tick_latencies) == 0:
+            return {"n": 0, "p50": np.nan, "p99": np.nan, "max": np.nan}
+        p50, p99 = np.percentile(self._tick_latencies, [50, 99])
+        return {"n": self._tick_count, "p50": p50, "p99": p99, "max": self._tick_max}
+
+    def to_df(self) -> pd.DataFrame:
+        """ Timing stats as a dataframe, one row per (element, phase),
+        sorted by total wall time descending.
+        """
+        columns = ["element", "phase", "count", "wall_total", "cpu_total", "wall_max"]
+        df = pd.DataFrame(
+            [[name, phase, *s] for (name, phase), s in self._stats.items()],
+            columns=columns)
+        df["wall_mean"] = df["wall_total"] / df["count"]
+        return df.sort_values("wall_total", ascending=False).reset_index(drop=True)
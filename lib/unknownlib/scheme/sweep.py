@@ -0,0 +1,138 @@
+"""
+Run a scheme config template over a grid of parameters in a process pool.
+
+In the template, a string "%<param>%" is replaced by the value of <param> in
+each row of the grid, and "%RUN_ID%" by the row number, e.g.
+
+    serializer:
+      type: serializer
+      output_file: /tmp/sweep/%RUN_ID%.csv
+      vars: ["strategy.pnl"]
+    strategy:
+      type: my_strategy
+      window: "%window%"
+"""
+import copy
+import multiprocessing
+from argparse import ArgumentParser
+from typing import Dict, Any, List, Optional, Callable, Tuple
+import pandas as pd
+from .element import Serializer
+from .logging import log
+from .main import run_scheme, load_config
+from ..df import cross_join
+from ..io import save_df
+
+
+__all__ = [
+    "expand_config",
+    "run_sweep",
+    "get_shared",
+]
+
+
+_shared: Dict[str, Any] = {}
+
+
+def get_shared(key: str) -> Any:
+    """ Get the read-only data loaded by `init_worker` of `run_sweep`.
+    Elements call this instead of loading e.g. price series in every run.
+    """
+    assert key in _shared, f"{key} is not found in shared data {list(_shared.keys())}"
+    return _shared[key]
+
+
+def _substitute(obj: Any, params: Dict[str, Any]) -> Any:
+    if isinstance(obj, dict):
+        return {k: _substitute(v, params) for k, v in obj.items()}
+    elif isinstance(obj, list):
+        return [_substitute(v, params) for v in obj]
+    elif isinstance(obj, str):
+        for k, v in params.items():
+            placeholder = f"%{k}%"
+            if obj == placeholder:
+                return v # keep the type of the value
+            obj = obj.replace(placeholder, str(v))
+        return obj
+    else:
+        return obj
+
+
+def expand_config(template: Dict[str, Any], grid: pd.DataFrame) -> List[Dict[str, Any]]:
+    """ One config per row of `grid`, with placeholders substituted.
+    """
+    configs = []
+    for run_id, params in enumerate(grid.to_dict("records")):
+        configs.append(_substitute(copy.deepcopy(template), {**params, "RUN_ID": run_id}))
+    return configs
+
+
+def _init_worker(init_worker: Optional[Callable[[], Dict[str, Any]]]):
+    _shared.clear()
+    if init_worker is not None:
+        _shared.update(init_worker())
+
+
+def _run_one(args: Tuple[int, Dict[str, Any], Dict[str, Any]]) -> pd.DataFrame:
+    run_id, params, config = args
+    manager = run_scheme(config)
+    dfs = [e.to_df().assign(serializer=n) for n, e in manager.iter_elements() if isinstance(e, Serializer)]
+    df = pd.concat(dfs, ignore_index=True) if dfs else pd.DataFrame()
+    df["run_id"] = run_id
+    for k, v in params.items():
+        df[k] = v
+    return df
+
+
+def run_sweep(template: Dict[str, Any],
+              grid: pd.DataFrame,
+              *,
+              cores: int=1,
+              init_worker: Optional[Callable[[], Dict[str, Any]]]=None,
+              ) -> pd.DataFrame:
+    """ Run `template` for every row of `grid` and combine the outputs
+    of all Serializer elements, tagged by run_id and the grid params.
+
+    Parameters
+    ----------
+    template : dict
+        Scheme config with placeholders.
+    grid : pd.DataFrame
+        One row per run, e.g. from `cross_join`.
+    cores : int
+        Number of worker processes. Runs are handed out one at a time,
+        so that a slow run doesn't hold up a pre-assigned chunk.
+    init_worker : callable | None
+        Called once per worker; the returned dict is accessible by `get_shared`.
+    """
+    configs = expand_config(template, grid)
+    tasks = list(zip(range(len(configs)), grid.to_dict("records"), configs))
+    log.info(f"sweeping {len(tasks)} runs with {cores} cores")
+    if cores > 1:
+        with multiprocessing.Pool(cores, initializer=_init_worker, initargs=(init_worker,)) as pool:
+            dfs = list(pool.imap_unordered(_run_one, tasks, chunksize=1))
+    else:
+        _init_worker(init_worker)
+        dfs = [_run_one(task) for task in tasks]
+    return pd.concat(dfs, ignore_index=True).sort_values("run_id", kind="stable").reset_index(drop=True)
+
+
+parser = ArgumentParser()
+parser.add_argument("cfg_file", help="config template")
+parser.add_argument("grid_file", help="yaml mapping each param to a list of values")
+parser.add_argument("output_file", help="csv of combined serializer outputs")
+parser.add_argument("--cores", type=int, default=1)
+
+
+def main():
+
+    args = parser.parse_args()
+    template = load_config(args.cfg_file)
+    grid = cross_join(**load_config(args.grid_file))
+    df = run_sweep(template, grid, cores=args.cores)
+    save_df(df, args.output_file, index=False)
+
+
+if __name__ == "__main__":
+
+    main()
@@ -0,0 +1,153 @@
+import os
+import time
+import random
+import tempfile
+import threading
+import unittest
+import pandas as pd
+from unknownlib.algo import RetryPolicy, batch_run, iter_batch_run
+
+
+class TestBatchRun(unittest.TestCase):
+
+    def test_ints(self):
+        res = batch_run(func=lambda a, b: (a, b), start=100, end=125, batch_size=10)
+        self.assertTrue(res == [(100, 110), (110, 120), (120, 125)])
+        self.assertTrue(batch_run(func=lambda a, b: (a, b), start=5, end=5, batch_size=10) == [])
+
+    def test_timestamps(self):
+        start = pd.Timestamp("20230101", tz="UTC")
+        res = batch_run(func=lambda a, b: (a, b), start=start, end=start + pd.Timedelta("2.5D"), batch_size=pd.Timedelta("1D"))
+        self.assertTrue([b - a for a, b in res] == [pd.Timedelta("1D"), pd.Timedelta("1D"), pd.Timedelta("12h")])
+
+    def test_concurrency(self):
+        lock = threading.Lock()
+        active = [0, 0] # running, max running
+
+        def func(a, b):
+            with lock:
+                active[0] += 1
+                active[1] = max(active)
+            time.sleep(random.random() / 100)
+            with lock:
+                active[0] -= 1
+            return a
+
+        res = batch_run(func=func, start=0, end=100, batch_size=5, max_workers=4)
+        self.assertTrue(res == list(range(0, 100, 5)))
+        self.assertTrue(1 < active[1] <= 4)
+        res = [a for a, _, _ in iter_batch_run(func=func, start=0, end=100, batch_size=5, max_workers=4, ordered=False)]
+        self.assertTrue(sorted(res) == list(range(0, 100, 5)))
+
+    def test_bounded(self):
+        head_done = threading.Event()
+        started = []
+
+        def func(a, b):
+            started.append((a, head_done.is_set()))
+            if a == 0:
+                time.sleep(0.2) # slow head batch
+                head_done.set()
+            return a
+
+        res = batch_run(func=func, start=0, end=100, batch_size=1, max_workers=4)
+        self.assertTrue(res == list(range(100)))
+        # while the head runs: 3 other workers, then up to 2 * 4 results waiting for it
+        self.assertTrue(sum(1 for _, done in started if not done) <= 1 + 3 + 8)
+
+    def test_backoff_frees_worker(self):
+        calls = []
+
+        def func(a, b):
+            calls.append((a, time.monotonic()))
+            if a == 0 and len([_ for _ in calls if _[0] == 0]) == 1:
+                raise ConnectionError("rate limited")
+            return a
+
+        t = time.monotonic()
+        res = batch_run(func=func, start=0, end=3, batch_size=1, min_batch_size=1, max_workers=1,
+                        retry=RetryPolicy(backoff=0.2))
+        self.assertTrue(res == [0, 1, 2])
+        # the other batches ran while the failed one waited to be retried
+        self.assertTrue([a for a, _ in calls] == [0, 1, 2, 0])
+        self.assertTrue(calls[1][1] - t < 0.1 and calls[-1][1] - t >= 0.2)
+
+    def test_split_and_grow(self):
+
+        def func(a, b):
+            if a <= 40 < b and b - a > 2:
+                raise RuntimeError("too many results")
+            return a, b
+
+        res = batch_run(func=func, start=0, end=100, batch_size=16, min_batch_size=2)
+        self.assertTrue(res[0][0] == 0 and res[-1][1] == 100)
+        self.assertTrue(all(b == a_ for (_, b), (a_, _) in zip(res[:-1], res[1:])))
+        self.assertTrue(min(b - a for a, b in res) == 2)
+        self.assertTrue(res[-1][1] - res[-1][0] == 16 or res[-2][1] - res[-2][0] == 16) # grown back
+        self.assertRaises(Exception, lambda: batch_run(func=func, start=0, end=100, batch_size=16, min_batch_size=4,
+                                                       retry=RetryPolicy(max_retries=1, backoff=0)))
+
+    def test_retry(self):
+        calls = []
+
+        def func(a, b):
+            calls.append((a, b))
+            if len(calls) < 3:
+                raise ConnectionError("rate limited")
+            return a
+
+        res = batch_run(func=func, start=0, end=4, batch_size=4, min_batch_size=4, retry=RetryPolicy(backoff=0.01))
+        self.assertTrue(res == [0] and calls == [(0, 4)] * 3)
+        policy = RetryPolicy(backoff=1, multiplier=2, max_backoff=3)
+        self.assertTrue([policy.wait(_) for _ in [1, 2, 3]] == [1, 2, 3])
+
+        def fatal(a, b):
+            calls.append((a, b))
+            raise TypeError("bug")
+
+        calls.clear()
+        self.assertRaises(TypeError, lambda: batch_run(func=fatal, start=0, end=100, batch_size=10))
+        self.assertTrue(len(calls) == 1)
+        self.assertRaises(ValueError, lambda: batch_run(func=lambda a, b: int("x"), start=0, end=100, batch_size=10,
+                                                        retry=RetryPolicy(retriable=(ConnectionError,))))
+
+    def test_checkpoint(self):
+        calls = []
+
+        def func(a, b):
+            calls.append(a)
+            if a == 30:
+                raise TypeError("stop")
+            return a
+
+        run = lambda func, **kw: [a for a, _, _ in iter_batch_run(func=func, start=0, end=50, batch_size=10, **kw)]
+        with tempfile.TemporaryDirectory() as d:
+            path = os.path.join(d, "ckpt.json")
+            it = iter_batch_run(func=func, start=0, end=50, batch_size=10, checkpoint_file=path)
+            self.assertTrue([next(it)[0] for _ in range(3)] == [0, 10, 20])
+            self.assertRaises(TypeError, lambda: next(it))
+            calls.clear()
+            # batch 20 was consumed by the call of next that raised
+            self.assertTrue(run(lambda a, b: func(a + 1, b), checkpoint_file=path) == [30, 40])
+            self.assertTrue(calls == [31, 41])
+            self.assertTrue(run(func, checkpoint_file=path) == [])
+            self.assertRaises(AssertionError, lambda: batch_run(func=func, start=0, end=50, batch_size=10, checkpoint_file=path))
+            # a consumer failing on the first batch checkpoints nothing, with batches completed ahead of it
+            path = os.path.join(d, "ckpt_workers.json")
+            for ordered in [True, False]:
+                it = iter_batch_run(func=lambda a, b: time.sleep(0.01 * (a == 0)), start=0, end=80, batch_size=10,
+                                    max_workers=4, ordered=ordered, checkpoint_file=path)
+                next(it)
+                time.sleep(0.05)
+                it.close()
+                self.assertTrue(not os.path.exists(path))
+            path = os.path.join(d, "ckpt_ts.json")
+            start = pd.Timestamp("20230101", tz="UTC")
+            args = dict(func=lambda a, b: a, start=start, end=start + pd.Timedelta("3D"), batch_size=pd.Timedelta("1D"))
+            self.assertTrue(len(list(iter_batch_run(**args, checkpoint_file=path))) == 3)
+            self.assertTrue(list(iter_batch_run(**args, checkpoint_file=path)) == [])
+
+
+if __name__ == "__main__":
+
+    unittest.main()
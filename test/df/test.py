@@ -0,0 +1,76 @@
+import unittest
+import numpy as np
+import pandas as pd
+from functools import reduce
+from unknownlib.df import agg_df, cross_join, iter_cross_join
+
+
+def _stats(x: pd.DataFrame) -> dict:
+    return {"n": len(x), "vol": x["qty"].sum()}
+
+
+class TestAggDf(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.df = pd.DataFrame({
+            "date": rng.integers(0, 50, 2000),
+            "side": rng.choice(["buy", "sell"], 2000),
+            "qty": rng.random(2000),
+            "price": rng.random(2000),
+        })
+
+    def test_named(self):
+        res = self.df.uk.agg(by="date", func={"n": "size", "vol": ("qty", "sum"), "px": ("price", "last")})
+        self.assertTrue(res.columns.tolist() == ["date", "n", "vol", "px"])
+        expected = self.df.groupby("date").agg(n=("qty", "size"), vol=("qty", "sum"), px=("price", "last")).reset_index()
+        pd.testing.assert_frame_equal(res, expected)
+        res = agg_df(self.df, by=["date", "side"], func={"n": "size"})
+        self.assertTrue(res["n"].sum() == len(self.df))
+        self.assertRaises(ValueError, lambda: agg_df(self.df, by="date", func={"n": "sum"}))
+
+    def test_callable(self):
+        expected = agg_df(self.df, by="date", func={"n": "size", "vol": ("qty", "sum")})
+        res = self.df.uk.agg(by="date", func=_stats)
+        pd.testing.assert_frame_equal(res, expected, check_dtype=False)
+        res = agg_df(self.df, by=["date", "side"], func=lambda x: x["qty"].max())
+        self.assertTrue(res.columns.tolist() == ["date", "side", 0])
+        self.assertTrue(np.allclose(res[0], self.df.groupby(["date", "side"])["qty"].max()))
+        self.assertTrue(len(agg_df(self.df.iloc[:0], by="date", func=_stats)) == 0)
+
+    def test_n_jobs(self):
+        expected = agg_df(self.df, by=["date", "side"], func=_stats)
+        res = agg_df(self.df, by=["date", "side"], func=_stats, n_jobs=2)
+        pd.testing.assert_frame_equal(res, expected)
+        nan_keys = self.df.assign(date=np.nan)
+        res = agg_df(nan_keys, by="date", func=_stats, n_jobs=2)
+        pd.testing.assert_frame_equal(res, agg_df(nan_keys, by="date", func=_stats))
+        self.assertTrue(len(res) == 0)
+
+
+class TestCrossJoin(unittest.TestCase):
+
+    def setUp(self):
+        self.grid = {"n": [2, 3, 5], "k": ["a", "b"], "x": [0.5, 1.5, 2.5, 3.5], "f": [True, False]}
+
+    def test_cross_join(self):
+        res = cross_join(**self.grid)
+        # as merging on a constant key
+        expected = reduce(lambda x, y: pd.merge(x, y, on="__key"),
+                          [pd.DataFrame({k: v, "__key": 0}) for k, v in self.grid.items()]).drop(columns="__key")
+        pd.testing.assert_frame_equal(res, expected)
+        self.assertTrue(cross_join(n=[1, 2]).equals(pd.DataFrame({"n": [1, 2]})))
+        self.assertTrue(len(cross_join(n=[1, 2], k=[])) == 0)
+        self.assertTrue(len(cross_join()) == 0)
+
+    def test_iter_cross_join(self):
+        expected = cross_join(**self.grid)
+        chunks = list(iter_cross_join(self.grid, chunk_size=7))
+        self.assertTrue(len(chunks) == 7 and len(chunks[-1]) == 48 - 42)
+        pd.testing.assert_frame_equal(pd.concat(chunks), expected)
+        self.assertTrue(list(iter_cross_join({"n": [1], "k": []})) == [])
+
+
+if __name__ == "__main__":
+
+    unittest.main()
@@ -0,0 +1,84 @@
+import os
+import tempfile
+import unittest
+from unknownlib.evm.confirm import ConfirmationBuffer
+from unknownlib.evm.sql import SQLConnector
+
+
+def _hash(number, fork=0):
+    return "0x" + f"{fork:02x}{number:062x}"
+
+
+def _row(number, i, value, fork=0, removed=False):
+    return {"args_value": value, "logIndex": i, "blockNumber": number,
+            "blockHash": _hash(number, fork)[2:], "removed": removed}
+
+
+class TestConfirmationBuffer(unittest.TestCase):
+
+    def setUp(self):
+        self.retracted = []
+        self.final = []
+        self.buffer = ConfirmationBuffer(
+            2,
+            on_retract=lambda k, row: self.retracted.append((k, row["args_value"], row["removed"])),
+            on_final=lambda k, df: self.final.append((k, df["args_value"].tolist())))
+
+    def _head(self, number, fork=0, parent_fork=0):
+        self.buffer.add_block(number, _hash(number, fork), _hash(number - 1, parent_fork))
+
+    def test_final(self):
+        for n in range(1, 4):
+            self._head(n)
+            self.buffer.add_log("a", _row(n, 0, n))
+        self.assertTrue(self.final == [("a", [1])])
+        self.assertTrue(self.buffer.final_block == 1 and self.buffer.n_pending == 2)
+        self.buffer.add_log("a", _row(3, 1, 31))
+        self.buffer.add_log("b", _row(3, 2, 32))
+        self._head(4)
+        self._head(5)
+        self.assertTrue(self.final == [("a", [1]), ("a", [2]), ("a", [3, 31]), ("b", [32])])
+        self.assertTrue(self.retracted == [])
+
+    def test_reorg(self):
+        for n in range(1, 4):
+            self._head(n)
+            self.buffer.add_log("a", _row(n, 0, n))
+        # a head at the same height
+        self._head(3, fork=1)
+        self.assertTrue(self.retracted == [("a", 3, True)])
+        # a late log of the replaced block doesn't replace the head
+        self.buffer.add_log("a", _row(3, 1, 3, fork=0))
+        self.assertTrue(self.retracted == [("a", 3, True)] and self.buffer.n_pending == 1)
+        self.buffer.add_log("a", _row(3, 0, 33, fork=1))
+        # a head whose parent is not the block below
+        self._head(4, fork=2, parent_fork=2)
+        self.assertTrue(self.retracted == [("a", 3, True), ("a", 33, True)])
+        # removed by the node
+        self.buffer.add_log("a", _row(4, 0, 4, fork=2))
+        self.buffer.add_log("a", _row(4, 0, 4, fork=2, removed=True))
+        self.assertTrue(self.retracted[-1] == ("a", 4, True))
+        # a log of another block at the same height
+        self.buffer.add_log("a", _row(4, 0, 44, fork=3))
+        self._head(5, parent_fork=3)
+        self._head(6)
+        self.assertTrue(self.final == [("a", [1]), ("a", [2]), ("a", [44])])
+        self.assertRaises(ValueError, lambda: self._head(4, fork=4))
+
+    def test_sql(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            sql = SQLConnector()
+            sql.connect(os.path.join(tmp, "test.db"))
+            buffer = ConfirmationBuffer(1, sql=sql, table_names={"a": "a_Transfer"})
+            for n in range(1, 5):
+                buffer.add_block(n, _hash(n), _hash(n - 1))
+                buffer.add_log("a", _row(n, 0, n))
+                buffer.add_log("a", _row(n, 1, 10 * n))
+            df = sql.read_table("a_Transfer")
+            self.assertTrue(df["args_value"].tolist() == [1, 10, 2, 20, 3, 30])
+            self.assertTrue("removed" not in df.columns)
+            sql.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
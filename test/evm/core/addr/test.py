@@ -16,5 +16,39 @@ class TestAddrMethods(unittest.TestCase):
         self.assertTrue(hash(test_addr) == hash(test_addr.value))
         self.assertTrue(len(test_addr.to_topic()) == 66)
 
+    def test_interned(self):
+        value = "0x0938C63109801Ee4243a487aB84DFfA2Bba4589e"
+        self.assertTrue(Addr(value) is Addr(value.lower()))
+        self.assertTrue(Addr(Addr(value)) is Addr(value))
+        self.assertTrue(Addr(Addr(value).raw_bytes) is Addr(value))
+        self.assertTrue(Addr(value).to_topic() == "0x" + "0" * 24 + value[2:].lower())
+
+    def test_interned_threads(self):
+        import gc
+        from concurrent.futures import ThreadPoolExecutor
+        values = ["0x" + f"{i:040x}" for i in range(1000)]
+        with ThreadPoolExecutor(8) as pool:
+            addrs = list(pool.map(Addr, values * 8))
+        self.assertTrue(all(_ is Addr(_.raw_bytes) for _ in addrs))
+        self.assertTrue(len(set(addrs)) == 1000)
+        n = len(Addr._interned)
+        del addrs
+        gc.collect()
+        self.assertTrue(len(Addr._interned) <= n - 1000) # not kept once unused
+
+    def test_normalize_addresses(self):
+        import pandas as pd
+        from unknownlib.evm.utils import normalize_addresses
+        value = "0x0938C63109801Ee4243a487aB84DFfA2Bba4589e"
+        s = pd.Series([value.lower(), value, Addr(value), value.lower()], index=[3, 2, 1, 0])
+        r = normalize_addresses(s)
+        self.assertTrue((r == value).all())
+        self.assertTrue(list(r.index) == [3, 2, 1, 0])
+        self.assertTrue((normalize_addresses(s, checksum=False) == value.lower()).all())
+        self.assertRaises(ValueError, lambda: normalize_addresses(pd.Series([value[:-2]])))
+        other = "0x" + "11" * 20
+        r = normalize_addresses(pd.Series([value.lower(), None, other, float("nan")]), checksum=False)
+        self.assertTrue(r.tolist()[::2] == [value.lower(), other] and r[1::2].isna().all())
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,133 @@
+import os
+import unittest
+import pandas as pd
+from web3 import Web3
+from hexbytes import HexBytes
+from eth_utils import event_abi_to_log_topic
+from unknownlib.evm.decode import decode_logs, demux_logs
+from unknownlib.evm.utils import flatten_dict
+
+
+def _event_abi(name, inputs):
+    return [{"anonymous": False, "name": name, "type": "event", "inputs": [
+        {"indexed": indexed, "name": n, "type": t} for n, t, indexed in inputs]}]
+
+
+def _word(value):
+    return value.to_bytes(32, "big", signed=value < 0)
+
+
+def _raw_log(event, topics, data, i):
+    return {
+        "address": event.address,
+        "topics": [HexBytes(event_abi_to_log_topic(event.abi))] + [HexBytes(_) for _ in topics],
+        "data": HexBytes(data),
+        "blockNumber": 100 + i,
+        "transactionHash": HexBytes(os.urandom(32)),
+        "transactionIndex": i,
+        "blockHash": HexBytes(os.urandom(32)),
+        "logIndex": i,
+        "removed": False,
+    }
+
+
+class TestDecodeLogs(unittest.TestCase):
+
+    address = "0x0938C63109801Ee4243a487aB84DFfA2Bba4589e"
+
+    def _event(self, name, inputs):
+        return Web3().eth.contract(address=self.address, abi=_event_abi(name, inputs)).events[name]()
+
+    def _expected(self, raw_logs, event):
+        return pd.DataFrame([flatten_dict(dict(event.process_log(_))) for _ in raw_logs])
+
+    def test_static(self):
+        event = self._event("Swap", [
+            ("sender", "address", True), ("flag", "bool", True), ("id", "bytes4", True),
+            ("small", "uint256", False), ("big", "uint256", False), ("neg", "int256", False),
+            ("tick", "int24", False), ("price", "uint160", False)])
+        raw_logs = []
+        for i, (small, big, neg) in enumerate([(1, 2 ** 200, -1), (2 ** 63 - 1, 3, -2 ** 63), (0, 2 ** 64, -2 ** 64)]):
+            topics = [b"\0" * 12 + os.urandom(20), _word(i % 2), os.urandom(4) + b"\0" * 28]
+            data = b"".join(_word(_) for _ in [small, big, neg, -887272 + i, 2 ** 159 + i])
+            raw_logs.append(_raw_log(event, topics, data, i))
+        df = decode_logs(raw_logs, event)
+        pd.testing.assert_frame_equal(df, self._expected(raw_logs, event))
+        self.assertTrue(df["args_small"].dtype == "int64")
+        self.assertTrue(df["args_big"].tolist() == [2 ** 200, 3, 2 ** 64])
+        self.assertTrue(df["args_neg"].tolist() == [-1, -2 ** 63, -2 ** 64])
+
+    def test_compact_ints(self):
+        event = self._event("Swap", [
+            ("sender", "address", True), ("amount", "int256", False), ("price", "uint160", False), ("tick", "int24", False)])
+        values = [(-1, 2 ** 159, 1), (2 ** 200, 3, -887272), (-2 ** 64, 0, 0)]
+        raw_logs = [_raw_log(event, [b"\0" * 12 + os.urandom(20)], b"".join(_word(_) for _ in v), i) for i, v in enumerate(values)]
+        df = decode_logs(raw_logs, event, compact_ints=True)
+        self.assertTrue(df["args_amount"].dtype == "int256" and df["args_price"].dtype == "uint256")
+        self.assertTrue(df["args_tick"].dtype == "int64")
+        self.assertTrue(df["args_amount"].tolist() == [_[0] for _ in values])
+        self.assertTrue(df["args_price"].tolist() == [_[1] for _ in values])
+        expected = self._expected(raw_logs, event)
+        pd.testing.assert_frame_equal(df.astype({"args_amount": object, "args_price": object}), expected, check_dtype=False)
+        # as decoded by process_log
+        event = self._event("Named", [("amount", "uint256", True), ("name", "string", False)])
+        data = _word(32) + _word(3) + b"abc" + b"\0" * 29
+        raw_logs = [_raw_log(event, [_word(2 ** 100 + i)], data, i) for i in range(3)]
+        df = decode_logs(raw_logs, event, compact_ints=True)
+        self.assertTrue(df["args_amount"].dtype == "uint256" and df["args_amount"].tolist() == [2 ** 100 + i for i in range(3)])
+
+    def test_same_address(self):
+        event = self._event("Transfer", [("from", "address", True), ("to", "address", True), ("value", "uint256", False)])
+        a, b = b"\0" * 12 + os.urandom(20), b"\0" * 12 + os.urandom(20)
+        raw_logs = [_raw_log(event, [a, b], _word(i), i) for i in range(5)] + [_raw_log(event, [b, a], _word(7), 5)]
+        df = decode_logs(raw_logs, event)
+        pd.testing.assert_frame_equal(df, self._expected(raw_logs, event))
+        self.assertTrue(df["args_from"].nunique() == 2)
+
+    def test_dynamic(self):
+        event = self._event("Named", [("who", "address", True), ("name", "string", False)])
+        data = _word(32) + _word(3) + b"abc" + b"\0" * 29
+        raw_logs = [_raw_log(event, [b"\0" * 12 + os.urandom(20)], data, i) for i in range(3)]
+        df = decode_logs(raw_logs, event)
+        pd.testing.assert_frame_equal(df, self._expected(raw_logs, event))
+        self.assertTrue((df["args_name"] == "abc").all())
+
+    def test_mismatched(self):
+        event = self._event("Transfer", [("from", "address", True), ("to", "address", True), ("value", "uint256", False)])
+        raw_log = _raw_log(event, [b"\0" * 32, b"\0" * 32], _word(1), 0)
+        raw_log["topics"][0] = HexBytes(b"\1" * 32)
+        self.assertRaises(ValueError, lambda: decode_logs([raw_log], event))
+        self.assertTrue(decode_logs([], event).empty)
+
+
+class TestDemuxLogs(unittest.TestCase):
+
+    def test_demux(self):
+        erc20 = [("from", "address", True), ("to", "address", True), ("value", "uint256", False)]
+        a = "0x0938C63109801Ee4243a487aB84DFfA2Bba4589e"
+        b = "0x5C69bEe701ef814a2B6a3EDD4B1652CB9cc5aA6f"
+        abi = _event_abi("Transfer", erc20) + _event_abi("Approval", erc20) + _event_abi("Sync", [("reserve0", "uint112", False)])
+        events = {
+            ("a", "Transfer"): Web3().eth.contract(address=a, abi=abi).events.Transfer(),
+            ("a", "Approval"): Web3().eth.contract(address=a, abi=abi).events.Approval(),
+            ("b", "Transfer"): Web3().eth.contract(address=b, abi=abi).events.Transfer(),
+        }
+        sync = Web3().eth.contract(address=b, abi=abi).events.Sync()
+        topics = [b"\0" * 12 + os.urandom(20), b"\0" * 12 + os.urandom(20)]
+        raw_logs = [
+            _raw_log(events[("a", "Transfer")], topics, _word(1), 0),
+            _raw_log(events[("b", "Transfer")], topics, _word(2), 1),
+            _raw_log(events[("a", "Transfer")], topics, _word(3), 2),
+            _raw_log(sync, [], _word(4), 3), # not requested
+            _raw_log(events[("b", "Transfer")], topics, _word(5), 4),
+        ]
+        raw_logs[2]["address"] = a.lower()
+        dfs = demux_logs(raw_logs, events)
+        self.assertTrue(set(dfs.keys()) == set(events.keys()))
+        self.assertTrue(dfs[("a", "Transfer")]["args_value"].tolist() == [1, 3])
+        self.assertTrue(dfs[("b", "Transfer")]["args_value"].tolist() == [2, 5])
+        self.assertTrue(dfs[("a", "Approval")].empty)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,82 @@
+import time
+import unittest
+from unknownlib.evm.fees import FeeOracle
+
+
+class Eth:
+    """ Stand-in of web3.eth with a chain advancing one block per call of fee_history. """
+
+    def __init__(self):
+        self.head = 100
+        self.n_calls = 0
+
+    def fee_history(self, block_count, newest_block, reward_percentiles):
+        self.n_calls += 1
+        self.head += 1
+        oldest = self.head - block_count + 1
+        gwei = 10 ** 9
+        return {
+            "oldestBlock": oldest,
+            "baseFeePerGas": [(10 + _ % 3) * gwei for _ in range(oldest, self.head + 2)],
+            "reward": [[int(p * gwei / 10) + _ % 2 for p in reward_percentiles] for _ in range(oldest, self.head + 1)],
+            "gasUsedRatio": [0.5] * block_count,
+        }
+
+
+class Web3:
+
+    def __init__(self):
+        self.eth = Eth()
+
+
+class TestFeeOracle(unittest.TestCase):
+
+    def test_suggest(self):
+        web3 = Web3()
+        oracle = FeeOracle(web3, n_blocks=5)
+        fees = oracle.suggest() # first suggestion polls once
+        self.assertTrue(web3.eth.n_calls == 1)
+        self.assertTrue(oracle.next_base_fee == (10 + 102 % 3) * 10 ** 9)
+        self.assertTrue(fees["maxPriorityFeePerGas"] in (5 * 10 ** 9, 5 * 10 ** 9 + 1))
+        self.assertTrue(fees["maxFeePerGas"] == 2 * oracle.next_base_fee + fees["maxPriorityFeePerGas"])
+        self.assertTrue(oracle.priority_fee("slow") < oracle.priority_fee("normal") < oracle.priority_fee("fast"))
+        oracle.suggest("fast")
+        self.assertTrue(web3.eth.n_calls == 1) # from memory
+        oracle.update()
+        self.assertTrue(sorted(oracle._blocks) == list(range(98, 103)))
+        self.assertRaises(AssertionError, lambda: oracle.suggest("instant"))
+
+    def test_bump(self):
+        oracle = FeeOracle(Web3())
+        tx = {"to": "0x0", "maxFeePerGas": 100 * 10 ** 9, "maxPriorityFeePerGas": 10 ** 9}
+        bumped = oracle.bump(tx)
+        self.assertTrue(bumped["maxFeePerGas"] > 1.1 * tx["maxFeePerGas"])
+        self.assertTrue(bumped["maxPriorityFeePerGas"] == oracle.priority_fee("fast"))
+        self.assertTrue(bumped["to"] == "0x0")
+
+    def test_max_age(self):
+        web3 = Web3()
+        oracle = FeeOracle(web3, max_age=0.05)
+        oracle.suggest()
+        oracle.suggest()
+        self.assertTrue(web3.eth.n_calls == 1)
+        time.sleep(0.1)
+        oracle.suggest() # stale, polled again
+        self.assertTrue(web3.eth.n_calls == 2)
+
+    def test_background(self):
+        web3 = Web3()
+        oracle = FeeOracle(web3, poll_interval=0.01).start()
+        try:
+            time.sleep(0.2)
+        finally:
+            oracle.stop()
+        n_calls = web3.eth.n_calls
+        self.assertTrue(n_calls > 2 and oracle.age < 1)
+        time.sleep(0.05)
+        self.assertTrue(web3.eth.n_calls == n_calls)
+
+
+if __name__ == "__main__":
+
+    unittest.main()
@@ -0,0 +1,112 @@
+import unittest
+from eth_abi import encode
+from web3 import Web3
+from web3.providers.base import JSONBaseProvider
+from web3.exceptions import ContractLogicError, Web3RPCError
+from unknownlib.evm.fastw3 import FastW3
+from unknownlib.evm.fees import FeeOracle
+
+
+ABI = [{"name": "transfer", "type": "function", "stateMutability": "nonpayable",
+        "inputs": [{"name": "to", "type": "address"}, {"name": "value", "type": "uint256"}],
+        "outputs": [{"name": "", "type": "bool"}]}]
+TOKEN = "0x" + "11" * 20
+PRIVATE_KEY = "0x" + "01" * 32
+
+
+class Node(JSONBaseProvider):
+    """ JSON-RPC of a node where transfers of more than 100 revert, and
+    transfers run out of gas below 50k. """
+
+    def __init__(self):
+        super().__init__()
+        self.requests = []
+        self.batches = 0
+        self.call_gas = [] # gas limits of eth_call
+
+    def _result(self, method, params):
+        self.requests.append(method)
+        if method == "eth_chainId":
+            return "0x1"
+        if method == "eth_getTransactionCount":
+            return "0x7"
+        if method == "eth_gasPrice":
+            return hex(10 ** 9)
+        if method in ("eth_call", "eth_estimateGas"):
+            value = int(params[0]["data"][-64:], 16)
+            if value > 100:
+                reason = b"\x08\xc3\x79\xa0" + encode(["string"], ["too much"])
+                return {"error": {"code": 3, "message": "execution reverted: too much", "data": "0x" + reason.hex()}}
+            if method == "eth_estimateGas":
+                return hex(50_000)
+            gas = params[0].get("gas")
+            self.call_gas.append(None if gas is None else int(gas, 16))
+            if gas is not None and int(gas, 16) < 50_000:
+                return {"error": {"code": -32000, "message": "out of gas"}}
+            return "0x" + "00" * 31 + "01"
+        raise NotImplementedError(method)
+
+    def _response(self, i, method, params):
+        res = self._result(method, params)
+        return {"jsonrpc": "2.0", "id": i, **(res if isinstance(res, dict) else {"result": res})}
+
+    def make_request(self, method, params):
+        return self._response(0, method, params)
+
+    def make_batch_request(self, requests):
+        self.batches += 1
+        return [self._response(i, method, params) for i, (method, params) in enumerate(requests)]
+
+
+class TestPreflight(unittest.TestCase):
+
+    def setUp(self):
+        self.node = Node()
+        self.fw = FastW3()
+        self.fw._web3 = Web3(self.node)
+        self.fw.init_acct(private_key=PRIVATE_KEY)
+        self.token = self.fw.web3.eth.contract(address=Web3.to_checksum_address(TOKEN), abi=ABI)
+        FastW3._gas_estimates.clear()
+
+    def call(self, value, **kw):
+        to = "0x" + "22" * 20
+        return self.fw.call(self.token.functions.transfer(Web3.to_checksum_address(to), value),
+                            hold=True, gasPrice=10 ** 9, chainId=1, **kw)
+
+    def test_estimate(self):
+        tx = self.call(10)
+        self.assertTrue(tx["gas"] == 60_000) # estimate * 1.2
+        self.assertTrue(self.node.batches == 1 and self.node.requests.count("eth_estimateGas") == 1)
+        tx = self.call(20)
+        self.assertTrue(tx["gas"] == 60_000)
+        # the estimate of the same function and arg shape is cached; only eth_call is sent
+        self.assertTrue(self.node.batches == 1 and self.node.requests.count("eth_estimateGas") == 1)
+        self.assertTrue(self.node.requests.count("eth_call") == 2)
+        self.assertTrue(self.call(20, gas=80_000)["gas"] == 80_000)
+        # eth_call is sent with the gas limit, once it is known
+        self.assertTrue(self.node.call_gas == [None, 60_000, 80_000])
+
+    def test_out_of_gas(self):
+        self.assertRaises(Web3RPCError, lambda: self.call(10, gas=30_000))
+        self.assertTrue(self.node.call_gas == [30_000])
+        self.call(10)
+        self.assertRaises(Web3RPCError, lambda: self.call(10, gas=30_000))
+
+    def test_revert(self):
+        self.assertRaises(ContractLogicError, lambda: self.call(1000))
+        self.call(10)
+        self.assertRaises(ContractLogicError, lambda: self.call(1000))
+        n = len(self.node.requests)
+        self.assertTrue(self.call(1000, gas=80_000, simulate=False)["gas"] == 80_000)
+        self.assertTrue(len(self.node.requests) == n + 1) # nonce only
+        self.assertRaises(AssertionError, lambda: self.call(10, simulate=False))
+
+    def test_fee_fallback(self):
+        # fees can't be polled (no eth_feeHistory): the gas price of the node is used
+        self.fw._fee_oracle = FeeOracle(self.fw.web3)
+        self.assertTrue(self.fw._fee_args() == {"gasPrice": 10 ** 9})
+
+
+if __name__ == "__main__":
+
+    unittest.main()
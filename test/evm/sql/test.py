@@ -0,0 +1,110 @@
+import os
+import sqlite3
+import tempfile
+import threading
+import unittest
+import pandas as pd
+from concurrent.futures import ThreadPoolExecutor
+from unknownlib.evm.sql import SQLConnector
+
+
+class TestSQLConnector(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.sql = SQLConnector()
+        self.sql.connect(os.path.join(self.tmp.name, "test.db"))
+
+    def tearDown(self):
+        self.sql.close()
+        self.tmp.cleanup()
+
+    def test_wal(self):
+        self.assertTrue(self.sql.con.execute("PRAGMA journal_mode").fetchone()[0] == "wal")
+
+    def test_write_read(self):
+        df = pd.DataFrame({"blockNumber": [1, 1, 2], "logIndex": [0, 1, 0], "value": [10, 11, 20]})
+        self.sql.write(df, table_name="t", index=["blockNumber", "logIndex"])
+        self.sql.write(df.assign(value=[10, 12, 20]).iloc[1:], table_name="t", index=["blockNumber", "logIndex"])
+        res = self.sql.read("SELECT * FROM t ORDER BY blockNumber, logIndex")
+        self.assertTrue(res["value"].tolist() == [10, 12, 20])
+        future = self.sql.write(df, table_name="t2", index="blockNumber", wait=False) # duplicated key is replaced
+        future.result()
+        self.assertTrue(len(self.sql.read_table("t2")) == 2)
+
+    def test_reconnect(self):
+        self.sql.write(pd.DataFrame({"a": [1]}), table_name="t", index="a")
+        writer, cons = self.sql._writer, list(self.sql._cons)
+        self.sql.connect(os.path.join(self.tmp.name, "test2.db"))
+        self.assertFalse(writer.is_alive())
+        self.assertRaises(sqlite3.ProgrammingError, lambda: cons[0].execute("SELECT 1"))
+        self.assertFalse(self.sql.table_exists("t"))
+        self.sql.write(pd.DataFrame({"a": [1]}), table_name="t", index="a")
+        self.assertTrue(len(self.sql.read_table("t")) == 1)
+
+    def test_error(self):
+        self.assertRaises(Exception, lambda: self.sql.submit_write(lambda con: con.execute("SELECT * FROM no_such_table")).result())
+        # the writer goes on
+        self.sql.write(pd.DataFrame({"a": [1]}), table_name="t", index="a")
+        self.assertTrue(len(self.sql.read_table("t")) == 1)
+
+    def test_existing_keys(self):
+        df = pd.DataFrame({"blockNumber": [5, 10, 20, 100], "logIndex": [0, 1, 0, 2], "v": 1})
+        self.sql.write(df, table_name="t", index=["blockNumber", "logIndex"])
+        self.assertTrue(self.sql.existing_keys("no_such_table", "blockNumber") == set())
+        self.assertTrue(self.sql.existing_keys("t", "blockNumber") == {5, 10, 20, 100})
+        self.assertTrue(self.sql.existing_keys("t", "blockNumber", start=9, end=100) == {10, 20}) # not as text
+        self.assertTrue(self.sql.existing_keys("t", "blockNumber", range(0, 30, 5), chunk_size=2) == {5, 10, 20})
+        self.assertTrue(self.sql.existing_keys("t", ["blockNumber", "logIndex"], [(5, 0), (5, 1), (100, 2)]) == {(5, 0), (100, 2)})
+        self.assertTrue(self.sql.existing_keys("t", ["blockNumber", "logIndex"], start=20) == {(20, 0), (100, 2)})
+
+    def test_filters(self):
+        df = pd.DataFrame({"blockNumber": range(0, 2000, 7), "v": 1.5})
+        self.sql.write(df, table_name="t", index="blockNumber")
+        blocks = lambda filters: sorted(self.sql.read_table("t", filters=filters)["blockNumber"].tolist())
+        self.assertTrue(blocks([("blockNumber", ">=", 5), ("blockNumber", "<=", 1001)]) == list(range(7, 1002, 7)))
+        self.assertTrue(blocks([("blockNumber", ">", 1990)]) == [1995])
+        self.assertTrue(blocks([("blockNumber", ">", 20), ("blockNumber", "<", 10)]) == [])
+        self.assertTrue(blocks([("blockNumber", "in", [14, 15, 700])]) == [14, 700])
+        self.assertTrue(blocks([("blockNumber", "==", 21), ("v", ">", 1.0)]) == [21])
+        self.assertTrue(self.sql.existing_keys("t", "blockNumber", start=90, end=120) == {91, 98, 105, 112, 119})
+        # both bounds are looked up in the index of the text column
+        where, params = self.sql._where("t", [("blockNumber", ">=", 90), ("blockNumber", "<", 120)])
+        plan = self.sql.execute(f"EXPLAIN QUERY PLAN SELECT * FROM t{where}", params).fetchall()
+        self.assertTrue(all("USING INDEX" in _[-1] for _ in plan if _[-1].startswith(("SEARCH", "SCAN"))))
+        self.assertTrue(any(_[-1].startswith("SEARCH") for _ in plan))
+
+    def test_missing_ranges(self):
+        self.assertTrue(self.sql.missing_ranges("t", "blockNumber", 0, 10, 2) == [(0, 10)])
+        df = pd.DataFrame({"blockNumber": [0, 2, 4, 10, 12, 16], "v": 1})
+        self.sql.write(df, table_name="t", index="blockNumber")
+        self.assertTrue(self.sql.missing_ranges("t", "blockNumber", 0, 20, 2) == [(6, 10), (14, 16), (18, 20)])
+        self.assertTrue(self.sql.missing_ranges("t", "blockNumber", 0, 13, 2) == [(6, 10)])
+        self.assertTrue(self.sql.missing_ranges("t", "blockNumber", 1, 5, 1) == [(1, 2), (3, 4)])
+        self.assertTrue(self.sql.missing_ranges("t", "blockNumber", 5, 5) == [])
+        self.sql.submit_write(lambda con: con.execute("CREATE TABLE i (n INTEGER PRIMARY KEY)")).result()
+        self.sql.submit_write(lambda con: con.executemany("INSERT INTO i VALUES (?)", [(1,), (9,), (10,)])).result()
+        self.assertTrue(self.sql.missing_ranges("i", "n", 0, 12) == [(0, 1), (2, 9), (11, 12)])
+        self.assertTrue(self.sql.existing_keys("i", "n", start=2, end=10) == {9})
+
+    def test_threads(self):
+        n_threads, n_writes = 8, 20
+
+        def _work(i):
+            cons = set()
+            for j in range(n_writes):
+                df = pd.DataFrame({"worker": [i] * 5, "batch": [j] * 5, "row": range(5)})
+                self.sql.write(df, table_name="t", index=["worker", "batch", "row"])
+                res = self.sql.read(f"SELECT COUNT(*) AS n FROM t WHERE worker = {i}")
+                assert res["n"].iloc[0] == (j + 1) * 5
+                cons.add(id(self.sql.con))
+            return threading.get_ident(), cons
+
+        with ThreadPoolExecutor(n_threads) as pool:
+            res = list(pool.map(_work, range(n_threads)))
+        self.assertTrue(all(len(cons) == 1 for _, cons in res))
+        self.assertTrue(len(self.sql.read_table("t")) == n_threads * n_writes * 5)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,115 @@
+import os
+import importlib.util
+import time
+import tempfile
+import threading
+import unittest
+from unknownlib.evm.sql import SQLCache, SQLConnector
+
+
+class TestSQLCache(unittest.TestCase):
+    backend = None
+    ext = "db"
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+
+        class Cache(SQLCache):
+            _db_path = os.path.join(self.tmp.name, f"cache.{self.ext}")
+            _backend = self.backend
+
+        self.Cache = Cache
+        self.calls = []
+
+    def tearDown(self):
+        self.Cache.close()
+        self.tmp.cleanup()
+
+    def _func(self, **kw):
+        calls = self.calls
+
+        @self.Cache.cache(**kw)
+        def add(x, y=0):
+            calls.append((x, y))
+            return [x + y, str(x)]
+        return add
+
+    def test_cache(self):
+        add = self._func()
+        self.assertTrue(add(1, y=2) == [3, "1"])
+        self.assertTrue(add(1, y=2) == [3, "1"])
+        self.assertTrue(add(1, 2) == [3, "1"]) # positional args are keyed apart from keywords
+        self.assertTrue(add("1' OR 1=1 --", y="") == ["1' OR 1=1 --", "1' OR 1=1 --"])
+        self.assertTrue(self.calls == [(1, 2), (1, 2), ("1' OR 1=1 --", "")])
+        # from SQLite once not in process
+        add.lru_clear()
+        self.assertTrue(add(1, y=2) == [3, "1"])
+        self.assertTrue(len(self.calls) == 3)
+        add.cache_clear()
+        add(1, y=2)
+        self.assertTrue(len(self.calls) == 4)
+        # reset clears the values in process too
+        self.Cache.reset(f"{add.__module__}_add")
+        add(1, y=2)
+        self.assertTrue(len(self.calls) == 5)
+
+    def test_ttl(self):
+        add = self._func(ttl=0.2)
+        add(1)
+        add(1)
+        self.assertTrue(len(self.calls) == 1)
+        time.sleep(0.3)
+        add(1)
+        self.assertTrue(len(self.calls) == 2)
+        add.lru_clear()
+        add(1)
+        self.assertTrue(len(self.calls) == 2)
+
+    def test_eviction(self):
+        add = self._func(max_rows=3, lru_size=2)
+        for x in range(5):
+            add(x)
+        add.lru_clear()
+        for x in [4, 3, 2, 0]: # the 3 latest are kept
+            add(x)
+        self.assertTrue(self.calls == [(x, 0) for x in range(5)] + [(0, 0)])
+
+    def test_threads(self):
+        add = self._func(lru_size=0)
+        add(1)
+        errors = []
+
+        def _run():
+            try:
+                for _ in range(100):
+                    add(1)
+                    add(2)
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=_run) for _ in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertTrue(errors == [])
+        self.assertTrue(self.calls.count((1, 0)) == 1)
+
+    def test_backend(self):
+        self._func()(1)
+        self.assertTrue(isinstance(self.Cache._storage(), SQLConnector))
+
+
+@unittest.skipUnless(importlib.util.find_spec("duckdb"), "duckdb is not installed")
+class TestDuckDBCache(TestSQLCache):
+    backend = "duckdb"
+    ext = "duckdb"
+
+    def test_backend(self):
+        from unknownlib.evm.storage import DuckDBConnector
+        self._func()(1)
+        self.assertTrue(isinstance(self.Cache._storage(), DuckDBConnector))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,85 @@
+import os
+import importlib.util
+import tempfile
+import unittest
+from unittest import mock
+import pandas as pd
+from unknownlib.evm.sql import SQLConnector
+from unknownlib.evm.storage import connect_storage, DuckDBConnector
+
+
+_df = pd.DataFrame({
+    "blockNumber": [1, 1, 2, 3, 10],
+    "logIndex": [0, 1, 0, 0, 0],
+    "value": [10, 11, 20, 30, 100],
+    "address": ["0xa", "0xb", "0xa", "0xc", "0xa"],
+})
+
+
+class _TestBackend:
+
+    backend = None
+    ext = None
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.storage = connect_storage(os.path.join(self.tmp.name, f"test.{self.ext}"), backend=self.backend)
+        self.storage.write(_df, table_name="t", index=["blockNumber", "logIndex"])
+
+    def tearDown(self):
+        self.storage.close()
+        self.tmp.cleanup()
+
+    def test_read_table(self):
+        df = self.storage.read_table("t", columns=["blockNumber", "value"])
+        self.assertTrue(list(df.columns) == ["blockNumber", "value"])
+        self.assertTrue(len(df) == 5)
+        df = self.storage.read_table("t", filters=[("blockNumber", ">=", 2), ("blockNumber", "<", 10)])
+        self.assertTrue(sorted(df["value"].tolist()) == [20, 30])
+        df = self.storage.read_table("t", filters=[("address", "in", ["0xa", "0xc"]), ("value", "!=", 100)])
+        self.assertTrue(sorted(df["value"].tolist()) == [10, 20, 30])
+        df = self.storage.read_table("t", filters=[("address", "not in", ["0xa"])])
+        self.assertTrue(sorted(df["value"].tolist()) == [11, 30])
+        self.assertRaises(AssertionError, lambda: self.storage.read_table("t", filters=[("value", "~", 1)]))
+
+    def test_existing_keys(self):
+        self.assertTrue(self.storage.existing_keys("t", ["blockNumber", "logIndex"], [(1, 1), (1, 2)]) == {(1, 1)})
+        self.assertTrue(self.storage.existing_keys("t", "blockNumber", start=2, end=10) == {2, 3})
+
+    def test_missing_ranges(self):
+        self.assertTrue(self.storage.missing_ranges("t", "blockNumber", 0, 12) == [(0, 1), (4, 10), (11, 12)])
+
+
+class TestSQLite(_TestBackend, unittest.TestCase):
+
+    backend = "sqlite"
+    ext = "db"
+
+
+@unittest.skipUnless(importlib.util.find_spec("duckdb"), "duckdb is not installed")
+class TestDuckDB(_TestBackend, unittest.TestCase):
+
+    backend = "duckdb"
+    ext = "duckdb"
+
+
+class TestConnectStorage(unittest.TestCase):
+
+    def test_select(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            storage = connect_storage(os.path.join(tmp, "test.db"))
+            self.assertTrue(isinstance(storage, SQLConnector))
+            storage.close()
+            with mock.patch.dict(os.environ, {"UNKNOWN_STORAGE_BACKEND": "sqlite"}):
+                storage = connect_storage(os.path.join(tmp, "test.duckdb"))
+                self.assertTrue(isinstance(storage, SQLConnector))
+                storage.close()
+            self.assertRaises(AssertionError, lambda: connect_storage(os.path.join(tmp, "test.db"), backend="csv"))
+            if importlib.util.find_spec("duckdb"):
+                storage = connect_storage(os.path.join(tmp, "test2.duckdb"))
+                self.assertTrue(isinstance(storage, DuckDBConnector))
+                storage.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,181 @@
+import os
+import json
+import asyncio
+import threading
+import unittest
+from web3 import Web3
+from eth_utils import event_abi_to_log_topic
+from websockets.asyncio.server import serve
+from websockets.exceptions import ConnectionClosed
+from unknownlib.evm.stream import LogStream, _parse_log
+
+
+ABI = [{"anonymous": False, "name": "Transfer", "type": "event", "inputs": [
+    {"indexed": True, "name": "from", "type": "address"},
+    {"indexed": True, "name": "to", "type": "address"},
+    {"indexed": False, "name": "value", "type": "uint256"}]}]
+ADDRESS = "0x0938C63109801Ee4243a487aB84DFfA2Bba4589e"
+
+
+class FakeNode:
+    """ A chain in memory, served as JSON-RPC over WebSocket with subscriptions.
+    """
+
+    def __init__(self):
+        self.topic0 = "0x" + event_abi_to_log_topic(ABI[0]).hex()
+        self.blocks = [{"number": 0, "hash": "0x" + os.urandom(32).hex(), "logs": []}]
+        self.subscriptions = {} # connection -> {subscription id: kind}
+        self.loop = asyncio.new_event_loop()
+        started = threading.Event()
+
+        async def _serve():
+            self.server = await serve(self._handle, "127.0.0.1", 0)
+            self.url = f"ws://127.0.0.1:{self.server.sockets[0].getsockname()[1]}"
+            started.set()
+            await self.server.serve_forever()
+
+        self.thread = threading.Thread(target=self.loop.run_until_complete, args=(_serve(),), daemon=True)
+        self.thread.start()
+        started.wait()
+
+    def run(self, coro):
+        return asyncio.run_coroutine_threadsafe(coro, self.loop).result()
+
+    def _log(self, block, i, value):
+        word = lambda b: "0x" + (b"\0" * 12 + b).hex()
+        return {"address": ADDRESS.lower(), "topics": [self.topic0, word(b"\1" * 20), word(b"\2" * 20)],
+                "data": "0x" + value.to_bytes(32, "big").hex(), "blockNumber": hex(block["number"]),
+                "blockHash": block["hash"], "transactionHash": "0x" + os.urandom(32).hex(),
+                "transactionIndex": hex(i), "logIndex": hex(i), "removed": False}
+
+    async def _notify(self, kind, result):
+        for ws, subscriptions in list(self.subscriptions.items()):
+            for subscription, kind_ in subscriptions.items():
+                if kind_ == kind:
+                    try:
+                        await ws.send(json.dumps({"jsonrpc": "2.0", "method": "eth_subscription",
+                                                  "params": {"subscription": subscription, "result": result}}))
+                    except ConnectionClosed:
+                        pass
+
+    async def mine(self, values):
+        block = {"number": len(self.blocks), "hash": "0x" + os.urandom(32).hex(), "parentHash": self.blocks[-1]["hash"]}
+        block["logs"] = [self._log(block, i, v) for i, v in enumerate(values)]
+        self.blocks.append(block)
+        await self._notify("newHeads", {"number": hex(block["number"]), "hash": block["hash"], "parentHash": block["parentHash"]})
+        for _ in block["logs"]:
+            await self._notify("logs", _)
+
+    async def reorg(self, values):
+        """ Replace the last block by one with logs of `values`. """
+        block = self.blocks.pop()
+        for _ in block["logs"]:
+            await self._notify("logs", {**_, "removed": True})
+        await self.mine(values)
+
+    async def disconnect(self):
+        for ws in list(self.subscriptions):
+            ws.transport.abort() # drop without closing handshake
+        self.subscriptions.clear()
+
+    def _get_logs(self, params):
+        lo, hi = int(params["fromBlock"], 16), int(params["toBlock"], 16)
+        return [_ for b in self.blocks[lo:hi + 1] for _ in b["logs"]]
+
+    async def _handle(self, ws):
+        self.subscriptions[ws] = {}
+        try:
+            async for msg in ws:
+                req = json.loads(msg)
+                method, params = req["method"], req["params"]
+                if method == "eth_subscribe":
+                    result = "0x" + os.urandom(8).hex()
+                    self.subscriptions[ws][result] = params[0]
+                elif method == "eth_blockNumber":
+                    result = hex(len(self.blocks) - 1)
+                elif method == "eth_getBlockByNumber":
+                    n = int(params[0], 16)
+                    result = {"number": hex(n), "hash": self.blocks[n]["hash"]} if n < len(self.blocks) else None
+                elif method == "eth_getLogs":
+                    result = self._get_logs(params[0])
+                await ws.send(json.dumps({"jsonrpc": "2.0", "id": req["id"], "result": result}))
+        except ConnectionClosed:
+            pass
+        finally:
+            self.subscriptions.pop(ws, None)
+
+
+class TestLogStream(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.node = FakeNode()
+        cls.event = Web3().eth.contract(address=ADDRESS, abi=ABI).events.Transfer()
+
+    def _values(self, it, n):
+        return [(row["args_value"], row["removed"]) for _, (_, row) in zip(range(n), it)]
+
+    def test_stream(self):
+        node = self.node
+        node.run(node.mine([1, 2]))
+        heads = []
+        stream = LogStream(node.url, {"tfer": self.event}, from_block=len(node.blocks) - 1,
+                           reconnect_wait=0.1, on_head=lambda *a: heads.append(a))
+        it = iter(stream)
+        # backfill
+        key, row = next(it)
+        self.assertTrue(key == "tfer")
+        self.assertTrue(row["args_value"] == 1 and row["removed"] is False)
+        self.assertTrue(row["args_from"] == "0x" + "01" * 20)
+        self.assertTrue(self._values(it, 1) == [(2, False)])
+        # live
+        node.run(node.mine([3]))
+        self.assertTrue(self._values(it, 1) == [(3, False)])
+        self.assertTrue(heads[-1] == (len(node.blocks) - 1, node.blocks[-1]["hash"], node.blocks[-2]["hash"]))
+        # removed by the node
+        node.run(node.reorg([4]))
+        self.assertTrue(self._values(it, 2) == [(3, True), (4, False)])
+        # mined while disconnected: backfilled on reconnect, without repeating
+        node.run(node.disconnect())
+        node.run(node.mine([5, 6]))
+        self.assertTrue(self._values(it, 2) == [(5, False), (6, False)])
+        # reorged while disconnected: replayed as removed on reconnect
+        node.run(node.disconnect())
+        node.blocks.pop()
+        node.run(node.mine([7]))
+        self.assertTrue(self._values(it, 3) == [(6, True), (5, True), (7, False)])
+        node.run(node.mine([8]))
+        self.assertTrue(self._values(it, 1) == [(8, False)])
+        it.close()
+
+    def test_async(self):
+        node = self.node
+        stream = LogStream(node.url, {"tfer": self.event}, from_block=len(node.blocks))
+
+        async def _first():
+            async for key, row in stream:
+                return row["args_value"]
+
+        async def _run():
+            task = asyncio.create_task(_first())
+            await asyncio.sleep(0.2)
+            node.run(node.mine([9]))
+            return await task
+
+        self.assertTrue(asyncio.run(_run()) == 9)
+
+    def test_prune(self):
+        stream = LogStream(self.node.url, {"tfer": self.event}, reorg_depth=2)
+        block = lambda n: {"number": n, "hash": "0x" + os.urandom(32).hex()}
+        replaced = block(1)
+        self.assertTrue(stream._accept(_parse_log(self.node._log(replaced, 0, 1))))
+        # replaced by a head, and the node never pushes its log as removed
+        for n in range(1, 5):
+            head = block(n)
+            stream._see_block(n, head["hash"])
+            stream._accept(_parse_log(self.node._log(head, 0, n)))
+        self.assertTrue(len(stream._logs) == 3 and sorted(stream._hashes) == [2, 3, 4])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,108 @@
+import random
+import unittest
+import numpy as np
+import pandas as pd
+from unknownlib.evm.uint256 import UInt256Array, Int256Array, scale_decimals
+
+
+class TestUInt256(unittest.TestCase):
+
+    def setUp(self):
+        random.seed(0)
+        self.values = [random.getrandbits(random.choice([8, 64, 100, 200, 256])) for _ in range(1000)]
+        self.amounts = [random.getrandbits(random.choice([8, 64, 100, 200, 240])) * random.choice([1, -1]) for _ in range(1000)]
+
+    def test_construct(self):
+        s = pd.Series(self.values, dtype="uint256")
+        self.assertTrue(s.tolist() == self.values)
+        self.assertTrue(pd.Series(self.amounts, dtype="int256").tolist() == self.amounts)
+        self.assertTrue(pd.Series(np.array([-1, 5]), dtype="int256").tolist() == [-1, 5])
+        self.assertTrue(pd.Series([-2 ** 255, 2 ** 255 - 1], dtype="int256").tolist() == [-2 ** 255, 2 ** 255 - 1])
+        self.assertTrue(pd.Series(["0x10", "17"], dtype="uint256").tolist() == [16, 17])
+        words = np.frombuffer(b"".join(_.to_bytes(32, "big") for _ in self.values), dtype=np.uint8).reshape(-1, 32)
+        self.assertTrue(UInt256Array.from_words(words).tolist() == self.values)
+        self.assertRaises(OverflowError, lambda: pd.Series([-1], dtype="uint256"))
+        self.assertRaises(OverflowError, lambda: pd.Series([2 ** 256], dtype="uint256"))
+        self.assertRaises(OverflowError, lambda: pd.Series([2 ** 255], dtype="int256"))
+        self.assertRaises(TypeError, lambda: pd.Series([1.5], dtype="uint256"))
+
+    def test_arithmetic(self):
+        a, b = self.values[:500], self.values[500:]
+        sa, sb = pd.Series(a, dtype="uint256"), pd.Series(b, dtype="uint256")
+        big = [x >= y for x, y in zip(a, b)]
+        self.assertTrue((sa[big] - sb[big]).tolist() == [x - y for x, y, z in zip(a, b, big) if z])
+        half = [_ // 2 for _ in a]
+        self.assertTrue((pd.Series(half, dtype="uint256") + 1).tolist() == [_ + 1 for _ in half])
+        self.assertRaises(OverflowError, lambda: sa - (sa + 1))
+        ta, tb = pd.Series(self.amounts[:500], dtype="int256"), pd.Series(self.amounts[500:], dtype="int256")
+        ha, hb = [_ // 2 for _ in self.amounts[:500]], [_ // 2 for _ in self.amounts[500:]]
+        res = pd.Series(ha, dtype="int256") - pd.Series(hb, dtype="int256")
+        self.assertTrue(res.dtype == "int256" and res.tolist() == [x - y for x, y in zip(ha, hb)])
+        self.assertTrue((-ta).tolist() == [-_ for _ in self.amounts[:500]])
+        self.assertTrue((5 - tb).tolist() == [5 - _ for _ in self.amounts[500:]])
+        self.assertTrue((pd.Series([1], dtype="uint256") - pd.Series([3], dtype="int256")).tolist() == [-2])
+        # integral floats are coerced, others are not
+        self.assertTrue((sa + 1.0).tolist() == [_ + 1 for _ in a])
+        self.assertTrue((ta - np.full(500, 2.0)).tolist() == [_ - 2 for _ in self.amounts[:500]])
+        self.assertTrue((sa[:2].array + np.array([1.0, np.nan])).tolist() == [a[0] + 1, pd.NA])
+        self.assertRaises(TypeError, lambda: sa + 0.5)
+
+    def test_compare(self):
+        s, t = pd.Series(self.values, dtype="uint256"), pd.Series(self.amounts, dtype="int256")
+        threshold = 2 ** 100
+        self.assertTrue((s > threshold).tolist() == [_ > threshold for _ in self.values])
+        self.assertTrue((t <= -threshold).tolist() == [_ <= -threshold for _ in self.amounts])
+        self.assertTrue((s == t).tolist() == [x == y for x, y in zip(self.values, self.amounts)])
+        self.assertTrue((s >= t).tolist() == [x >= y for x, y in zip(self.values, self.amounts)])
+
+    def test_float(self):
+        t = pd.Series(self.amounts, dtype="int256")
+        np.testing.assert_allclose(t.astype(float), np.array(self.amounts, dtype=float), rtol=1e-15)
+        np.testing.assert_allclose(scale_decimals(t, 18), np.array(self.amounts, dtype=float) / 1e18, rtol=1e-15)
+        np.testing.assert_allclose(scale_decimals(pd.Series([10 ** 6]), 6), [1.0])
+
+    def test_reduce(self):
+        s, t = pd.Series(self.values, dtype="uint256"), pd.Series(self.amounts, dtype="int256")
+        self.assertTrue(s.sum() == sum(self.values)) # exact, beyond 256 bits
+        self.assertTrue(t.sum() == sum(self.amounts))
+        self.assertTrue(t.min() == min(self.amounts) and t.max() == max(self.amounts))
+        self.assertTrue(t.sort_values().tolist() == sorted(self.amounts))
+        self.assertTrue(s.sort_values(ascending=False).tolist() == sorted(self.values, reverse=True))
+        self.assertTrue(t.idxmax() == int(np.argmax(np.array(self.amounts, dtype=object))))
+        # in float64, like mean
+        floats = np.array(self.amounts, dtype=float)
+        np.testing.assert_allclose([t.std(), t.var(), t.median()], [floats.std(ddof=1), floats.var(ddof=1), np.median(floats)])
+        desc = t.describe()
+        self.assertTrue(desc["count"] == len(self.amounts))
+        np.testing.assert_allclose(desc[["std", "50%"]].to_numpy(float), [floats.std(ddof=1), np.median(floats)])
+
+    def test_groupby(self):
+        keys = [random.randrange(10) for _ in self.amounts]
+        df = pd.DataFrame({"k": keys, "v": pd.Series(self.amounts, dtype="int256"), "o": pd.Series(self.amounts, dtype=object)})
+        g = df.groupby("k")
+        for how in ["sum", "min", "max", "first", "last"]:
+            res = getattr(g["v"], how)()
+            self.assertTrue(res.dtype == "int256")
+            self.assertTrue(res.tolist() == getattr(g["o"], how)().tolist(), how)
+        np.testing.assert_allclose(g["v"].mean(), g["o"].apply(lambda x: float(np.mean([float(_) for _ in x]))), rtol=1e-12)
+        df = pd.DataFrame({"k": [0, 0, 1], "v": pd.Series([2 ** 255, 2 ** 255, 1], dtype="uint256")})
+        self.assertRaises(OverflowError, lambda: df.groupby("k")["v"].sum())
+
+    def test_missing(self):
+        s = pd.Series([1, None, 2 ** 200], dtype="uint256")
+        self.assertTrue(s.isna().tolist() == [False, True, False])
+        self.assertTrue(s.sum() == 1 + 2 ** 200)
+        self.assertTrue(s.fillna(0).tolist() == [1, 0, 2 ** 200])
+        self.assertTrue(np.isnan(s.astype(float)[1]))
+        df = pd.DataFrame({"k": [1, 2], "v": s.iloc[[0, 2]].values}).merge(pd.DataFrame({"k": [1, 3]}), how="right")
+        self.assertTrue(df["v"].dtype == "uint256" and df["v"].isna().tolist() == [False, True])
+
+    def test_concat_str(self):
+        s = pd.Series(self.values[:10], dtype="uint256")
+        self.assertTrue(pd.concat([s, s]).dtype == "uint256")
+        self.assertTrue(s.astype(str).tolist() == [str(_) for _ in self.values[:10]])
+        self.assertTrue(s.nbytes == 33 * 10)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,112 @@
+import unittest
+import numpy as np
+import pandas as pd
+from unknownlib.evm.uniswap import (
+    resolve_decimals, sqrt_price_to_price, v2_swaps, v3_swaps, v2_sync_prices, liquidity_flows, ohlcv, trader_pnl)
+
+
+class Book:
+    """ Stand-in of ERC20ContractBook.get_decimals. """
+
+    def get_decimals(self, token):
+        return {"usdc": 6, "weth": 18}[token]
+
+
+class TestUniswap(unittest.TestCase):
+
+    def setUp(self):
+        # WETH/USDC pool: token0 = USDC (6 decimals), token1 = WETH (18 decimals), at 2000 USDC per WETH
+        self.df_v3 = pd.DataFrame({
+            "blockNumber": [10, 10, 11, 25],
+            "logIndex": [3, 1, 0, 2],
+            "transactionHash": ["a", "b", "c", "d"],
+            "args_sender": ["r"] * 4,
+            "args_recipient": ["alice", "bob", "alice", "bob"],
+            # the trader pays 2000 USDC for 1 WETH, or receives 2100 USDC for 1 WETH, etc.
+            "args_amount0": pd.Series([2000 * 10 ** 6, -2100 * 10 ** 6, 4000 * 10 ** 6, -1900 * 10 ** 6], dtype=object),
+            "args_amount1": pd.Series([-10 ** 18, 10 ** 18, -2 * 10 ** 18, 10 ** 18], dtype=object),
+            "args_sqrtPriceX96": pd.Series([int((1 / 2000 * 10 ** 12) ** 0.5 * 2 ** 96)] * 4, dtype=object),
+            "args_tick": [0] * 4,
+        })
+
+    def test_resolve_decimals(self):
+        self.assertTrue(resolve_decimals(6) == 6)
+        self.assertTrue(resolve_decimals("weth", Book()) == 18)
+        self.assertRaises(AssertionError, lambda: resolve_decimals("weth"))
+
+    def test_v3_swaps(self):
+        for dtype in [object, "int256"]:
+            df = self.df_v3.astype({"args_amount0": dtype, "args_amount1": dtype})
+            res = v3_swaps(df, decimals0="usdc", decimals1="weth", book=Book(), invert=True)
+            self.assertTrue(np.allclose(res["price"], [2000, 2100, 2000, 1900]))
+            self.assertTrue(np.allclose(res["pool_price"], 2000))
+            self.assertTrue(res["side"].tolist() == [-1, 1, -1, 1])
+            self.assertTrue(np.allclose(res["amount1"], [1, -1, 2, -1]))
+            self.assertTrue(res["trader"].tolist() == ["alice", "bob", "alice", "bob"])
+            res = v3_swaps(df, decimals0=6, decimals1=18)
+            self.assertTrue(np.allclose(res["price"], 1 / np.array([2000, 2100, 2000, 1900])))
+
+    def test_sqrt_price_to_price(self):
+        s = pd.Series([2 ** 96, 2 ** 97], dtype="uint256")
+        self.assertTrue(np.allclose(sqrt_price_to_price(s, 18, 18), [1, 4]))
+        self.assertTrue(np.allclose(sqrt_price_to_price(s, 18, 6, invert=True), [1e-12, 0.25e-12]))
+
+    def test_v2(self):
+        df = pd.DataFrame({
+            "blockNumber": [1, 2],
+            "logIndex": [0, 0],
+            "args_amount0In": [0, 3 * 10 ** 18],
+            "args_amount1In": [2 * 10 ** 6, 0],
+            "args_amount0Out": [10 ** 18, 0],
+            "args_amount1Out": [0, 3 * 10 ** 6],
+            "args_to": ["x", "y"],
+        })
+        res = v2_swaps(df, decimals0=18, decimals1=6)
+        self.assertTrue(np.allclose(res["price"], [2, 1]))
+        self.assertTrue(res["side"].tolist() == [1, -1])
+        self.assertTrue(np.allclose(res["volume1"], [2, 3]))
+        df = pd.DataFrame({"blockNumber": [1, 2], "logIndex": [0, 0],
+                           "args_reserve0": [10 ** 18, 0], "args_reserve1": [5 * 10 ** 6, 0]})
+        res = v2_sync_prices(df, decimals0=18, decimals1=6)
+        self.assertTrue(res["pool_price"].iloc[0] == 5)
+        self.assertTrue(np.isnan(res["pool_price"].iloc[1]))
+
+    def test_liquidity_flows(self):
+        df_mint = pd.DataFrame({"blockNumber": [2], "logIndex": [0], "args_sender": ["a"],
+                                "args_amount0": [10 ** 18], "args_amount1": [10 ** 6]})
+        df_burn = pd.DataFrame({"blockNumber": [1], "logIndex": [0], "args_sender": ["r"], "args_to": ["b"],
+                                "args_amount0": [10 ** 18], "args_amount1": [10 ** 6]})
+        res = liquidity_flows(df_mint, df_burn, decimals0=18, decimals1=6)
+        self.assertTrue(res["owner"].tolist() == ["b", "a"])
+        self.assertTrue(res["amount0"].tolist() == [-1, 1])
+
+    def test_ohlcv(self):
+        trades = v3_swaps(self.df_v3, decimals0=6, decimals1=18, invert=True)
+        bars = ohlcv(trades, 10, invert=True)
+        self.assertTrue(bars.index.tolist() == [10, 20])
+        # sorted by block and log index
+        self.assertTrue(bars.loc[10, ["open", "high", "low", "close"]].tolist() == [2100, 2100, 2000, 2000])
+        self.assertTrue(bars["n_trades"].tolist() == [3, 1])
+        self.assertTrue(np.isclose(bars.loc[10, "vwap"], 8100 / 4))
+        trades["timestamp"] = pd.to_datetime(trades["blockNumber"] * 12, unit="s", utc=True)
+        bars = ohlcv(trades, "1min", invert=True)
+        self.assertTrue(bars["n_trades"].tolist() == [3, 1])
+        self.assertRaises(AssertionError, lambda: ohlcv(trades.drop(columns="timestamp"), "1min"))
+
+    def test_trader_pnl(self):
+        # prices of token0 (WETH) in token1 (USDC)
+        df = self.df_v3.rename(columns={"args_amount0": "args_amount1", "args_amount1": "args_amount0"})
+        trades = v3_swaps(df, decimals0=18, decimals1=6)
+        res = trader_pnl(trades)
+        # alice bought 3 WETH for 6000 USDC, bob sold 2 WETH for 4000 USDC; marked at 1900
+        self.assertTrue(np.allclose(res.loc["alice", ["position", "cash", "pnl"]], [3, -6000, -300]))
+        self.assertTrue(np.allclose(res.loc["bob", ["position", "cash", "pnl"]], [-2, 4000, 200]))
+        self.assertTrue(np.isclose(trader_pnl(trades, mark_price=2000).loc["alice", "pnl"], 0))
+        # the default mark doesn't depend on how prices are quoted
+        inverted = trader_pnl(v3_swaps(df, decimals0=18, decimals1=6, invert=True))
+        pd.testing.assert_frame_equal(inverted, res)
+
+
+if __name__ == "__main__":
+
+    unittest.main()
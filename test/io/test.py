@@ -0,0 +1,64 @@
+import os
+import tempfile
+import unittest
+import numpy as np
+from unknownlib.io import atomic_write, iter_ndjson, read_ndjson, write_ndjson, load_json, dump_json
+
+
+class TestIO(unittest.TestCase):
+
+    def setUp(self):
+        self._dir = tempfile.TemporaryDirectory()
+        self.dir = self._dir.name
+        self.records = [{"tokenId": i, "name": f"#{i}", "attributes": [{"trait": "x", "value": i * 0.5}]} for i in range(100)]
+
+    def tearDown(self):
+        self._dir.cleanup()
+
+    def test_ndjson(self):
+        for ext in ["ndjson", "ndjson.gz"]:
+            path = os.path.join(self.dir, "sub", f"metadata.{ext}")
+            self.assertTrue(write_ndjson((_ for _ in self.records), path) == 100)
+            self.assertTrue(read_ndjson(path) == self.records)
+            self.assertTrue(next(iter_ndjson(path)) == self.records[0])
+            write_ndjson(self.records[:2], path, append=True)
+            self.assertTrue(read_ndjson(path) == self.records + self.records[:2])
+        path = os.path.join(self.dir, "np.ndjson")
+        write_ndjson([{"x": np.int64(1), "b": b"\x01"}], path, default=lambda x: x.hex())
+        self.assertTrue(read_ndjson(path) == [{"x": 1, "b": "01"}])
+
+    def test_wide_ints_and_keys(self):
+        records = [{"tokenId": 2 ** 200, "balance": -2 ** 255}, {"v": 2 ** 64 - 1, "x": 0.5}, {1: "x"}]
+        path = os.path.join(self.dir, "wide.ndjson")
+        self.assertTrue(write_ndjson(records, path) == 3)
+        self.assertTrue(read_ndjson(path) == records[:2] + [{"1": "x"}])
+        self.assertTrue(type(read_ndjson(path)[0]["tokenId"]) is int)
+        path = os.path.join(self.dir, "wide.json")
+        dump_json({"v": 2 ** 200}, path)
+        self.assertTrue(load_json(path) == {"v": 2 ** 200})
+
+    def test_atomic_write(self):
+        path = os.path.join(self.dir, "metadata.ndjson")
+        write_ndjson(self.records, path)
+
+        def records():
+            yield self.records[0]
+            raise RuntimeError("interrupted")
+
+        self.assertRaises(RuntimeError, lambda: write_ndjson(records(), path))
+        self.assertTrue(read_ndjson(path) == self.records)
+        self.assertTrue(os.listdir(self.dir) == ["metadata.ndjson"])
+        with atomic_write(os.path.join(self.dir, "a.txt"), "w") as f:
+            f.write("a")
+        with open(os.path.join(self.dir, "a.txt")) as f:
+            self.assertTrue(f.read() == "a")
+
+    def test_json(self):
+        path = os.path.join(self.dir, "a.json")
+        dump_json(self.records, path)
+        self.assertTrue(load_json(path) == self.records)
+
+
+if __name__ == "__main__":
+
+    unittest.main()
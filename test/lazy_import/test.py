@@ -0,0 +1,82 @@
+import sys
+import json
+import unittest
+import subprocess
+
+
+def _import_in_subprocess(statement: str) -> dict:
+    """ Run `statement` in a fresh interpreter; return import time in
+    seconds and which heavy dependencies got imported.
+    """
+    code = f"""
+import sys, time, json
+t = time.perf_counter()
+{statement}
+t = time.perf_counter() - t
+print(json.dumps({{"time": t, "modules": [m for m in ["pandas", "numpy", "web3", "eth_account", "ens", "bokeh"] if m in sys.modules]}}))
+"""
+    out = subprocess.run([sys.executable, "-c", code], check=True, capture_output=True, text=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+class TestLazyImportMethods(unittest.TestCase):
+
+    budget = 0.5 # seconds
+
+    def assert_light(self, statement: str):
+        res = _import_in_subprocess(statement)
+        self.assertEqual(res["modules"], [], f"{statement} imported {res['modules']}")
+        self.assertLess(res["time"], self.budget, f"{statement} took {res['time']:.3f}s")
+
+    def test_unknownlib(self):
+        self.assert_light("import unknownlib")
+
+    def test_scheme(self):
+        self.assert_light("import unknownlib.scheme")
+        self.assert_light("from unknownlib.scheme.main import main")
+
+    def test_evm(self):
+        self.assert_light("from unknownlib.evm import Addr, Chain, ERC20")
+
+    def test_lazy_attrs(self):
+        res = _import_in_subprocess("from unknownlib import cross_join")
+        self.assertIn("pandas", res["modules"])
+        res = _import_in_subprocess("from unknownlib.evm import FastW3, flatten_dict")
+        self.assertIn("web3", res["modules"])
+
+    def test_star_scheme(self):
+        ns = {}
+        exec("from unknownlib.scheme import *", ns)
+        for name in ["Element", "ElementManager", "Serializer", "Scheduler", "SimpleScheduler", "FreqScheduler",
+                     "Logger", "Boobook", "Executor", "Optimizer", "log"]:
+            self.assertIn(name, ns)
+        self.assertNotIn("lazy_getattr", ns)
+        ns = {}
+        exec("from unknownlib.scheme.element import *", ns)
+        self.assertIn("Serializer", ns)
+        self.assertNotIn("lazy_getattr", ns)
+
+    def test_star_exports(self):
+        ns = {}
+        exec("from unknownlib import *", ns)
+        self.assertIn("log", ns)
+        self.assertNotIn("lazy_getattr", ns)
+        ns = {}
+        exec("from unknownlib.evm import *", ns)
+        for name in ["log", "Addr", "Chain", "ERC20", "FastW3", "ContractBook", "ERC20ContractBook", "Etherscan",
+                     "Etherscanner", "flatten_dict", "interpolate_timestamp", "Coin", "ChainLinkPriceFeed",
+                     "Web3Connector"]:
+            self.assertIn(name, ns)
+        self.assertNotIn("lazy_getattr", ns)
+
+    def test_accessor(self):
+        for statement in ["import pandas as pd; import unknownlib.df",
+                          "import unknownlib; import pandas as pd; unknownlib.agg_df",
+                          "import unknownlib.evm; import pandas as pd; from unknownlib import cross_join"]:
+            out = subprocess.run([sys.executable, "-c", f"{statement}; print(hasattr(pd.DataFrame(), 'uk'))"],
+                                 check=True, capture_output=True, text=True)
+            self.assertEqual(out.stdout.strip(), "True", statement)
+
+
+if __name__ == '__main__':
+    unittest.main()
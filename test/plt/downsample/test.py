@@ -0,0 +1,33 @@
+import unittest
+import numpy as np
+from unknownlib.plt.downsample import lttb, minmax, downsample
+
+
+class TestDownsampleMethods(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.x = np.arange(100_000, dtype=float)
+        self.y = np.cumsum(rng.standard_normal(len(self.x)))
+
+    def test_lttb(self):
+        idx = lttb(self.x, self.y, 1000)
+        self.assertEqual(len(idx), 1000)
+        self.assertEqual(idx[0], 0)
+        self.assertEqual(idx[-1], len(self.x) - 1)
+        self.assertTrue(np.all(np.diff(idx) > 0))
+        self.assertEqual(len(lttb(self.x[:10], self.y[:10], 1000)), 10)
+
+    def test_minmax(self):
+        idx = minmax(self.x, self.y, 1000)
+        self.assertLessEqual(len(idx), 1000)
+        self.assertTrue(np.all(np.diff(idx) > 0))
+        self.assertIn(np.argmax(self.y), idx)
+        self.assertIn(np.argmin(self.y), idx)
+
+    def test_downsample(self):
+        self.assertRaises(AssertionError, lambda: downsample(self.x, self.y, 10, method="x"))
+
+
+if __name__ == '__main__':
+    unittest.main()
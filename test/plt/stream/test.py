@@ -0,0 +1,35 @@
+import unittest
+import urllib.request
+import pandas as pd
+from bokeh.document import Document
+from unknownlib.plt.stream import StreamingChart
+
+
+class TestStreamingChartMethods(unittest.TestCase):
+
+    def test_push(self):
+        chart = StreamingChart(x="time", y=["a", "b"], rollover=3)
+        chart.push_df(pd.DataFrame({
+            "time": pd.date_range("20230101", periods=5, freq="1min", tz="UTC"),
+            "a": range(5),
+            "b": range(5)}))
+        doc = Document()
+        chart.make_doc(doc)
+        source = list(chart._docs.values())[0]
+        self.assertEqual(list(source.data["a"]), [2, 3, 4]) # seeded with the latest `rollover` points
+        self.assertEqual(source.data["time"][0], pd.Timestamp("20230101 00:02").value / 1e6)
+        self.assertRaises(AssertionError, lambda: chart.push({"time": [0], "a": [1]}))
+
+    def test_serve(self):
+        chart = StreamingChart(x="t", y="a", datetime_x=False)
+        port = chart.serve(port=0)
+        chart.push({"t": [1, 2], "a": [3., 4.]})
+        with urllib.request.urlopen(f"http://localhost:{port}/") as r:
+            self.assertEqual(r.status, 200)
+        # the port is taken: raise rather than hang
+        self.assertRaises(OSError, lambda: StreamingChart(x="t", y="a", datetime_x=False).serve(port=port))
+        chart.stop()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,49 @@
+import sys
+import unittest
+from unknownlib.scheme import Element, ElementCatalog
+
+
+class A(Element):
+    pass
+
+
+class B(A):
+    pass
+
+
+class C(A):
+    pass
+
+
+class D(B, C):
+    pass
+
+
+class TestCatalogMethods(unittest.TestCase):
+
+    def test_search_subclasses(self):
+        self.assertEqual(ElementCatalog.search_subclasses(A), [B, D, C])
+
+    def test_lazy(self):
+        ElementCatalog.register_lazy_element_type(
+            "boobook", "unknownlib.scheme.element.boobook:Boobook")
+        self.assertNotIn("unknownlib.scheme.element.boobook", sys.modules)
+        type_ = ElementCatalog.get_element_type("boobook")
+        self.assertEqual(type_.__name__, "Boobook")
+        self.assertIn("unknownlib.scheme.element.boobook", sys.modules)
+
+    def test_fallback_to_subclasses(self):
+        self.assertIs(ElementCatalog.get_element_type("d"), D)
+        self.assertRaises(AssertionError, lambda: ElementCatalog.get_element_type("no_such_type"))
+
+    def test_decorator(self):
+
+        @ElementCatalog.register_element_type
+        class E(Element):
+            pass
+
+        self.assertIs(ElementCatalog.get_element_type("e"), E)
+
+
+if __name__ == '__main__':
+    unittest.main()
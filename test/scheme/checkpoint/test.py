@@ -0,0 +1,57 @@
+import os
+import unittest
+import tempfile
+from pathlib import Path
+from unknownlib.scheme import Element, ElementCatalog
+from unknownlib.scheme.main import run_scheme
+
+
+class Counter(Element):
+    """ Counts calc rounds; crashes at time `crash_at` if set. """
+
+    def init(self):
+        self._n = 0
+
+    def calc(self, time):
+        if time == self._params.get("crash_at"):
+            raise RuntimeError("crashed")
+        self._n += 1
+
+    def field(self, s):
+        return self._n
+
+    def get_state(self):
+        return {"n": self._n}
+
+    def set_state(self, state):
+        self._n = state["n"]
+
+
+class TestCheckpointMethods(unittest.TestCase):
+
+    def test_resume(self):
+        ElementCatalog.register_all_element_types()
+        out_dir = Path(tempfile.mkdtemp())
+        checkpoint_file = str(out_dir / "checkpoint.pkl")
+        config = {
+            "scheduler": {"type": "simple_scheduler", "start": 0, "end": 10},
+            "counter": {"type": "counter", "crash_at": 6},
+            "serializer": {
+                "type": "serializer",
+                "output_file": str(out_dir / "out.csv"),
+                "vars": ["counter.n"],
+            },
+        }
+        self.assertRaises(RuntimeError, lambda: run_scheme(config, checkpoint_file=checkpoint_file, checkpoint_every=2))
+        self.assertTrue(os.path.exists(checkpoint_file))
+        self.assertFalse(os.path.exists(checkpoint_file + ".tmp"))
+
+        config["counter"]["crash_at"] = None
+        manager = run_scheme(config, checkpoint_file=checkpoint_file, checkpoint_every=2, resume=True)
+        df = manager.get_element_by_name("serializer").to_df()
+        self.assertEqual(list(df["time"]), list(range(10)))
+        self.assertEqual(list(df["counter.n"]), list(range(1, 11)))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,42 @@
+import unittest
+from unknownlib.scheme import Element, ElementManager, Scheduler, SimpleScheduler
+
+
+class Peer(Element):
+
+    def init(self):
+        pass
+
+
+class Watcher(Element):
+
+    def resolve_peers(self):
+        self._peer = self.get_element_by_name("peer")
+        self._scheduler = self.get_element_by_type(Scheduler)
+
+    def init(self):
+        # handles are resolved before any init
+        self.peer_type = type(self._peer)
+
+
+class TestManagerMethods(unittest.TestCase):
+
+    def test_lookup(self):
+        manager = ElementManager()
+        manager.create_element("scheduler", {"type": "simple_scheduler", "start": 0, "end": 1})
+        manager.create_element("watcher", {"type": "watcher"})
+        manager.create_element("peer", {"type": "peer"})
+        manager.create_element("peer2", {"type": "peer"})
+        manager.init_elements()
+
+        watcher = manager.get_element_by_name("watcher")
+        self.assertIs(watcher.peer_type, Peer)
+        self.assertIs(watcher._scheduler, manager.get_element_by_name("scheduler"))
+        self.assertIs(manager.get_element_by_type(SimpleScheduler), watcher._scheduler)
+        self.assertIs(manager.get_element_by_type(Watcher), watcher)
+        self.assertRaises(AssertionError, lambda: manager.get_element_by_type(Peer))
+        self.assertRaises(AssertionError, lambda: manager.get_element_by_type(Element))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,47 @@
+import os
+import unittest
+import tempfile
+import pstats
+from pathlib import Path
+from unknownlib.scheme import ElementCatalog, ElementManager, Profiler
+
+
+class TestProfilerMethods(unittest.TestCase):
+
+    def test_profiler(self):
+        ElementCatalog.register_all_element_types()
+        out_dir = Path(tempfile.mkdtemp())
+        config = {
+            "scheduler": {"type": "simple_scheduler", "start": 0, "end": 10},
+            "booboobook": {"type": "boobook"},
+            "profiler": {
+                "type": "profiler",
+                "freq": 5,
+                "deadline": "1h",
+                "output_file": str(out_dir / "profile.csv"),
+                "cprofile_element": "booboobook",
+                "cprofile_file": str(out_dir / "booboobook.prof"),
+            },
+        }
+        manager = ElementManager()
+        for name, params in config.items():
+            manager.create_element(name, params)
+        manager.init_elements()
+        for time_ in manager.get_element_by_name("scheduler").schedule():
+            manager.calc_elements(time_)
+        manager.done_elements()
+
+        profiler = manager.profiler
+        self.assertEqual(profiler.tick_count, 10)
+        s = profiler.tick_summary()
+        self.assertTrue(0 <= s["p50"] <= s["p99"] <= s["max"])
+        df = profiler.to_df().set_index(["element", "phase"])
+        self.assertEqual(df.loc[("booboobook", "calc"), "count"], 10)
+        self.assertEqual(df.loc[("booboobook", "init"), "count"], 1)
+        self.assertEqual(df.loc[("profiler", "done"), "count"], 1)
+        self.assertTrue((out_dir / "profile.csv").exists())
+        pstats.Stats(str(out_dir / "booboobook.prof"))
+
+
+if __name__ == '__main__':
+    unittest.main()
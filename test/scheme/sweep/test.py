@@ -0,0 +1,59 @@
+import os
+import unittest
+import tempfile
+from pathlib import Path
+from unknownlib.df import cross_join
+from unknownlib.scheme import Element
+from unknownlib.scheme.sweep import expand_config, run_sweep, get_shared
+
+
+class Multiplier(Element):
+
+    def init(self):
+        self._factor = get_shared("factor") * self._params["k"]
+
+    def calc(self, time):
+        self._value = time * self._factor
+
+    def field(self, s):
+        return self._value
+
+
+def _init_worker():
+    return {"factor": 10}
+
+
+class TestSweepMethods(unittest.TestCase):
+
+    def setUp(self):
+        self.out_dir = Path(tempfile.mkdtemp())
+        self.template = {
+            "scheduler": {"type": "simple_scheduler", "start": 0, "end": "%n%"},
+            "mult": {"type": "multiplier", "k": "%k%"},
+            "serializer": {
+                "type": "serializer",
+                "output_file": str(self.out_dir / "%RUN_ID%_k%k%.csv"),
+                "vars": ["mult.value"],
+            },
+        }
+        self.grid = cross_join(n=[2, 3], k=[1, 2])
+
+    def test_expand_config(self):
+        configs = expand_config(self.template, self.grid)
+        self.assertEqual(len(configs), 4)
+        self.assertEqual(configs[3]["scheduler"]["end"], 3)
+        self.assertEqual(configs[3]["mult"]["k"], 2)
+        self.assertEqual(configs[3]["serializer"]["output_file"], str(self.out_dir / "3_k2.csv"))
+        self.assertEqual(self.template["mult"]["k"], "%k%") # template is untouched
+
+    def test_run_sweep(self):
+        for cores in [1, 2]:
+            df = run_sweep(self.template, self.grid, cores=cores, init_worker=_init_worker)
+            self.assertEqual(len(df), 2 + 2 + 3 + 3)
+            self.assertEqual(list(df["run_id"].unique()), [0, 1, 2, 3])
+            self.assertTrue((df["mult.value"] == df["time"] * df["k"] * 10).all())
+            self.assertTrue((self.out_dir / "3_k2.csv").exists())
+
+
+if __name__ == '__main__':
+    unittest.main()